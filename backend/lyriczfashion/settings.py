@@ -138,9 +138,15 @@ JAZZMIN_UI_TWEAKS = {
     },
 }
 
+# Keep this the only REST_FRAMEWORK definition: a second one replaces it wholesale
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'products.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'products.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -148,9 +154,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # Only views that name a throttle are limited
+    'DEFAULT_THROTTLE_RATES': {
+        'stock_reservations': os.environ.get('STOCK_RESERVATION_RATE', '30/hour'),
+    },
 }
 
 MIDDLEWARE = [
+    'products.instrumentation.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -187,7 +198,7 @@ WSGI_APPLICATION = 'lyriczfashion.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.environ.get('DB_NAME', 'user_lczfashion'),
         'USER': os.environ.get('DB_USER', 'postgres'),
         'PASSWORD': os.environ.get('DB_PASSWORD', 'password'),
@@ -253,16 +264,72 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
-# REST Framework Settings
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ),
-    'DEFAULT_PERMISSION_CLASSES': (
-        'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    ),
+# Cache
+# Defaults to a per-process memory cache; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+# With DEBUG off a per-process cache fails `manage.py check --deploy` (products.E001).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'lyriczfashion'),
+    }
 }
 
+# Seconds a rendered storefront feed page stays cached (invalidated on product/variant saves)
+FEED_CACHE_TIMEOUT = int(os.environ.get('FEED_CACHE_TIMEOUT', '300'))
+
+# Seconds the mockup catalog document is cached; edits invalidate it sooner, stock is overlaid live
+MOCKUP_CATALOG_CACHE_TIMEOUT = int(os.environ.get('MOCKUP_CATALOG_CACHE_TIMEOUT', '3600'))
+
+# JSON encoder behind products.renderers: 'auto' uses orjson when installed, 'json' forces the stdlib
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+# Rows fetched and serialized per chunk when a list endpoint is asked to ?stream=1
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '500'))
+
+# Design Library search backend (dotted path). Empty picks PostgreSQL full-text
+# search on PostgreSQL and the in-process ranker elsewhere (e.g. SQLite tests).
+DESIGN_SEARCH_BACKEND = os.environ.get('DESIGN_SEARCH_BACKEND') or None
+
+# Widths (px) of the WebP/JPEG renditions generated for uploaded images
+IMAGE_RENDITION_WIDTHS = [160, 320, 640, 1024]
+
+# Uploaded images are validated, re-encoded and resized inside the request by default.
+# Set IMAGE_JOBS_ASYNC=True to queue that work for `manage.py process_image_jobs` instead;
+# only do so where that worker is deployed, or uploads are never processed.
+IMAGE_JOBS_ASYNC = os.environ.get('IMAGE_JOBS_ASYNC', 'False') == 'True'
+IMAGE_JOB_WORKERS = int(os.environ.get('IMAGE_JOB_WORKERS', '2'))
+
+# Seconds checkout stock reservations hold variant stock before it is released again
+STOCK_RESERVATION_TTL = int(os.environ.get('STOCK_RESERVATION_TTL', '900'))
+# Holds need a login and are capped, so nobody can take the shelf for themselves:
+# units of one variant per hold, and live holds (tokens) per user
+STOCK_RESERVATION_MAX_QUANTITY = int(os.environ.get('STOCK_RESERVATION_MAX_QUANTITY', '10'))
+STOCK_RESERVATION_MAX_LIVE = int(os.environ.get('STOCK_RESERVATION_MAX_LIVE', '3'))
+
+# Seconds the per-variant availability map may be served before it is rebuilt
+# (it is also dropped as soon as stock changes)
+AVAILABILITY_CACHE_TIMEOUT = int(os.environ.get('AVAILABILITY_CACHE_TIMEOUT', '5'))
+
+# Half-life of a design use in the Design Library's "trending" ordering. Scores are
+# stored relative to DESIGN_TRENDING_EPOCH (YYYY-MM-DD, default 2025-01-01); move it
+# forward and run `manage.py rebuild_design_stats` when check warns products.W002
+DESIGN_TRENDING_HALF_LIFE_DAYS = float(os.environ.get('DESIGN_TRENDING_HALF_LIFE_DAYS', '7'))
+DESIGN_TRENDING_EPOCH = os.environ.get('DESIGN_TRENDING_EPOCH') or None
+
+# Fraction of requests (0-1) profiled for query count, SQL/serializer time and
+# repeated statements; profiled responses carry a Server-Timing header and feed
+# the admin-only /api/request-stats window (last REQUEST_PROFILING_WINDOW per view)
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '0'))
+REQUEST_PROFILING_WINDOW = int(os.environ.get('REQUEST_PROFILING_WINDOW', '200'))
+# Log a warning when one statement repeats this many times in a profiled request
+REQUEST_PROFILING_DUPLICATE_THRESHOLD = int(os.environ.get('REQUEST_PROFILING_DUPLICATE_THRESHOLD', '10'))
+REQUEST_PROFILING_SLOW_QUERY_MS = int(os.environ.get('REQUEST_PROFILING_SLOW_QUERY_MS', '200'))
+
+# Profiles every test request and fails tests whose requests repeat a statement
+# REQUEST_PROFILING_DUPLICATE_THRESHOLD times (`manage.py test --query-report` for a summary)
+TEST_RUNNER = 'products.testing.QueryAuditTestRunner'
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -22,6 +22,9 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/settings/', include('settings.urls')),
+    # Async read-only endpoints for ASGI deployments (same payloads as their sync twins)
+    path('api/async/settings/', include('settings.async_urls')),
+    path('api/async/', include('products.async_urls')),
     path('api/', include('products.urls')),
     # Keep old routes for backward compatibility
     path('settings/', include('settings.urls')),
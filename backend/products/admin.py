@@ -1,8 +1,11 @@
 from django.contrib import admin
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from urllib.parse import quote
-from .models import Category, SellerProfile, Store, Product, Order, OrderItem, DesignLibraryItem, DesignCommission, WholesaleInquiry
+from .models import Category, SellerProfile, Store, Product, Order, OrderItem, DesignLibraryItem, DesignCommission, CommissionPayout, StoreDailySales, ImageJob, StockReservation, StockAdjustment, WholesaleInquiry
 from .mockup_models import MockupType, MockupVariant
+from .inventory import annotate_expected_stock, reconcile_stock
 
 
 @admin.register(Category)
@@ -41,8 +44,9 @@ class SellerProfileAdmin(admin.ModelAdmin):
 
 @admin.register(DesignLibraryItem)
 class DesignLibraryItemAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'owner', 'category', 'commission_per_use', 'is_active', 'is_featured', 'created_at']
+    list_display = ['id', 'name', 'owner', 'category', 'commission_per_use', 'use_count', 'paid_commission', 'is_active', 'is_featured', 'created_at']
     list_filter = ['is_active', 'is_featured', 'category', 'created_at']
+    readonly_fields = ['use_count', 'quantity_used', 'pending_commission', 'paid_commission', 'trending_score', 'last_used_at']
     search_fields = ['name', 'owner__username', 'owner__email', 'category']
     list_editable = ['is_active', 'is_featured']
     actions = ['approve_logos', 'reject_logos', 'mark_as_featured', 'unmark_as_featured']
@@ -75,6 +79,57 @@ class DesignCommissionAdmin(admin.ModelAdmin):
     search_fields = ['owner__username', 'owner__email', 'used_by__username', 'used_by__email', 'design__name']
 
 
+@admin.register(CommissionPayout)
+class CommissionPayoutAdmin(admin.ModelAdmin):
+    list_display = ['id', 'order', 'owner', 'amount', 'commission_count', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['owner__username', 'owner__email', 'order__id']
+    readonly_fields = ['order', 'owner', 'amount', 'commission_count', 'created_at']
+
+
+@admin.register(StoreDailySales)
+class StoreDailySalesAdmin(admin.ModelAdmin):
+    list_display = ['store', 'date', 'orders_count', 'items_sold', 'revenue', 'profit', 'updated_at']
+    list_filter = ['date']
+    search_fields = ['store__name', 'store__slug']
+    list_select_related = ['store']
+    readonly_fields = ['store', 'date', 'orders_count', 'items_sold', 'revenue', 'profit', 'updated_at']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['token', 'variant', 'quantity', 'status', 'user', 'order', 'expires_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['token', 'user__username', 'order__id']
+    list_select_related = ['variant__mockup_type', 'user', 'order']
+    readonly_fields = ['token', 'variant', 'quantity', 'user', 'order', 'status', 'expires_at', 'created_at', 'updated_at']
+
+
+@admin.register(StockAdjustment)
+class StockAdjustmentAdmin(admin.ModelAdmin):
+    list_display = ['variant', 'quantity', 'reason', 'note', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['variant__mockup_type__name', 'variant__color_name', 'note']
+    list_select_related = ['variant__mockup_type']
+    readonly_fields = ['variant', 'quantity', 'reason', 'note', 'created_at']
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'model_label', 'object_id', 'status', 'attempts', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'model_label', 'created_at']
+    search_fields = ['model_label', 'object_id', 'error']
+    readonly_fields = ['model_label', 'object_id', 'fields', 'requested_by', 'attempts', 'error', 'result', 'locked_by', 'started_at', 'finished_at', 'created_at', 'updated_at']
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=ImageJob.STATUS_RUNNING).update(
+            status=ImageJob.STATUS_PENDING, attempts=0, error='', run_after=timezone.now()
+        )
+        self.message_user(request, f"{updated} job(s) queued again")
+    retry_jobs.short_description = 'Retry selected jobs'
+
+
 @admin.register(WholesaleInquiry)
 class WholesaleInquiryAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'phone', 'company', 'created_at']
@@ -347,13 +402,46 @@ class MockupTypeAdmin(admin.ModelAdmin):
     )
 
 
+class StockDriftFilter(admin.SimpleListFilter):
+    """Variants whose stored stock no longer matches adjustments and order history"""
+    title = 'stock drift'
+    parameter_name = 'stock_drift'
+
+    def lookups(self, request, model_admin):
+        return [('yes', 'Drifted'), ('no', 'Matches history')]
+
+    def queryset(self, request, queryset):
+        drifted = Q(opened_at__isnull=False) & ~Q(stock=F('expected_stock'))
+        if self.value() == 'yes':
+            return queryset.filter(drifted)
+        if self.value() == 'no':
+            return queryset.exclude(drifted)
+        return queryset
+
+
 @admin.register(MockupVariant)
 class MockupVariantAdmin(admin.ModelAdmin):
-    list_display = ['mockup_type', 'size', 'color_name', 'color_hex_display', 'effective_price', 'stock', 'is_active', 'created_at']
-    list_filter = ['mockup_type', 'size', 'is_active', 'created_at']
+    list_display = ['mockup_type', 'size', 'color_name', 'color_hex_display', 'effective_price', 'stock', 'expected_stock_display', 'is_active', 'created_at']
+    list_filter = [StockDriftFilter, 'mockup_type', 'size', 'is_active', 'created_at']
     search_fields = ['mockup_type__name', 'color_name', 'size']
     list_select_related = ['mockup_type']
     list_editable = ['stock', 'is_active']
+    actions = ['reset_stock_to_expected']
+
+    def get_queryset(self, request):
+        return annotate_expected_stock(super().get_queryset(request))
+
+    def expected_stock_display(self, obj):
+        if obj.opened_at is None or obj.stock == obj.expected_stock:
+            return obj.expected_stock
+        return mark_safe(f'<strong style="color:#b91c1c;">{obj.expected_stock} ({obj.stock - obj.expected_stock:+d})</strong>')
+    expected_stock_display.short_description = 'Expected stock'
+    expected_stock_display.admin_order_field = 'expected_stock'
+
+    def reset_stock_to_expected(self, request, queryset):
+        drifted = reconcile_stock(list(queryset.values_list('pk', flat=True)), fix=True)
+        self.message_user(request, f"Reset stock on {len(drifted)} variant(s)")
+    reset_stock_to_expected.short_description = 'Reset stock to order history'
     
     def color_hex_display(self, obj):
         if obj.color_hex:
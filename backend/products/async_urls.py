@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('feed', async_views.feed, name='async-feed'),
+    path('categories/active', async_views.active_categories, name='async-active-categories'),
+    path('mockup-types/catalog', async_views.mockup_catalog, name='async-mockup-catalog'),
+    path('mockup-variants/colors', async_views.mockup_colors, name='async-mockup-colors'),
+]
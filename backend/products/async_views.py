@@ -0,0 +1,88 @@
+"""
+Async versions of the public, read-only catalog endpoints, served under
+/api/async/ when the project runs on an ASGI server.
+
+Rows come from the async ORM and the cache is read with its async API, so a
+request waiting on either no longer holds a worker thread. Payloads, cache
+keys and invalidation are the same as the sync views; only the transport
+differs (plain Django views rendered with the default DRF renderer, since
+DRF views are sync-only).
+"""
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.request import Request
+
+from .availability import aget_availability_map, overlay_available_stock
+from .cache import aget_or_build, aget_or_build_feed_page, amockup_catalog_cache_key, catalog_timeout
+from .mockup_views import active_colors, catalog_document, catalog_types, with_live_stock
+from .models import Category, Product
+from .pagination import FeedPagination
+from .serializers import CategorySerializer, ProductListSerializer
+from .views import filter_storefront
+
+
+def json_response(data, status=200):
+    return HttpResponse(api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data), status=status, content_type='application/json')
+
+
+def error_response(exc):
+    return json_response(exc.detail, status=exc.status_code)
+
+
+@require_safe
+async def feed(request):
+    qs = filter_storefront(Product.objects.storefront().with_display_fields(), request.GET)
+    paginator = FeedPagination(paginate_by_default=True)
+
+    async def build():
+        # Loading the availability map up front keeps serialization free of queries
+        context = {'request': request, 'availability': await aget_availability_map()}
+        page = await paginator.apaginate_queryset(qs, Request(request))
+        data = ProductListSerializer(page, many=True, context=context).data
+        return paginator.get_paginated_data(data)
+
+    try:
+        page = await aget_or_build_feed_page(request, build)
+        return json_response(overlay_available_stock(page, await aget_availability_map()))
+    except APIException as exc:
+        return error_response(exc)
+
+
+@require_safe
+async def active_categories(request):
+    categories = [category async for category in Category.objects.filter(is_active=True).aiterator()]
+    return json_response(CategorySerializer(categories, many=True).data)
+
+
+@require_safe
+async def mockup_catalog(request):
+    """
+    The design studio's catalog document. The ETag is the cache key plus
+    the stock levels overlaid on it, so it changes exactly when a mockup
+    type, variant, category or stock level does.
+    """
+    key = await amockup_catalog_cache_key(request)
+    availability = await aget_availability_map()
+    etag = f'"{hashlib.md5(f"{key}|{sorted(availability.items())}".encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        async def build():
+            types = [mockup_type async for mockup_type in catalog_types().aiterator(chunk_size=100)]
+            return catalog_document(types, request)
+
+        document = await aget_or_build(key, build, catalog_timeout())
+        response = json_response(with_live_stock(document, availability))
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=300)
+    return response
+
+
+@require_safe
+async def mockup_colors(request):
+    """Get all available colors across all mockup types"""
+    return json_response([color async for color in active_colors().aiterator()])
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .mockup_models import MockupVariant
+
+AVAILABILITY_CACHE_KEY = 'availability:variants'
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 5)
+
+
+def get_availability_map():
+    """
+    {variant_id: stock} for every mockup variant, the single source the
+    product serializers read availability from. One small query at most
+    every few seconds, and dropped as soon as stock moves.
+    """
+    availability = cache.get(AVAILABILITY_CACHE_KEY)
+    if availability is None:
+        availability = dict(MockupVariant.objects.values_list('id', 'stock'))
+        cache.set(AVAILABILITY_CACHE_KEY, availability, _timeout())
+    return availability
+
+
+async def aget_availability_map():
+    """get_availability_map() for async views"""
+    availability = await cache.aget(AVAILABILITY_CACHE_KEY)
+    if availability is None:
+        # values() rather than values_list(): Django 5.0's values_list().aiterator() queries synchronously
+        rows = MockupVariant.objects.values('id', 'stock').aiterator()
+        availability = {row['id']: row['stock'] async for row in rows}
+        await cache.aset(AVAILABILITY_CACHE_KEY, availability, _timeout())
+    return availability
+
+
+def invalidate_availability():
+    """
+    Drop the map once the change is committed. Cached feed pages stay valid:
+    their available_stock is re-read from the map on every response.
+    """
+    transaction.on_commit(lambda: cache.delete(AVAILABILITY_CACHE_KEY))
+
+
+def overlay_available_stock(data, availability):
+    """A cached product list or paginated feed page with available_stock taken from `availability`"""
+    if isinstance(data, dict):
+        return {**data, 'results': overlay_available_stock(data['results'], availability)}
+    return [
+        {**row, 'available_stock': stock_for(row['mockup_variant'], row['available_stock'], availability)}
+        for row in data
+    ]
+
+
+def available_stock(product, availability):
+    """Live stock for a product: its variant's when it has one, otherwise its own counter"""
+    return stock_for(product.mockup_variant_id, product.stock, availability)
+
+
+def stock_for(mockup_variant_id, stock, availability):
+    """available_stock() from the two column values, for callers without a model instance"""
+    if mockup_variant_id:
+        return int(availability.get(mockup_variant_id) or 0)
+    return int(stock or 0)
@@ -0,0 +1,361 @@
+"""
+Synthetic dataset and request timings for `manage.py benchmark_api`.
+
+Everything runs in-process through DRF's test client, so a run needs no
+server, browser or external service and works on SQLite. The commands run
+it against a throwaway database and testing.isolated_cache(), since
+run_benchmarks() clears the cache.
+
+`manage.py benchmark_json` times rendering and parsing serialized products
+with the stdlib and orjson encoders (run_json_benchmark).
+
+`manage.py benchmark_concurrency` is the exception: it loads running WSGI
+and ASGI servers over HTTP (run_concurrency) to compare how each deployment
+holds up as concurrent clients are added.
+"""
+import platform
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from settings.models import PromotionalBanner, SiteSettings
+
+from .instrumentation import percentile
+from .mockup_models import MockupType, MockupVariant
+from .models import (
+    Category, DesignCategory, DesignLibraryItem, Order, OrderItem, Product, SellerProfile, Store, StockAdjustment,
+)
+from .sales import rebuild_store_daily_sales
+from .search import get_search_backend
+
+SIZES = ['S', 'M', 'L', 'XL']
+COLORS = [('White', '#FFFFFF'), ('Black', '#000000'), ('Navy', '#1F2A44'), ('Red', '#C62828'), ('Olive', '#6B7B3A')]
+WORDS = [
+    'lion', 'sunset', 'retro', 'wave', 'tiger', 'minimal', 'street', 'vintage', 'floral', 'skull',
+    'neon', 'mountain', 'cat', 'dragon', 'cricket', 'rickshaw', 'dhaka', 'bold', 'classic', 'galaxy',
+]
+
+DATASET_SIZES = {
+    'small': {'stores': 10, 'products_per_store': 10, 'mockup_types': 3, 'designs': 200, 'orders': 300},
+    'medium': {'stores': 50, 'products_per_store': 20, 'mockup_types': 5, 'designs': 2000, 'orders': 3000},
+    'large': {'stores': 200, 'products_per_store': 25, 'mockup_types': 8, 'designs': 10000, 'orders': 20000},
+}
+
+BATCH_SIZE = 500
+
+
+def _phrase(rng, words=2):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).title()
+
+
+def seed_dataset(stores, products_per_store, mockup_types, designs, orders, seed=1):
+    """Bulk-insert a storefront's worth of rows; returns the row counts and the benchmark users"""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    SiteSettings.load()
+    PromotionalBanner.objects.bulk_create([PromotionalBanner(text=f"Banner {i}", order=i) for i in range(3)])
+    categories = Category.objects.bulk_create([
+        Category(name=name, slug=name.lower()) for name in ['T-Shirts', 'Hoodies', 'Polos', 'Kids']
+    ])
+    DesignCategory.objects.bulk_create([
+        DesignCategory(name=name, slug=name.lower()) for name in ['Animals', 'Typography', 'Nature', 'Sports']
+    ])
+
+    types = MockupType.objects.bulk_create([
+        MockupType(
+            name=f"Mockup {i}", slug=f"mockup-{i}", category=categories[i % len(categories)],
+            base_price=Decimal('300') + 50 * i,
+        )
+        for i in range(mockup_types)
+    ])
+    variants = MockupVariant.objects.bulk_create([
+        MockupVariant(
+            mockup_type=mockup_type, size=size, color_name=color, color_hex=hex_value,
+            front_image='mockups/front/bench.png', back_image='mockups/back/bench.png', stock=1_000_000,
+        )
+        for mockup_type in types for size in SIZES for color, hex_value in COLORS
+    ], batch_size=BATCH_SIZE)
+    StockAdjustment.objects.bulk_create([
+        StockAdjustment(variant=variant, quantity=variant.stock, reason=StockAdjustment.REASON_OPENING)
+        for variant in variants
+    ], batch_size=BATCH_SIZE)
+
+    sellers = User.objects.bulk_create([
+        User(username=f"bench_seller_{i}", email=f"seller{i}@bench.local", first_name='Seller', last_name=str(i))
+        for i in range(stores)
+    ], batch_size=BATCH_SIZE)
+    buyer = User.objects.create_user(username='bench_buyer', email='buyer@bench.local')
+    SellerProfile.objects.bulk_create([SellerProfile(user=user, is_seller=True, status='approved') for user in sellers])
+    store_rows = Store.objects.bulk_create([
+        Store(owner=user, name=f"Store {i}", slug=f"bench-store-{i}") for i, user in enumerate(sellers)
+    ], batch_size=BATCH_SIZE)
+
+    products = Product.objects.bulk_create([
+        Product(
+            store=store, created_by=store.owner, mockup_variant=variant, category=variant.mockup_type.category,
+            name=f"{_phrase(rng)} Tee", price=variant.effective_price + 250, buy_price=variant.effective_price,
+            kind='design', is_published=True, is_active=True,
+        )
+        for store in store_rows
+        for variant in rng.sample(variants, min(products_per_store, len(variants)))
+    ], batch_size=BATCH_SIZE)
+
+    design_rows = DesignLibraryItem.objects.bulk_create([
+        DesignLibraryItem(
+            owner=rng.choice(sellers), name=_phrase(rng, 3), image='design-library/bench.png',
+            category=rng.choice(['Animals', 'Typography', 'Nature', 'Sports']),
+            search_keywords=' '.join(rng.sample(WORDS, 4)),
+            approval_status=DesignLibraryItem.APPROVAL_APPROVED, is_active=True, is_featured=i % 25 == 0,
+        )
+        for i in range(designs)
+    ], batch_size=BATCH_SIZE)
+    get_search_backend().index([item.pk for item in design_rows])
+
+    order_rows = Order.objects.bulk_create([
+        Order(
+            user=buyer, total_amount=Decimal('0'), payment_method='cod', shipping_address='Bench Street',
+            status=rng.choice(['pending', 'processing', 'shipped', 'delivered', 'delivered', 'cancelled']),
+        )
+        for _ in range(orders)
+    ], batch_size=BATCH_SIZE)
+    items = []
+    for order in order_rows:
+        for product in rng.sample(products, min(rng.randint(1, 3), len(products))):
+            items.append(OrderItem(
+                order=order, product=product, quantity=rng.randint(1, 3),
+                price=product.price, buy_price=product.buy_price,
+            ))
+    OrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+
+    # Spread orders over the last 90 days (auto_now_add pins them to "now" on insert)
+    by_day = {}
+    for order in order_rows:
+        by_day.setdefault(rng.randint(0, 89), []).append(order.pk)
+    for days_ago, order_ids in by_day.items():
+        Order.objects.filter(pk__in=order_ids).update(created_at=now - timedelta(days=days_ago))
+    rebuild_store_daily_sales()
+
+    counts = {
+        'stores': len(store_rows),
+        'mockup_types': len(types),
+        'mockup_variants': len(variants),
+        'products': len(products),
+        'design_library_items': len(design_rows),
+        'orders': len(order_rows),
+        'order_items': len(items),
+    }
+    return counts, {'buyer': buyer, 'seller': sellers[0], 'product': products[0]}
+
+
+def summarize(timings_ms, query_counts):
+    return {
+        'latency_ms': {
+            'min': round(min(timings_ms), 3),
+            'p50': round(percentile(timings_ms, 50), 3),
+            'p90': round(percentile(timings_ms, 90), 3),
+            'p95': round(percentile(timings_ms, 95), 3),
+            'p99': round(percentile(timings_ms, 99), 3),
+            'max': round(max(timings_ms), 3),
+            'mean': round(statistics.fmean(timings_ms), 3),
+        },
+        'queries': {'min': min(query_counts), 'max': max(query_counts), 'mean': round(statistics.fmean(query_counts), 2)},
+    }
+
+
+# (name, method, path, user) for every endpoint the suite covers; `user` names an entry of seed_dataset's users
+ENDPOINTS = [
+    ('feed', 'get', '/api/feed', None),
+    ('feed_page', 'get', '/api/feed?limit=24', None),
+    ('bootstrap', 'get', '/api/bootstrap', None),
+    ('design_library_list', 'get', '/api/design-library/', None),
+    ('design_library_search', 'get', '/api/design-library/?search=lion', None),
+    ('design_library_suggest', 'get', '/api/design-library/suggest/?q=ti', None),
+    ('orders_create', 'post', '/api/orders/', 'buyer'),
+    ('orders_seller', 'get', '/api/orders/seller/', 'seller'),
+    ('mockup_types', 'get', '/api/mockup-types/', None),
+    ('mockup_catalog', 'get', '/api/mockup-types/catalog/', None),
+    ('settings_site_info', 'get', '/api/settings/site-info', None),
+    ('settings_meta_tags', 'get', '/api/settings/meta-tags', None),
+    ('settings_contact_info', 'get', '/api/settings/contact-info', None),
+    ('settings_banners', 'get', '/api/settings/promotional-banners', None),
+]
+
+
+def run_benchmarks(users, iterations=30, warmup=3, only=None, cold=False):
+    """
+    Time each endpoint. The first request after a cache flush is reported as
+    `cold`; with `cold=True` the cache is flushed before every iteration.
+    """
+    order_payload = {
+        'items': [{'product_id': users['product'].pk, 'quantity': 1}],
+        'shipping_address': 'Bench Street',
+    }
+    results = {}
+    for name, method, path, user in ENDPOINTS:
+        if only and name not in only:
+            continue
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(users[user])
+
+        def call():
+            if method == 'post':
+                return client.post(path, order_payload, format='json')
+            return client.get(path)
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = call()
+            cold_ms = (time.perf_counter() - started) * 1000
+        cold_queries = len(ctx.captured_queries)
+        status_code = response.status_code
+
+        for _ in range(warmup):
+            call()
+
+        timings, query_counts = [], []
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = call()
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(ctx.captured_queries))
+            status_code = response.status_code
+
+        results[name] = {
+            'method': method.upper(),
+            'path': path,
+            'status': status_code,
+            'iterations': iterations,
+            'cold': {'latency_ms': round(cold_ms, 3), 'queries': cold_queries},
+            **summarize(timings, query_counts),
+        }
+    return results
+
+
+# (name, sync path served by WSGI, async twin served by ASGI) for benchmark_concurrency
+ASYNC_ENDPOINTS = [
+    ('feed', '/api/feed?limit=24', '/api/async/feed?limit=24'),
+    ('categories_active', '/api/categories/active', '/api/async/categories/active'),
+    ('mockup_catalog', '/api/mockup-types/catalog/', '/api/async/mockup-types/catalog'),
+    ('mockup_colors', '/api/mockup-variants/colors/', '/api/async/mockup-variants/colors'),
+    ('settings_site_info', '/api/settings/site-info', '/api/async/settings/site-info'),
+    ('settings_meta_tags', '/api/settings/meta-tags', '/api/async/settings/meta-tags'),
+    ('settings_contact_info', '/api/settings/contact-info', '/api/async/settings/contact-info'),
+    ('settings_banners', '/api/settings/promotional-banners', '/api/async/settings/promotional-banners'),
+]
+
+
+def http_fetcher(base_url, timeout=30):
+    """fetch(path) -> status code for GETs against a running server; 0 when the connection fails"""
+    base_url = base_url.rstrip('/')
+
+    def fetch(path):
+        try:
+            with urlopen(base_url + path, timeout=timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as exc:
+            return exc.code
+        except OSError:
+            return 0
+
+    return fetch
+
+
+def run_concurrency(fetch, path, concurrency, requests):
+    """
+    Send `requests` GETs for `path` from `concurrency` clients at once and
+    report throughput, latency percentiles and failed requests.
+    """
+    def timed(_):
+        started = time.perf_counter()
+        status_code = fetch(path)
+        return (time.perf_counter() - started) * 1000, status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        samples = list(pool.map(timed, range(requests)))
+        elapsed = time.perf_counter() - started
+
+    timings = [ms for ms, _ in samples]
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for _, status_code in samples if not 200 <= status_code < 400),
+        'requests_per_second': round(requests / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(timings, 50), 3),
+            'p95': round(percentile(timings, 95), 3),
+            'p99': round(percentile(timings, 99), 3),
+            'max': round(max(timings), 3),
+        },
+    }
+
+
+def _time_calls(call, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50': round(percentile(timings, 50), 3),
+        'p95': round(percentile(timings, 95), 3),
+        'mean': round(statistics.fmean(timings), 3),
+    }
+
+
+def run_json_benchmark(data, iterations=50):
+    """
+    Render `data` (e.g. ProductSerializer(..., many=True).data) and parse the
+    result with DRF's stdlib renderer/parser and with FastJSONRenderer /
+    FastJSONParser, checking both produce the same bytes.
+    """
+    from io import BytesIO
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from .renderers import FastJSONParser, FastJSONRenderer, json_backend
+
+    stdlib_bytes = JSONRenderer().render(data)
+    fast_bytes = FastJSONRenderer().render(data)
+    results = {'backend': json_backend(), 'bytes': len(stdlib_bytes), 'identical': stdlib_bytes == fast_bytes}
+    for name, renderer, parser in (
+        ('stdlib', JSONRenderer(), JSONParser()),
+        ('fast', FastJSONRenderer(), FastJSONParser()),
+    ):
+        results[name] = {
+            'render_ms': _time_calls(lambda: renderer.render(data), iterations),
+            'parse_ms': _time_calls(lambda: parser.parse(BytesIO(stdlib_bytes)), iterations),
+        }
+    for step in ('render_ms', 'parse_ms'):
+        results[f"{step.split('_')[0]}_speedup"] = round(results['stdlib'][step]['p50'] / results['fast'][step]['p50'], 2)
+    return results
+
+
+def environment_info():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'platform': platform.platform(),
+    }
@@ -0,0 +1,61 @@
+import hashlib
+
+from django.core.cache import cache
+
+from settings.cache import get_active_banners, get_site_cache_version, get_site_settings
+from settings.serializers import SiteSettingsSerializer
+from settings.views import meta_tags_data, site_info_data
+
+from .availability import get_availability_map, overlay_available_stock
+from .cache import get_category_cache_version, get_feed_cache_version
+from .models import Category, Product
+from .pagination import FeedPagination
+from .serializers import CategorySerializer, ProductListSerializer
+
+BOOTSTRAP_CACHE_TIMEOUT = 60 * 60
+
+
+def bootstrap_cache_key(request):
+    """
+    Versioned on everything the payload is built from, so an edit to site
+    settings, banners, categories or the catalog moves clients to a new key.
+    """
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return (
+        f"bootstrap:s{get_site_cache_version()}:c{get_category_cache_version()}"
+        f":f{get_feed_cache_version()}:{digest}"
+    )
+
+
+def build_bootstrap_payload(request):
+    """Everything the storefront needs for first paint, sharing one SiteSettings/category fetch"""
+    site = get_site_settings()
+    categories = CategorySerializer(Category.objects.filter(is_active=True), many=True).data
+
+    paginator = FeedPagination(paginate_by_default=True)
+    page = paginator.paginate_queryset(Product.objects.storefront().with_display_fields(), request)
+    feed = paginator.get_paginated_data(ProductListSerializer(page, many=True, context={'request': request}).data)
+
+    return {
+        'site_info': site_info_data(request, site),
+        'meta_tags': meta_tags_data(request, site),
+        'contact_info': SiteSettingsSerializer(site, context={'request': request}).data,
+        'promotional_banners': get_active_banners(),
+        'categories': categories,
+        'feed': feed,
+    }
+
+
+def bootstrap_etag(request):
+    """The cache key plus the stock levels overlaid on the cached feed page"""
+    return hashlib.md5(f"{bootstrap_cache_key(request)}|{sorted(get_availability_map().items())}".encode()).hexdigest()
+
+
+def get_bootstrap_payload(request, key=None):
+    """The cached payload; stock moves don't invalidate it, the feed's available_stock is read live"""
+    key = key or bootstrap_cache_key(request)
+    data = cache.get(key)
+    if data is None:
+        data = build_bootstrap_payload(request)
+        cache.set(key, data, BOOTSTRAP_CACHE_TIMEOUT)
+    return {**data, 'feed': overlay_available_stock(data['feed'], get_availability_map())}
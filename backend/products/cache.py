@@ -0,0 +1,134 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+FEED_CACHE_VERSION_KEY = 'feed:version'
+CATEGORY_CACHE_VERSION_KEY = 'categories:version'
+MOCKUP_CACHE_VERSION_KEY = 'mockups:version'
+
+
+def _timeout():
+    return getattr(settings, 'FEED_CACHE_TIMEOUT', 60)
+
+
+def catalog_timeout():
+    return getattr(settings, 'MOCKUP_CATALOG_CACHE_TIMEOUT', 3600)
+
+
+def get_cache_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = 1
+        cache.add(key, version, None)
+    return version
+
+
+async def aget_cache_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        version = 1
+        await cache.aadd(key, version, None)
+    return version
+
+
+def bump_cache_version(key):
+    """Invalidate everything cached under `key`'s namespace by moving to a new version."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def get_feed_cache_version():
+    return get_cache_version(FEED_CACHE_VERSION_KEY)
+
+
+def bump_feed_cache_version():
+    bump_cache_version(FEED_CACHE_VERSION_KEY)
+
+
+def get_category_cache_version():
+    return get_cache_version(CATEGORY_CACHE_VERSION_KEY)
+
+
+def bump_category_cache_version():
+    bump_cache_version(CATEGORY_CACHE_VERSION_KEY)
+
+
+def get_mockup_cache_version():
+    return get_cache_version(MOCKUP_CACHE_VERSION_KEY)
+
+
+def bump_mockup_cache_version():
+    bump_cache_version(MOCKUP_CACHE_VERSION_KEY)
+
+
+# Query parameters that change a cached product page; views pass the subset they read
+FEED_PAGE_PARAMS = ('cursor', 'limit', 'q', 'on_sale')
+
+
+def _feed_page_digest(request, params):
+    # Host/scheme (absolute image URLs) and path, plus only the parameters the view reads,
+    # so arbitrary query strings can't mint new cache entries.
+    query = urlencode([(name, request.GET[name]) for name in sorted(params) if name in request.GET])
+    return hashlib.md5(f"{request.build_absolute_uri(request.path)}?{query}".encode()).hexdigest()
+
+
+def feed_page_cache_key(request, params=FEED_PAGE_PARAMS):
+    return f"feed:v{get_feed_cache_version()}:{_feed_page_digest(request, params)}"
+
+
+def get_or_build_feed_page(request, build, params=FEED_PAGE_PARAMS):
+    """Return the cached payload for this feed request, building it on a miss."""
+    key = feed_page_cache_key(request, params)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, _timeout())
+    return data
+
+
+async def afeed_page_cache_key(request, params=FEED_PAGE_PARAMS):
+    return f"feed:v{await aget_cache_version(FEED_CACHE_VERSION_KEY)}:{_feed_page_digest(request, params)}"
+
+
+def _catalog_host(request):
+    # Image URLs are absolute, so each host gets its own copy
+    return hashlib.md5(request.build_absolute_uri('/').encode()).hexdigest()
+
+
+def get_or_build_mockup_catalog(request, build):
+    """
+    The mockup catalog document, rebuilt after a mockup type/variant or
+    category edit. Stock moves without either, so callers overlay it from
+    the availability map (mockup_views.with_live_stock).
+    """
+    key = f"mockups:v{get_mockup_cache_version()}:c{get_category_cache_version()}:catalog:{_catalog_host(request)}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, catalog_timeout())
+    return data
+
+
+async def amockup_catalog_cache_key(request):
+    """The sync catalog's cache key, so both views share one cached document"""
+    mockups = await aget_cache_version(MOCKUP_CACHE_VERSION_KEY)
+    categories = await aget_cache_version(CATEGORY_CACHE_VERSION_KEY)
+    return f"mockups:v{mockups}:c{categories}:catalog:{_catalog_host(request)}"
+
+
+async def aget_or_build(key, abuild, timeout):
+    """Cached value for `key`, awaiting `abuild()` and storing the result on a miss"""
+    data = await cache.aget(key)
+    if data is None:
+        data = await abuild()
+        await cache.aset(key, data, timeout)
+    return data
+
+
+async def aget_or_build_feed_page(request, abuild, params=FEED_PAGE_PARAMS):
+    """get_or_build_feed_page() for async views"""
+    return await aget_or_build(await afeed_page_cache_key(request, params), abuild, _timeout())
@@ -0,0 +1,189 @@
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Product, Order, OrderItem, DesignLibraryItem, DesignCommission
+from .mockup_models import MockupVariant
+from .inventory import commit_reservations, consume_reservation, decrement_stock
+from .popularity import record_commissions
+from .sales import refresh_order_sales
+
+
+FREE_SHIPPING_THRESHOLD = Decimal('2000')
+SHIPPING_FEE = Decimal('100')
+DEFAULT_COMMISSION = Decimal('49')
+
+
+def parse_order_lines(items):
+    """Normalize raw cart items into (product_id, quantity) pairs"""
+    lines = []
+    for item in items:
+        product_id = item.get('product_id') or item.get('productId') or item.get('product')
+        quantity = item.get('quantity') or 1
+        try:
+            quantity = int(quantity)
+        except Exception:
+            quantity = 1
+        if quantity < 1:
+            raise ValidationError('Quantity must be at least 1')
+        if not product_id:
+            raise ValidationError('product_id is required')
+        try:
+            product_id = int(product_id)
+        except Exception:
+            raise ValidationError('Invalid product')
+        lines.append((product_id, quantity))
+    return lines
+
+
+def extract_design_ids(design_data):
+    """Return the Design Library item ids referenced by a custom product's design_data"""
+    design_ids = set()
+    if isinstance(design_data, str) and design_data:
+        try:
+            design_data = json.loads(design_data)
+        except Exception:
+            design_data = {}
+    if not isinstance(design_data, dict):
+        return design_ids
+
+    legacy_id = design_data.get('library_design_id')
+    if legacy_id:
+        try:
+            design_ids.add(int(legacy_id))
+        except Exception:
+            pass
+
+    sides = design_data.get('sides') or {}
+    for side_key in ['front', 'back']:
+        side = sides.get(side_key) or {}
+        side_id = side.get('library_design_id') or side.get('design_library_item_id')
+        if side_id:
+            try:
+                design_ids.add(int(side_id))
+            except Exception:
+                pass
+    return design_ids
+
+
+def _check_orderable(product, user):
+    if product.kind == 'design':
+        if not product.is_published:
+            raise ValidationError('Invalid product')
+    elif product.kind == 'custom':
+        # Guests can order any custom product since they can't own products
+        if user.is_authenticated and product.created_by_id != user.id:
+            raise ValidationError('Invalid product')
+    else:
+        raise ValidationError('Invalid product')
+
+
+def load_variants(demand):
+    """Active variants for {variant_id: quantity}, by id; any missing one makes the cart invalid"""
+    if not demand:
+        return {}
+    variants = MockupVariant.objects.filter(pk__in=list(demand), is_active=True).select_related('mockup_type').in_bulk()
+    if len(variants) != len(demand):
+        raise ValidationError('Invalid product')
+    return variants
+
+
+def cart_demand(user, lines):
+    """Products by id and the {variant_id: quantity} stock a parsed cart needs"""
+    products = Product.objects.filter(pk__in={pid for pid, _ in lines}, is_active=True).in_bulk()
+    demand = OrderedDict()
+    for product_id, quantity in lines:
+        product = products.get(product_id)
+        if not product:
+            raise ValidationError('Invalid product')
+        _check_orderable(product, user)
+        if product.mockup_variant_id:
+            demand[product.mockup_variant_id] = demand.get(product.mockup_variant_id, 0) + quantity
+    return products, demand
+
+
+def place_order(user, items, shipping_address, customer_name=None, customer_phone=None, reservation_token=None):
+    """
+    Create an order and its line items, stock movements and design commissions
+    with a fixed number of queries regardless of cart size.
+
+    With a `reservation_token` the stock held for the cart is used first;
+    only what the hold doesn't cover is decremented here.
+    """
+    lines = parse_order_lines(items)
+
+    with transaction.atomic():
+        products, demand = cart_demand(user, lines)
+        variants = load_variants(demand)
+        reservation_ids = []
+        if reservation_token:
+            demand, reservation_ids = consume_reservation(reservation_token, demand)
+        decrement_stock(demand)
+
+        total = Decimal('0')
+        for product_id, quantity in lines:
+            total += Decimal(str(products[product_id].effective_price)) * quantity
+        if total > 0 and total <= FREE_SHIPPING_THRESHOLD:
+            total += SHIPPING_FEE
+
+        order = Order.objects.create(
+            user=user if user.is_authenticated else None,
+            total_amount=total,
+            payment_method='cod',
+            shipping_address=shipping_address,
+            customer_name=customer_name,
+            customer_phone=customer_phone,
+        )
+
+        order_items = []
+        for product_id, quantity in lines:
+            product = products[product_id]
+            variant = variants.get(product.mockup_variant_id)
+            order_items.append(OrderItem(
+                order=order,
+                product=product,
+                quantity=quantity,
+                buy_price=variant.effective_price if variant else product.buy_price,
+                price=product.effective_price,
+            ))
+        OrderItem.objects.bulk_create(order_items)
+        commit_reservations(reservation_ids, order)
+
+        design_refs = [
+            (order_item, extract_design_ids(order_item.product.design_data))
+            for order_item in order_items if order_item.product.kind == 'custom'
+        ]
+        all_design_ids = set().union(*[ids for _, ids in design_refs])
+        if all_design_ids:
+            designs = DesignLibraryItem.objects.filter(pk__in=all_design_ids, is_active=True).in_bulk()
+            commissions = []
+            for order_item, design_ids in design_refs:
+                for design_id in design_ids:
+                    design = designs.get(design_id)
+                    if not design:
+                        continue
+                    # Skip commission if the buyer owns the design
+                    if user.is_authenticated and design.owner_id == user.id:
+                        continue
+                    try:
+                        per_use = Decimal(str(design.commission_per_use))
+                    except Exception:
+                        per_use = DEFAULT_COMMISSION
+                    commissions.append(DesignCommission(
+                        design=design,
+                        owner_id=design.owner_id,
+                        used_by=user if user.is_authenticated else None,
+                        order=order,
+                        order_item=order_item,
+                        quantity=order_item.quantity,
+                        amount=per_use * order_item.quantity,
+                    ))
+            DesignCommission.objects.bulk_create(commissions)
+            record_commissions(commissions)
+
+        refresh_order_sales(order)
+
+    return order
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.utils import timezone
+
+# Backends whose entries (and version keys) live in a single process
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    `check --deploy`: cached feed pages, the catalog and the bootstrap
+    payload are invalidated by bumping version keys, which only reaches
+    every worker through a shared cache.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if settings.DEBUG or backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f"The default cache ({backend}) is not shared between worker processes, so cache "
+        "invalidation would only reach the worker that made the change.",
+        hint="Set CACHE_BACKEND/CACHE_LOCATION to a shared cache such as "
+             "django.core.cache.backends.redis.RedisCache with redis://host:6379/1.",
+        id='products.E001',
+    )]
+
+
+@register()
+def check_trending_half_life(app_configs, **kwargs):
+    """
+    Trending weights double every half-life from DESIGN_TRENDING_EPOCH and
+    are capped before they overflow; past the cap the ordering flattens.
+    """
+    from .popularity import trending_saturates_at
+
+    half_life = getattr(settings, 'DESIGN_TRENDING_HALF_LIFE_DAYS', 7)
+    if half_life <= 0:
+        return [Error(
+            f"DESIGN_TRENDING_HALF_LIFE_DAYS must be positive (got {half_life}).",
+            id='products.E002',
+        )]
+    saturates_at = trending_saturates_at()
+    if saturates_at > timezone.now() + timedelta(days=365):
+        return []
+    return [Warning(
+        f"With a {half_life:g}-day half-life, trending weights reach their cap on "
+        f"{saturates_at:%Y-%m-%d}; after that new design uses stop outweighing old ones.",
+        hint="Set DESIGN_TRENDING_EPOCH to a recent date (YYYY-MM-DD) and run "
+             "`manage.py rebuild_design_stats`.",
+        id='products.W002',
+    )]
@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
+
+
+class NotModified(APIException):
+    status_code = 304
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def table_state(models):
+    """
+    (max(updated_at), row count) per model in a single UNION ALL query.
+
+    Any insert, update (auto_now) or delete moves one of the two numbers,
+    so together they make a validator that never needs a row serialized.
+    """
+    qn = connection.ops.quote_name
+    sql = ' UNION ALL '.join(
+        f"SELECT MAX({qn('updated_at')}), COUNT(*) FROM {qn(model._meta.db_table)}" for model in models
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+
+    state = []
+    for latest, count in rows:
+        if isinstance(latest, str):
+            latest = parse_datetime(latest)
+        if isinstance(latest, datetime) and timezone.is_naive(latest):
+            latest = timezone.make_aware(latest, dt_timezone.utc)
+        state.append((latest, count))
+    return state
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified / Cache-Control for the read actions of a viewset.
+
+    The validator is the max(updated_at) and row count of the viewset's own
+    table plus `conditional_related_models` (tables whose rows show up in the
+    response), combined with the request URL. A matching If-None-Match or
+    If-Modified-Since is answered with 304 before the queryset is evaluated.
+    """
+    conditional_actions = ('list', 'retrieve')
+    conditional_related_models = ()
+    cache_max_age = 60
+
+    def get_conditional_models(self):
+        return [self.get_queryset().model, *self.conditional_related_models]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+
+        state = table_state(self.get_conditional_models())
+        raw = f"{request.build_absolute_uri()}|{state}"
+        etag = f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+        last_modified = max((latest for latest, _ in state if latest), default=None)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        self._validators = (etag, last_modified)
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return self._add_caching_headers(exc.response)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, '_validators', None) and response.status_code == 200:
+            self._add_caching_headers(response)
+        return response
+
+    def _add_caching_headers(self, response):
+        etag, last_modified = self._validators
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=self.cache_max_age)
+        return response
@@ -0,0 +1,76 @@
+"""
+EXPLAIN the hot catalog/order queries and flag plans that scan a table.
+
+Each entry in hot_queries() mirrors a query the API actually runs (same
+filters and keyset ordering), bound to representative ids from the current
+database. `manage.py explain_hot_queries` prints the verdicts.
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from .models import DesignCommission, DesignLibraryItem, Order, Product, Store
+from .sales import seller_orders
+
+PAGE = 25
+
+# Plan lines that read a whole table instead of going through an index
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # "SCAN products_product" (no index) vs "SCAN products_product USING INDEX ..." / "SEARCH ..."
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?! USING (?:COVERING )?INDEX)(?:\s|$)'),
+}
+
+
+def _sample_id(model, default=0):
+    return model.objects.order_by().values_list('pk', flat=True).first() or default
+
+
+def hot_queries():
+    """(name, queryset) pairs for the queries behind the busiest endpoints"""
+    store = Store.objects.order_by().first()
+    category_id = Product.objects.order_by().values_list('category_id', flat=True).filter(category__isnull=False).first() or 0
+    user_id = _sample_id(User)
+    order_id = _sample_id(Order)
+    public_designs = DesignLibraryItem.objects.filter(is_active=True, approval_status=DesignLibraryItem.APPROVAL_APPROVED)
+    return [
+        ('feed', Product.objects.storefront().order_by('-created_at', '-id')[:PAGE]),
+        ('products by category', Product.objects.storefront().filter(category_id=category_id).order_by('-created_at', '-id')[:PAGE]),
+        ('products by store', Product.objects.storefront().filter(store_id=store.pk if store else 0).order_by('-created_at', '-id')[:PAGE]),
+        ('custom products', Product.objects.filter(created_by_id=user_id, kind='custom', is_active=True)),
+        ('design library', public_designs.order_by('-created_at', '-id')[:PAGE]),
+        ('design library trending', public_designs.order_by('-trending_score', '-id')[:PAGE]),
+        ('design library most used', public_designs.order_by('-use_count', '-created_at', '-id')[:PAGE]),
+        ('design library featured', DesignLibraryItem.objects.filter(is_active=True, is_featured=True).order_by('-created_at', '-id')[:8]),
+        ('my designs', DesignLibraryItem.objects.filter(owner_id=user_id).order_by('-created_at', '-id')),
+        ('commissions by order', DesignCommission.objects.filter(order_id=order_id, status='pending')),
+        ('commission history', DesignCommission.objects.filter(owner_id=user_id).order_by('-created_at', '-id')[:PAGE]),
+        ('my orders', Order.objects.filter(user_id=user_id).order_by('-created_at')),
+        ('seller orders', seller_orders(store or Store(pk=0)).order_by('-created_at', '-id')[:50]),
+    ]
+
+
+def seq_scans(plan, vendor=None):
+    """Tables a plan reads without an index"""
+    pattern = SEQ_SCAN_PATTERNS.get(vendor or connection.vendor)
+    if pattern is None:
+        return []
+    return sorted(set(pattern.findall(plan)))
+
+
+def explain_hot_queries(force_index=False):
+    """
+    [(name, plan, scanned_tables)] for every hot query. With `force_index`
+    PostgreSQL is told to avoid sequential scans, which answers "could an
+    index serve this?" even on small tables where a scan is cheaper.
+    """
+    results = []
+    with transaction.atomic():
+        if force_index and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, queryset in hot_queries():
+            plan = queryset.explain()
+            results.append((name, plan, seq_scans(plan)))
+    return results
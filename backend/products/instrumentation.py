@@ -0,0 +1,271 @@
+"""
+Per-request SQL and timing instrumentation.
+
+RequestProfilingMiddleware samples a fraction of requests (REQUEST_PROFILING_SAMPLE_RATE)
+and, for those, wraps every database execute to count queries, time them and
+spot statements repeated with different parameters (the N+1 pattern). Time
+spent turning objects into `serializer.data` and the slowest statement are
+tracked separately. Results
+go out in a `Server-Timing` header and into a small rolling window per view
+that admins can read at /api/request-stats.
+
+Serializer time needs a wrapper around DRF's `BaseSerializer.data`. It is
+installed by the first sampled request, so with the default sample rate of 0
+DRF is never patched.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+_stats = defaultdict(lambda: deque(maxlen=_window()))
+_stats_lock = threading.Lock()
+_serializer_timing_installed = False
+_serializer_timing_lock = threading.Lock()
+
+
+def _sample_rate():
+    return getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 0.0)
+
+
+def _window():
+    return getattr(settings, 'REQUEST_PROFILING_WINDOW', 200)
+
+
+def _duplicate_threshold():
+    return getattr(settings, 'REQUEST_PROFILING_DUPLICATE_THRESHOLD', 10)
+
+
+def _slow_query_ms():
+    return getattr(settings, 'REQUEST_PROFILING_SLOW_QUERY_MS', 200)
+
+
+class RepeatedQueriesError(AssertionError):
+    """Raised instead of logged when REQUEST_PROFILING_RAISE is on (the test runner sets it)"""
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self.statements = Counter()
+        self.slowest = (0.0, None)
+        self.view_name = None
+        self._serializer_depth = 0
+
+    @property
+    def query_count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicate_count(self):
+        """Queries beyond the first for every statement that ran more than once"""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def repeated_statements(self, limit=3):
+        return [(sql, count) for sql, count in self.statements.most_common(limit) if count > 1]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.sql_ms += elapsed
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+            # `sql` still carries placeholders, so the same statement with
+            # different parameters lands on the same key
+            self.statements[sql] += 1
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;desc="{self.query_count} queries, {self.duplicate_count} repeated";dur={self.sql_ms:.1f}',
+            f'serialize;dur={self.serializer_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+    def as_sample(self):
+        return {
+            'total_ms': self.total_ms,
+            'sql_ms': self.sql_ms,
+            'serializer_ms': self.serializer_ms,
+            'queries': self.query_count,
+            'duplicates': self.duplicate_count,
+            'repeated': self.repeated_statements(),
+            'slowest': self.slowest,
+        }
+
+
+def current_profile():
+    return _current.get()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return f"{request.method} {match.view_name or match._func_path}"
+
+
+def record(view_name, profile):
+    with _stats_lock:
+        _stats[view_name].append(profile.as_sample())
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def request_stats():
+    """Per-view summary of the rolling sample window, slowest p95 first"""
+    with _stats_lock:
+        snapshot = {name: list(samples) for name, samples in _stats.items()}
+
+    views = []
+    for name, samples in snapshot.items():
+        totals = [sample['total_ms'] for sample in samples]
+        queries = [sample['queries'] for sample in samples]
+        worst = max(samples, key=lambda sample: sample['duplicates'])
+        slowest_ms, slowest_sql = max((sample['slowest'] for sample in samples), key=lambda pair: pair[0])
+        views.append({
+            'view': name,
+            'samples': len(samples),
+            'total_ms': {'p50': round(percentile(totals, 50), 2), 'p95': round(percentile(totals, 95), 2), 'max': round(max(totals), 2)},
+            'sql_ms_mean': round(sum(sample['sql_ms'] for sample in samples) / len(samples), 2),
+            'serializer_ms_mean': round(sum(sample['serializer_ms'] for sample in samples) / len(samples), 2),
+            'queries': {'mean': round(sum(queries) / len(queries), 2), 'max': max(queries)},
+            'duplicates_max': worst['duplicates'],
+            'repeated_statements': [{'sql': sql, 'count': count} for sql, count in worst['repeated']],
+            'slowest_query': {'sql': slowest_sql, 'ms': round(slowest_ms, 2)},
+        })
+    views.sort(key=lambda view: view['total_ms']['p95'], reverse=True)
+    return {'sample_rate': _sample_rate(), 'window': _window(), 'views': views}
+
+
+class RequestProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        rate = _sample_rate()
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        install_serializer_timing()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, profile)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        install_serializer_timing()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        # Async ORM queries run on the request's sync thread, whose connections
+        # are not the event loop's, so the wrappers are installed over there
+        stack = ExitStack()
+        try:
+            await sync_to_async(_wrap_connections)(stack, profile)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    def _finish(self, request, response, profile):
+        profile.total_ms = (time.perf_counter() - profile.started) * 1000
+        profile.view_name = _view_name(request)
+        response['Server-Timing'] = profile.server_timing()
+        if profile.view_name:
+            record(profile.view_name, profile)
+        if profile.duplicate_count >= _duplicate_threshold():
+            sql, count = profile.repeated_statements(1)[0]
+            message = f"{profile.view_name} ran {profile.query_count} queries, one statement {count} times: {sql}"
+            if getattr(settings, 'REQUEST_PROFILING_RAISE', False):
+                raise RepeatedQueriesError(message)
+            logger.warning(message)
+        slowest_ms, slowest_sql = profile.slowest
+        if slowest_ms >= _slow_query_ms():
+            logger.warning('%s: slow query (%.0f ms): %s', profile.view_name, slowest_ms, slowest_sql)
+        return response
+
+
+def _wrap_connections(stack, profile):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
+
+
+def install_serializer_timing():
+    """
+    Time the outermost `serializer.data` access of a profiled request.
+    Nested serializers (including ones built inside SerializerMethodFields)
+    count towards their parent only. Called by every sampled request; only
+    the first one patches DRF.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    global _serializer_timing_installed
+    if _serializer_timing_installed:
+        return
+    with _serializer_timing_lock:
+        if _serializer_timing_installed:
+            return
+        data = BaseSerializer.data
+
+        def timed_data(serializer):
+            profile = _current.get()
+            if profile is None:
+                return data.fget(serializer)
+            profile._serializer_depth += 1
+            started = time.perf_counter()
+            try:
+                return data.fget(serializer)
+            finally:
+                profile._serializer_depth -= 1
+                if profile._serializer_depth == 0:
+                    profile.serializer_ms += (time.perf_counter() - started) * 1000
+
+        BaseSerializer.data = property(timed_data)
+        _serializer_timing_installed = True
@@ -0,0 +1,276 @@
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .availability import invalidate_availability
+from .models import OrderItem, StockAdjustment, StockReservation
+from .mockup_models import MockupVariant
+
+DEFAULT_RESERVATION_TTL = 15 * 60
+DEFAULT_RESERVATION_MAX_QUANTITY = 10
+DEFAULT_RESERVATION_MAX_LIVE = 3
+
+
+def reservation_ttl():
+    return timedelta(seconds=getattr(settings, 'STOCK_RESERVATION_TTL', DEFAULT_RESERVATION_TTL))
+
+
+def check_reservation_limits(demand, user):
+    """Refuse holds beyond the per-variant quantity cap or the user's number of live holds"""
+    max_quantity = getattr(settings, 'STOCK_RESERVATION_MAX_QUANTITY', DEFAULT_RESERVATION_MAX_QUANTITY)
+    if any(quantity > max_quantity for quantity in demand.values()):
+        raise ValidationError(f'At most {max_quantity} of an item can be reserved')
+    if user is None or not user.is_authenticated:
+        return
+    max_live = getattr(settings, 'STOCK_RESERVATION_MAX_LIVE', DEFAULT_RESERVATION_MAX_LIVE)
+    live = (
+        StockReservation.objects
+        .filter(user=user, status=StockReservation.STATUS_HELD, expires_at__gt=timezone.now())
+        .values('token').distinct().count()
+    )
+    if live >= max_live:
+        raise ValidationError(f'At most {max_live} reservations can be held at once; release or use one first')
+
+
+def lock_variants(variant_ids):
+    """
+    Lock variant rows in pk order (inside a transaction).
+
+    An UPDATE locks its rows in whatever order the database visits them, so
+    two carts sharing variants could each hold one row the other needs.
+    Every stock change locks its rows this way first, and a transaction
+    that changes stock more than once locks all of them up front.
+    """
+    variant_ids = sorted(set(variant_ids))
+    if variant_ids:
+        list(MockupVariant.objects.select_for_update().filter(pk__in=variant_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def _shift_stock(deltas, condition=None):
+    """
+    Apply {variant_id: delta} in one UPDATE; `condition` narrows which rows
+    may change. updated_at moves too, since conditional GETs and cached
+    documents that show stock are validated against it.
+    """
+    deltas = {variant_id: delta for variant_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    lock_variants(deltas)
+    rows = Q(pk__in=list(deltas)) if condition is None else condition
+    updated = MockupVariant.objects.filter(rows).update(
+        stock=Case(
+            *[When(pk=variant_id, then=F('stock') + delta) for variant_id, delta in deltas.items()],
+            default=F('stock'),
+        ),
+        updated_at=timezone.now(),
+    )
+    invalidate_availability()
+    return updated
+
+
+def decrement_stock(demand):
+    """
+    Take {variant_id: quantity} off the shelf in one conditional UPDATE.
+
+    The WHERE clause only matches rows whose stock still covers the request,
+    so there is no read-then-write window: a short update count means some
+    variant sold out, and the caller's transaction is rolled back.
+    """
+    demand = {variant_id: quantity for variant_id, quantity in demand.items() if quantity}
+    if not demand:
+        return
+    in_stock = Q()
+    for variant_id, quantity in demand.items():
+        in_stock |= Q(pk=variant_id, stock__gte=quantity, is_active=True)
+    updated = _shift_stock({variant_id: -quantity for variant_id, quantity in demand.items()}, in_stock)
+    if updated != len(demand):
+        raise ValidationError('Out of stock')
+
+
+def release_expired_reservations(variant_ids=None):
+    """Return stock held by expired reservations; returns how many holds were expired"""
+    with transaction.atomic():
+        expired = StockReservation.objects.select_for_update().filter(
+            status=StockReservation.STATUS_HELD, expires_at__lte=timezone.now()
+        )
+        if variant_ids is not None:
+            expired = expired.filter(variant_id__in=list(variant_ids))
+        holds = list(expired.values_list('id', 'variant_id', 'quantity'))
+        if not holds:
+            return 0
+        restock = defaultdict(int)
+        for _, variant_id, quantity in holds:
+            restock[variant_id] += quantity
+        _shift_stock(restock)
+        StockReservation.objects.filter(id__in=[hold_id for hold_id, _, _ in holds]).update(
+            status=StockReservation.STATUS_EXPIRED, updated_at=timezone.now()
+        )
+    return len(holds)
+
+
+def reserve_stock(demand, user=None):
+    """
+    Hold {variant_id: quantity} for a checkout. Returns the reservation token
+    and expiry; the stock is already off the shelf until the hold is
+    committed by an order, released, or expires.
+    """
+    if not demand:
+        raise ValidationError('Nothing to reserve')
+    check_reservation_limits(demand, user)
+    token = uuid.uuid4()
+    expires_at = timezone.now() + reservation_ttl()
+    with transaction.atomic():
+        # Expired holds are returned before the decrement: lock both sets at once
+        lock_variants(demand)
+        release_expired_reservations(demand)
+        decrement_stock(demand)
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                token=token,
+                variant_id=variant_id,
+                quantity=quantity,
+                user=user if user is not None and user.is_authenticated else None,
+                expires_at=expires_at,
+            )
+            for variant_id, quantity in demand.items()
+        ])
+    return token, expires_at
+
+
+def release_reservation(token, user=None):
+    """Cancel a hold (only `user`'s, when given) and put its stock back; returns how many rows were released"""
+    rows = StockReservation.objects.filter(token=token, status=StockReservation.STATUS_HELD)
+    if user is not None:
+        rows = rows.filter(user=user)
+    with transaction.atomic():
+        holds = list(rows.select_for_update().values_list('id', 'variant_id', 'quantity'))
+        restock = defaultdict(int)
+        for _, variant_id, quantity in holds:
+            restock[variant_id] += quantity
+        _shift_stock(restock)
+        StockReservation.objects.filter(id__in=[hold_id for hold_id, _, _ in holds]).update(
+            status=StockReservation.STATUS_RELEASED, updated_at=timezone.now()
+        )
+    return len(holds)
+
+
+def consume_reservation(token, demand):
+    """
+    Use a live hold towards `demand` (inside the checkout transaction).
+
+    Returns (still_needed, reservation_ids): quantities the hold didn't
+    cover must still be decremented, and the ids are committed once the
+    order exists. Anything held beyond the demand goes back on the shelf.
+    """
+    holds = list(
+        StockReservation.objects.select_for_update()
+        .filter(token=token, status=StockReservation.STATUS_HELD, expires_at__gt=timezone.now())
+    )
+    if not holds:
+        raise ValidationError('Stock reservation expired or not found')
+
+    held = defaultdict(int)
+    for hold in holds:
+        held[hold.variant_id] += hold.quantity
+    # The spare held stock goes back before the caller decrements the rest
+    lock_variants([*held, *demand])
+    still_needed = {variant_id: max(0, quantity - held.get(variant_id, 0)) for variant_id, quantity in demand.items()}
+    _shift_stock({variant_id: max(0, quantity - demand.get(variant_id, 0)) for variant_id, quantity in held.items()})
+    return still_needed, [hold.pk for hold in holds]
+
+
+def commit_reservations(reservation_ids, order):
+    StockReservation.objects.filter(id__in=reservation_ids).update(
+        status=StockReservation.STATUS_COMMITTED, order=order, updated_at=timezone.now()
+    )
+
+
+def order_variant_quantities(order):
+    return {
+        row['product__mockup_variant_id']: row['quantity']
+        for row in
+        OrderItem.objects.filter(order=order, product__mockup_variant__isnull=False)
+        .values('product__mockup_variant_id')
+        .annotate(quantity=Sum('quantity'))
+        .order_by()
+    }
+
+
+def restock_order(order):
+    """Put a cancelled order's items back on the shelf"""
+    _shift_stock(order_variant_quantities(order))
+
+
+def withdraw_order_stock(order):
+    """An order came back from cancelled: take its items off the shelf again, even if that oversells"""
+    _shift_stock({variant_id: -quantity for variant_id, quantity in order_variant_quantities(order).items()})
+
+
+def annotate_expected_stock(queryset):
+    """
+    Annotate `expected_stock` on a variant queryset, recomputed from the
+    adjustment ledger and order history: everything ever booked in, minus
+    items in non-cancelled orders placed since the opening balance, minus
+    live holds.
+    """
+    adjustments = StockAdjustment.objects.filter(variant=OuterRef('pk')).order_by().values('variant')
+    opened_at = adjustments.filter(reason=StockAdjustment.REASON_OPENING).annotate(first=Min('created_at')).values('first')
+    sold = (
+        OrderItem.objects
+        .filter(product__mockup_variant=OuterRef('pk'), order__created_at__gte=OuterRef('opened_at'))
+        .exclude(order__status='cancelled')
+        .order_by().values('product__mockup_variant')
+        .annotate(total=Sum('quantity')).values('total')
+    )
+    held = (
+        StockReservation.objects
+        .filter(variant=OuterRef('pk'), status=StockReservation.STATUS_HELD)
+        .order_by().values('variant')
+        .annotate(total=Sum('quantity')).values('total')
+    )
+    zero = Value(0)
+    return queryset.annotate(
+        opened_at=Subquery(opened_at),
+        booked=Coalesce(Subquery(adjustments.annotate(total=Sum('quantity')).values('total')), zero),
+        sold=Coalesce(Subquery(sold, output_field=IntegerField()), zero),
+        held=Coalesce(Subquery(held, output_field=IntegerField()), zero),
+    ).annotate(expected_stock=F('booked') - F('sold') - F('held'))
+
+
+def variants_with_expected_stock(variant_ids=None):
+    queryset = annotate_expected_stock(MockupVariant.objects.all())
+    if variant_ids:
+        queryset = queryset.filter(pk__in=variant_ids)
+    return queryset
+
+
+def reconcile_stock(variant_ids=None, fix=False, accept=False):
+    """
+    Compare stored stock with the recomputed figure and return the drifted
+    variants as [(variant, stored, expected)].
+
+    `fix` trusts the history and overwrites stored stock with the expected
+    value. `accept` trusts the stored value (e.g. after a physical count)
+    and books the difference as a reconcile adjustment instead.
+    """
+    release_expired_reservations(variant_ids)
+    drifted = []
+    for variant in variants_with_expected_stock(variant_ids).exclude(opened_at=None).select_related('mockup_type'):
+        if variant.stock != variant.expected_stock:
+            drifted.append((variant, variant.stock, variant.expected_stock))
+
+    if drifted and fix:
+        _shift_stock({variant.pk: expected - stored for variant, stored, expected in drifted})
+    elif drifted and accept:
+        StockAdjustment.objects.bulk_create([
+            StockAdjustment(variant=variant, quantity=stored - expected, reason=StockAdjustment.REASON_RECONCILE)
+            for variant, stored, expected in drifted
+        ])
+    return drifted
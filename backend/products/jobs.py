@@ -0,0 +1,276 @@
+import logging
+import posixpath
+from datetime import timedelta
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .cache import bump_feed_cache_version
+from .models import ImageJob
+from .renditions import rendition_fields, refresh_renditions
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+MAX_SOURCE_DIMENSION = 4096
+PRINT_DPI = (300, 300)
+PRINT_MAX_DIMENSION = 6000
+MAX_ATTEMPTS = 3
+STALE_RUNNING_AFTER = timedelta(minutes=10)
+
+# Print-ready design files: normalized to RGBA PNG at print DPI instead of being resized for the web
+PRINT_FIELDS = {
+    'products.product': ['design_logo', 'design_logo_front', 'design_logo_back'],
+}
+
+
+class ImageValidationError(Exception):
+    """The uploaded file is not an image we accept; the job fails without retrying"""
+
+
+def print_fields(model):
+    return PRINT_FIELDS.get(model._meta.label_lower, [])
+
+
+def stale_image_fields(instance):
+    """Image fields whose stored file hasn't been processed yet (new, replaced or cleared)"""
+    manifests = getattr(instance, 'image_renditions', None) or {}
+    stale = []
+    for field_name in rendition_fields(type(instance)) + print_fields(type(instance)):
+        field_file = getattr(instance, field_name)
+        source = (manifests.get(field_name) or {}).get('source')
+        if (field_file.name or None) != source:
+            stale.append(field_name)
+    return stale
+
+
+def jobs_async():
+    return getattr(settings, 'IMAGE_JOBS_ASYNC', False)
+
+
+def enqueue_image_job(instance, fields=None, requested_by=None):
+    """
+    Queue processing for the instance's changed image fields.
+
+    A pending job for the same object absorbs the new fields instead of
+    queuing a duplicate. With IMAGE_JOBS_ASYNC off (the default) the work
+    runs inline.
+    """
+    fields = stale_image_fields(instance) if fields is None else list(fields)
+    if not fields:
+        return None
+    if not jobs_async():
+        process_inline(instance, fields)
+        return None
+
+    label = instance._meta.label_lower
+    job = (
+        ImageJob.objects
+        .filter(model_label=label, object_id=instance.pk, status=ImageJob.STATUS_PENDING)
+        .first()
+    )
+    if job:
+        merged = sorted(set(job.fields) | set(fields))
+        if merged != job.fields or (requested_by and not job.requested_by_id):
+            job.fields = merged
+            job.requested_by = job.requested_by or requested_by
+            job.save(update_fields=['fields', 'requested_by', 'updated_at'])
+        return job
+    return ImageJob.objects.create(model_label=label, object_id=instance.pk, fields=sorted(fields), requested_by=requested_by)
+
+
+def active_job_for(instance_or_model, object_id):
+    return (
+        ImageJob.objects
+        .filter(
+            model_label=instance_or_model._meta.label_lower,
+            object_id=object_id,
+            status__in=[ImageJob.STATUS_PENDING, ImageJob.STATUS_RUNNING],
+        )
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def _open_validated(field_file):
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as fh:
+        raw = fh.read()
+    try:
+        probe = Image.open(BytesIO(raw))
+        probe.verify()
+        image = Image.open(BytesIO(raw))
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as exc:
+        raise ImageValidationError(f"{field_file.name}: not a valid image ({exc})")
+    if image.format not in ALLOWED_FORMATS:
+        raise ImageValidationError(f"{field_file.name}: unsupported format {image.format}")
+    return image
+
+
+def _replace_file(instance, field_name, field_file, data, name=None):
+    """
+    Store the processed file and point the field at it. The old file is only
+    deleted once the transaction commits, so a failed save or rollback never
+    leaves the row pointing at nothing.
+    """
+    storage = field_file.storage
+    old_name = field_file.name
+    saved = storage.save(name or old_name, ContentFile(data))
+    if saved != old_name:
+        type(instance).objects.filter(pk=instance.pk).update(**{field_name: saved, 'updated_at': timezone.now()})
+        setattr(instance, field_name, saved)
+        transaction.on_commit(lambda: storage.delete(old_name))
+    return saved
+
+
+def reencode_web_image(instance, field_name):
+    """Validate an upload, apply EXIF orientation, strip metadata and cap oversized sources"""
+    field_file = getattr(instance, field_name)
+    image = _open_validated(field_file)
+    has_metadata = bool(image.info.get('exif')) or bool(image.getexif())
+    oversized = max(image.size) > MAX_SOURCE_DIMENSION
+    if not (has_metadata or oversized) or image.format == 'GIF':
+        return {'source': field_file.name, 'reencoded': False}
+
+    fmt = image.format
+    image = ImageOps.exif_transpose(image)
+    if oversized:
+        image.thumbnail((MAX_SOURCE_DIMENSION, MAX_SOURCE_DIMENSION), Image.LANCZOS)
+    buffer = BytesIO()
+    if fmt == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=90, optimize=True)
+    elif fmt == 'WEBP':
+        image.save(buffer, 'WEBP', quality=90)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    saved = _replace_file(instance, field_name, field_file, buffer.getvalue())
+    return {'source': saved, 'reencoded': True}
+
+
+def normalize_print_file(instance, field_name):
+    """Turn a design upload into an RGBA PNG tagged at print DPI, within the printer's size limit"""
+    field_file = getattr(instance, field_name)
+    image = _open_validated(field_file)
+    image = ImageOps.exif_transpose(image).convert('RGBA')
+    if max(image.size) > PRINT_MAX_DIMENSION:
+        image.thumbnail((PRINT_MAX_DIMENSION, PRINT_MAX_DIMENSION), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'PNG', dpi=PRINT_DPI, optimize=True)
+
+    directory, filename = posixpath.split(field_file.name)
+    name = posixpath.join(directory, filename.rsplit('.', 1)[0] + '.png')
+    saved = _replace_file(instance, field_name, field_file, buffer.getvalue(), name=name)
+    return {'source': saved, 'print': True, 'width': image.width, 'height': image.height, 'dpi': PRINT_DPI[0]}
+
+
+def process_instance_images(instance, fields):
+    """Run every processing step for `fields` on `instance`; returns a per-field summary"""
+    model = type(instance)
+    summary = {}
+    web_fields = []
+    manifests = dict(instance.image_renditions or {})
+
+    for field_name in fields:
+        if not getattr(instance, field_name):
+            manifests.pop(field_name, None)
+            continue
+        if field_name in print_fields(model):
+            manifests[field_name] = normalize_print_file(instance, field_name)
+            summary[field_name] = manifests[field_name]
+        elif field_name in rendition_fields(model):
+            summary[field_name] = reencode_web_image(instance, field_name)
+            web_fields.append(field_name)
+
+    # Persist print manifests/cleared fields before renditions merge their own entries in
+    instance.image_renditions = manifests
+    model.objects.filter(pk=instance.pk).update(image_renditions=manifests, updated_at=timezone.now())
+    if web_fields:
+        refresh_renditions(instance, web_fields)
+        for field_name in web_fields:
+            summary[field_name]['renditions'] = 'error' not in (instance.image_renditions.get(field_name) or {})
+
+    if model._meta.label_lower in ('products.product', 'products.mockupvariant'):
+        bump_feed_cache_version()
+    return summary
+
+
+def process_inline(instance, fields):
+    """
+    process_instance_images() inside the request. An unusable upload must not
+    fail the save that triggered it, so it is logged and its source remembered
+    with the error, which also stops every later save from retrying it.
+    """
+    try:
+        return process_instance_images(instance, fields)
+    except (ImageValidationError, OSError) as exc:
+        logger.info('Skipping image processing for %s #%s: %s', instance._meta.label, instance.pk, exc)
+        manifests = dict(instance.image_renditions or {})
+        for field_name in fields:
+            field_file = getattr(instance, field_name)
+            if field_file:
+                manifests[field_name] = {'source': field_file.name, 'error': exc.__class__.__name__}
+        instance.image_renditions = manifests
+        type(instance).objects.filter(pk=instance.pk).update(image_renditions=manifests, updated_at=timezone.now())
+        return None
+
+
+def claim_jobs(limit, worker_name):
+    """Atomically move up to `limit` runnable jobs to running and return their ids"""
+    now = timezone.now()
+    runnable = (
+        Q(status=ImageJob.STATUS_PENDING, run_after__lte=now) |
+        Q(status=ImageJob.STATUS_RUNNING, started_at__lt=now - STALE_RUNNING_AFTER)
+    )
+    with transaction.atomic():
+        ids = list(
+            ImageJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            ImageJob.objects.filter(id__in=ids).update(
+                status=ImageJob.STATUS_RUNNING,
+                started_at=now,
+                locked_by=worker_name,
+                attempts=F('attempts') + 1,
+            )
+    return ids
+
+
+def run_image_job(job_id):
+    """Process one claimed job. Top-level so it can run in a worker process."""
+    job = ImageJob.objects.get(pk=job_id)
+    try:
+        model = apps.get_model(job.model_label)
+        instance = model.objects.filter(pk=job.object_id).first()
+        if instance is None:
+            result = {'skipped': 'object no longer exists'}
+        else:
+            result = process_instance_images(instance, job.fields)
+    except ImageValidationError as exc:
+        job.status = ImageJob.STATUS_FAILED
+        job.error = str(exc)
+    except Exception as exc:
+        logger.exception('Image job #%s failed', job.pk)
+        job.error = f"{exc.__class__.__name__}: {exc}"
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = ImageJob.STATUS_FAILED
+        else:
+            job.status = ImageJob.STATUS_PENDING
+            job.run_after = timezone.now() + timedelta(seconds=30 * 2 ** job.attempts)
+    else:
+        job.status = ImageJob.STATUS_DONE
+        job.result = result
+        job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'result', 'run_after', 'finished_at', 'updated_at'])
+    return job.status
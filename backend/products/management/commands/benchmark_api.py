@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from products.benchmark import DATASET_SIZES, ENDPOINTS, environment_info, run_benchmarks, seed_dataset
+from products.testing import isolated_cache
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway database with synthetic data and record API latency percentiles and query counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=sorted(DATASET_SIZES), default='small', help='Dataset preset')
+        parser.add_argument('--stores', type=int, help='Override the number of stores')
+        parser.add_argument('--products-per-store', type=int, help='Override products per store')
+        parser.add_argument('--mockup-types', type=int, help='Override the number of mockup types')
+        parser.add_argument('--designs', type=int, help='Override the number of design library items')
+        parser.add_argument('--orders', type=int, help='Override the number of orders')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint before timing')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only run these endpoints (repeatable)')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every timed request')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic dataset')
+        parser.add_argument('--output', help='Write the results as JSON to this path')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        known = {name for name, *_ in ENDPOINTS}
+        unknown = set(options['endpoints'] or []) - known
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}; choose from {', '.join(sorted(known))}")
+
+        sizes = dict(DATASET_SIZES[options['size']])
+        for key in sizes:
+            if options.get(key) is not None:
+                sizes[key] = options[key]
+
+        # Never touch the configured database or cache: seed a test database and drop it
+        # afterwards, and clear/bump a private in-process cache instead of CACHES
+        setup_test_environment(debug=False)
+        cache_override = isolated_cache()
+        cache_override.enable()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {connection.vendor} test database: {sizes}")
+            started = timezone.now()
+            counts, users = seed_dataset(seed=options['seed'], **sizes)
+            seeded_in = (timezone.now() - started).total_seconds()
+            results = run_benchmarks(
+                users,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                only=options['endpoints'],
+                cold=options['cold'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            cache_override.disable()
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                **environment_info(),
+                'timestamp': timezone.now().isoformat(),
+                'size': options['size'],
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cold': options['cold'],
+                'seed': options['seed'],
+                'seed_seconds': round(seeded_in, 2),
+                'dataset': counts,
+            },
+            'results': results,
+        }
+
+        self.stdout.write(f"{'endpoint':<26}{'status':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'queries':>9}{'cold q':>8}")
+        for name, result in results.items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f"{name:<26}{result['status']:>7}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+                f"{latency['p99']:>10.2f}{result['queries']['max']:>9}{result['cold']['queries']:>8}"
+            )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,74 @@
+import json
+import platform
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from products.benchmark import ASYNC_ENDPOINTS, http_fetcher, run_concurrency
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the public read endpoints on a running WSGI server and their /api/async/ twins on a running '
+        'ASGI server at rising concurrency, and compare throughput and latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', help='Base URL of the WSGI server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--asgi-url', help='Base URL of the ASGI server, e.g. http://127.0.0.1:8001')
+        parser.add_argument('--workers', type=int, help='Worker processes both servers were started with (recorded in the report)')
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 8, 32, 64],
+            help='Simultaneous clients for each step',
+        )
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint and concurrency step')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only run these endpoints (repeatable)')
+        parser.add_argument('--output', help='Write the results as JSON to this path')
+
+    def handle(self, *args, **options):
+        targets = [(server, options[f'{server}_url']) for server in ('wsgi', 'asgi') if options[f'{server}_url']]
+        if not targets:
+            raise CommandError('Pass --wsgi-url and/or --asgi-url pointing at running servers')
+        if options['requests'] < 1 or min(options['concurrency']) < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+        known = {name for name, *_ in ASYNC_ENDPOINTS}
+        unknown = set(options['endpoints'] or []) - known
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}; choose from {', '.join(sorted(known))}")
+
+        self.stdout.write(f"{'endpoint':<24}{'server':>7}{'clients':>9}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+        results = {}
+        for name, sync_path, async_path in ASYNC_ENDPOINTS:
+            if options['endpoints'] and name not in options['endpoints']:
+                continue
+            for server, base_url in targets:
+                fetch = http_fetcher(base_url)
+                path = async_path if server == 'asgi' else sync_path
+                # Fill the server's caches and open its connections before timing
+                if fetch(path) != 200:
+                    raise CommandError(f"GET {base_url}{path} did not return 200; is the {server.upper()} server running?")
+                runs = []
+                for concurrency in options['concurrency']:
+                    run = run_concurrency(fetch, path, concurrency, options['requests'])
+                    runs.append(run)
+                    latency = run['latency_ms']
+                    self.stdout.write(
+                        f"{name:<24}{server:>7}{concurrency:>9}{run['requests_per_second']:>10.1f}{latency['p50']:>10.2f}"
+                        f"{latency['p95']:>10.2f}{latency['p99']:>10.2f}{run['errors']:>8}"
+                    )
+                results.setdefault(name, {})[server] = {'path': path, 'runs': runs}
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'python': platform.python_version(),
+                    'timestamp': timezone.now().isoformat(),
+                    'workers': options['workers'],
+                    'requests': options['requests'],
+                    'servers': dict(targets),
+                },
+                'results': results,
+            }
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,56 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from products.benchmark import environment_info, run_json_benchmark, seed_dataset
+from products.models import Product
+from products.serializers import ProductSerializer
+from products.testing import isolated_cache
+
+
+class Command(BaseCommand):
+    help = 'Time rendering and parsing serialized products with the stdlib and orjson JSON encoders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500, help='Products in the serialized list')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed renders/parses per encoder')
+        parser.add_argument('--output', help='Write the results as JSON to this path')
+
+    def handle(self, *args, **options):
+        if options['products'] < 1 or options['iterations'] < 1:
+            raise CommandError('--products and --iterations must be at least 1')
+
+        # Seed a throwaway test database behind a private cache, like benchmark_api
+        setup_test_environment(debug=False)
+        cache_override = isolated_cache()
+        cache_override.enable()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            stores = max(1, options['products'] // 20)
+            seed_dataset(stores=stores, products_per_store=-(-options['products'] // stores), mockup_types=3, designs=1, orders=1)
+            products = Product.objects.storefront().with_display_fields()[:options['products']]
+            data = ProductSerializer(products, many=True).data
+            results = run_json_benchmark(data, iterations=options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            cache_override.disable()
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{len(data)} products, {results['bytes']} bytes, fast path: {results['backend']}, "
+            f"identical output: {results['identical']}"
+        )
+        self.stdout.write(f"{'encoder':<10}{'render p50':>12}{'render p95':>12}{'parse p50':>11}{'parse p95':>11}")
+        for name in ('stdlib', 'fast'):
+            render, parse = results[name]['render_ms'], results[name]['parse_ms']
+            self.stdout.write(f"{name:<10}{render['p50']:>12.3f}{render['p95']:>12.3f}{parse['p50']:>11.3f}{parse['p95']:>11.3f}")
+        self.stdout.write(f"speedup: render {results['render_speedup']}x, parse {results['parse_speedup']}x")
+
+        if options['output']:
+            report = {'meta': {**environment_info(), 'timestamp': timezone.now().isoformat(), 'products': len(data)}, 'results': results}
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
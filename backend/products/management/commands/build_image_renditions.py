@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.mockup_models import MockupVariant
+from products.models import Product, Store, DesignLibraryItem
+from products.renditions import refresh_renditions, stale_rendition_fields
+
+
+class Command(BaseCommand):
+    help = 'Generate missing responsive image renditions for existing uploads'
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Product, MockupVariant, Store, DesignLibraryItem):
+            for instance in model.objects.all().iterator(chunk_size=200):
+                if stale_rendition_fields(instance):
+                    total += len(refresh_renditions(instance))
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {total} image(s)"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products.explain import explain_hot_queries
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot storefront, design library, commission and order queries and report table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help='Print the full plan for every query')
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help='PostgreSQL: disable sequential scans to check an index can serve each query',
+        )
+        parser.add_argument('--strict', action='store_true', help='Exit with an error if any plan scans a table')
+
+    def handle(self, *args, **options):
+        results = explain_hot_queries(force_index=options['force_index'])
+        unindexed = []
+        for name, plan, scanned in results:
+            if scanned:
+                unindexed.append(name)
+                self.stdout.write(self.style.WARNING(f"{name}: scans {', '.join(scanned)}"))
+            else:
+                self.stdout.write(f"{name}: index")
+            if options['plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if not unindexed:
+            self.stdout.write(self.style.SUCCESS(f"All {len(results)} hot queries use an index ({connection.vendor})"))
+            return
+        message = f"{len(unindexed)} of {len(results)} hot queries scan a table"
+        if connection.vendor == 'postgresql' and not options['force_index']:
+            message += ' (small tables are often scanned on purpose; re-run with --force-index)'
+        if options['strict']:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,58 @@
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _setup_worker():
+    # Children must not reuse the parent's database sockets
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _run_job(job_id):
+    from products.jobs import run_image_job
+    try:
+        return run_image_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Process queued image jobs (validation, re-encoding, renditions, print files) with a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'IMAGE_JOB_WORKERS', 2), help='Worker processes')
+        parser.add_argument('--batch', type=int, default=20, help='Jobs claimed per round')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit instead of polling')
+
+    def handle(self, *args, **options):
+        from products.jobs import claim_jobs
+
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        workers = max(1, options['workers'])
+        processed = 0
+
+        # Forked children would otherwise inherit open connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+            while True:
+                job_ids = claim_jobs(options['batch'], worker_name)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                for job_id, job_status in zip(job_ids, pool.map(_run_job, job_ids)):
+                    processed += 1
+                    self.stdout.write(f"Image job #{job_id}: {job_status}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} image job(s)"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.popularity import rebuild_design_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute Design Library usage, earnings and trending counters from commission history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--design', type=int, action='append', dest='designs', help='Only rebuild these design ids')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_design_stats(options['designs'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {count} used design(s)"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.sales import rebuild_store_daily_sales
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-store daily sales rollup from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, action='append', dest='stores', help='Only rebuild these store ids')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_store_daily_sales(options['stores'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} daily sales row(s)"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.inventory import reconcile_stock
+
+
+class Command(BaseCommand):
+    help = 'Recompute mockup variant stock from adjustments and order history and report (or repair) drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variant', type=int, action='append', dest='variants', help='Only check these variant ids')
+        parser.add_argument('--fix', action='store_true', help='Overwrite stored stock with the recomputed value')
+        parser.add_argument('--accept', action='store_true', help='Keep stored stock and book the difference as an adjustment')
+
+    def handle(self, *args, **options):
+        if options['fix'] and options['accept']:
+            raise CommandError('Use either --fix or --accept, not both')
+
+        drifted = reconcile_stock(options['variants'], fix=options['fix'], accept=options['accept'])
+        for variant, stored, expected in drifted:
+            self.stdout.write(f"{variant} (#{variant.pk}): stored {stored}, expected {expected} ({stored - expected:+d})")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Stock matches order history'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Reset stock on {len(drifted)} variant(s)"))
+        elif options['accept']:
+            self.stdout.write(self.style.SUCCESS(f"Booked adjustments for {len(drifted)} variant(s)"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} variant(s) drifted; re-run with --fix or --accept"))
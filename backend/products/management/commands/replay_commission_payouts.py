@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Order
+from products.payouts import pay_order_commissions
+
+
+class Command(BaseCommand):
+    help = 'Pay out pending design commissions on delivered orders (idempotent, safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order', type=int, action='append', dest='orders', help='Only replay these order ids')
+
+    def handle(self, *args, **options):
+        orders = Order.objects.filter(status='delivered', design_commissions__status='pending').distinct()
+        if options['orders']:
+            orders = orders.filter(pk__in=options['orders'])
+
+        paid = 0
+        for order in orders.iterator():
+            count = pay_order_commissions(order)
+            if count:
+                paid += count
+                self.stdout.write(f"Order #{order.pk}: completed {count} commission(s)")
+        self.stdout.write(self.style.SUCCESS(f"Completed {paid} pending commission(s)"))
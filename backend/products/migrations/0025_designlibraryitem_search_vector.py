@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-18 01:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "UPDATE products_designlibraryitem SET search_vector = "
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(search_keywords, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(category, '')), 'C')"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS products_designlibraryitem_search_gin "
+        "ON products_designlibraryitem USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS products_designlibraryitem_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_commissionpayout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0 on 2026-10-18 01:12
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_store_daily_sales(apps, schema_editor):
+    OrderItem = apps.get_model('products', 'OrderItem')
+    StoreDailySales = apps.get_model('products', 'StoreDailySales')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    rows = (
+        OrderItem.objects
+        .exclude(order__status='cancelled')
+        .filter(product__store__isnull=False)
+        .annotate(day=TruncDate('order__created_at'))
+        .values('product__store_id', 'day')
+        .annotate(
+            orders_count=Count('order', distinct=True),
+            items_sold=Coalesce(Sum('quantity'), Value(0), output_field=IntegerField()),
+            revenue=Coalesce(Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=money)), Value(Decimal('0')), output_field=money),
+            profit=Coalesce(Sum(ExpressionWrapper((F('price') - F('buy_price')) * F('quantity'), output_field=money)), Value(Decimal('0')), output_field=money),
+        )
+        .order_by()
+    )
+    StoreDailySales.objects.bulk_create([
+        StoreDailySales(
+            store_id=row['product__store_id'],
+            date=row['day'],
+            orders_count=row['orders_count'],
+            items_sold=row['items_sold'],
+            revenue=row['revenue'],
+            profit=row['profit'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0025_designlibraryitem_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders_count', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.store')),
+            ],
+            options={
+                'verbose_name_plural': 'Store daily sales',
+                'ordering': ['-date'],
+                'unique_together': {('store', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_store_daily_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.0 on 2026-10-18 01:33
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_design_counters(apps, schema_editor):
+    # Plain counters only. trending_score depends on the DESIGN_TRENDING_EPOCH and
+    # half-life settings, so it is left at 0 here; run `manage.py rebuild_design_stats`
+    # after migrating to compute it with the live configuration.
+    DesignCommission = apps.get_model('products', 'DesignCommission')
+    DesignLibraryItem = apps.get_model('products', 'DesignLibraryItem')
+    stats = defaultdict(lambda: {
+        'use_count': 0, 'quantity_used': 0, 'pending_commission': Decimal('0'), 'paid_commission': Decimal('0'),
+        'last_used_at': None,
+    })
+    rows = DesignCommission.objects.values_list('design_id', 'quantity', 'amount', 'status', 'created_at')
+    for design_id, quantity, amount, status, created_at in rows.iterator():
+        row = stats[design_id]
+        row['use_count'] += 1
+        row['quantity_used'] += quantity
+        row['paid_commission' if status == 'completed' else 'pending_commission'] += amount
+        row['last_used_at'] = max(filter(None, [row['last_used_at'], created_at]))
+    designs = list(DesignLibraryItem.objects.filter(pk__in=list(stats)).only('pk'))
+    for design in designs:
+        for name, value in stats[design.pk].items():
+            setattr(design, name, value)
+    DesignLibraryItem.objects.bulk_update(designs, list(stats.default_factory()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0029_stock_reservations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='paid_commission',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='pending_commission',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='quantity_used',
+            field=models.IntegerField(default=0, editable=False, help_text='Items printed with this design'),
+        ),
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, help_text='Time-decayed usage; see products.popularity'),
+        ),
+        migrations.AddField(
+            model_name='designlibraryitem',
+            name='use_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Commissions earned (one per order line using the design)'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(fields=['-trending_score', '-id'], name='designlib_trending'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(fields=['-use_count', '-created_at', '-id'], name='designlib_most_used'),
+        ),
+        migrations.RunPython(backfill_design_counters, migrations.RunPython.noop),
+    ]
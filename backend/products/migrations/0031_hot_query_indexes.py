@@ -0,0 +1,75 @@
+# Generated by Django 5.0 on 2026-10-18 01:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0030_design_popularity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='designlibraryitem',
+            name='designlib_trending',
+        ),
+        migrations.RemoveIndex(
+            model_name='designlibraryitem',
+            name='designlib_most_used',
+        ),
+        migrations.AddIndex(
+            model_name='designcommission',
+            index=models.Index(fields=['order', 'status'], name='commission_order_status'),
+        ),
+        migrations.AddIndex(
+            model_name='designcommission',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='commission_owner_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('is_active', True)), fields=['-created_at', '-id'], name='designlib_public_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('is_active', True)), fields=['-trending_score', '-id'], name='designlib_trending'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('is_active', True)), fields=['-use_count', '-created_at', '-id'], name='designlib_most_used'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['-created_at', '-id'], name='designlib_featured_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='designlibraryitem',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='designlib_owner_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='order_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True), ('kind', 'design')), fields=['-created_at', '-id'], name='product_storefront_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True), ('kind', 'design')), fields=['category', '-created_at', '-id'], name='product_storefront_category'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True), ('kind', 'design')), fields=['store', '-created_at', '-id'], name='product_storefront_store'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_by', 'kind', 'is_active', '-created_at'], name='product_creator_kind'),
+        ),
+    ]
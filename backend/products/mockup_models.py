@@ -56,6 +56,9 @@ class MockupVariant(models.Model):
     )
 
     stock = models.IntegerField(default=0, help_text="Available stock for this specific size and color")
+
+    # Resized WebP/JPEG copies per image field, written by products.renditions
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -68,6 +71,13 @@ class MockupVariant(models.Model):
     def __str__(self):
         return f"{self.mockup_type.name} - {self.size} - {self.color_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored stock so manual edits can be recorded as adjustments
+        instance._loaded_stock = instance.__dict__.get('stock')
+        return instance
+
     @property
     def effective_price(self):
         """Calculate the effective price including the base price and modifier"""
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .mockup_models import MockupType, MockupVariant
+from .renditions import srcsets_for
 
 
 class MockupVariantSerializer(serializers.ModelSerializer):
@@ -9,6 +10,7 @@ class MockupVariantSerializer(serializers.ModelSerializer):
     front_image = serializers.SerializerMethodField()
     back_image = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     
     class Meta:
         model = MockupVariant
@@ -22,6 +24,7 @@ class MockupVariantSerializer(serializers.ModelSerializer):
             'front_image',
             'back_image',
             'thumbnail',
+            'image_srcsets',
             'price_modifier',
             'stock',
             'effective_price',
@@ -55,6 +58,21 @@ class MockupVariantSerializer(serializers.ModelSerializer):
             return obj.thumbnail.url
         return None
 
+    def get_image_srcsets(self, obj):
+        """srcset strings for the front/back/thumbnail renditions, keyed by field and format"""
+        return srcsets_for(obj, self.context.get('request'))
+
+
+def active_variant_count(mockup_type):
+    """Use the `active_variant_count` annotation or prefetched `active_variants` before falling back to a COUNT"""
+    count = getattr(mockup_type, 'active_variant_count', None)
+    if count is not None:
+        return count
+    prefetched = getattr(mockup_type, 'active_variants', None)
+    if prefetched is not None:
+        return len(prefetched)
+    return mockup_type.variants.filter(is_active=True).count()
+
 
 class MockupTypeSerializer(serializers.ModelSerializer):
     variants = MockupVariantSerializer(many=True, read_only=True)
@@ -85,7 +103,7 @@ class MockupTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_variant_count(self, obj):
-        return obj.variants.filter(is_active=True).count()
+        return active_variant_count(obj)
     
     def get_preview_image(self, obj):
         if obj.preview_image:
@@ -121,7 +139,7 @@ class MockupTypeListSerializer(serializers.ModelSerializer):
         ]
     
     def get_variant_count(self, obj):
-        return obj.variants.filter(is_active=True).count()
+        return active_variant_count(obj)
     
     def get_preview_image(self, obj):
         if obj.preview_image:
@@ -130,3 +148,8 @@ class MockupTypeListSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.preview_image.url)
             return obj.preview_image.url
         return None
+
+
+class MockupCatalogTypeSerializer(MockupTypeSerializer):
+    """A mockup type with only its active variants, for the catalog document"""
+    variants = MockupVariantSerializer(source='active_variants', many=True, read_only=True)
@@ -3,15 +3,68 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.db.models import Count, Prefetch, Q
+from .availability import get_availability_map
+from .cache import get_or_build_mockup_catalog
+from .conditional import ConditionalGetMixin
+from .models import Category
+from .projections import MOCKUP_VARIANT_PROJECTION
 from .mockup_models import MockupType, MockupVariant
 from .mockup_serializers import (
     MockupTypeSerializer,
     MockupTypeListSerializer,
+    MockupCatalogTypeSerializer,
     MockupVariantSerializer
 )
 
 
-class MockupTypeViewSet(viewsets.ModelViewSet):
+def catalog_types():
+    """Active mockup types with their active variants prefetched as `active_variants`"""
+    return (
+        MockupType.objects.filter(is_active=True)
+        .select_related('category')
+        .prefetch_related(Prefetch(
+            'variants',
+            queryset=MockupVariant.objects.filter(is_active=True),
+            to_attr='active_variants',
+        ))
+    )
+
+
+def catalog_document(types, request):
+    """The catalog payload for already loaded catalog_types(): types plus their color palette"""
+    palette = {}
+    for mockup_type in types:
+        for variant in mockup_type.active_variants:
+            palette.setdefault((variant.color_name, variant.color_hex), None)
+    colors = [
+        {'color_name': name, 'color_hex': hex_value}
+        for name, hex_value in sorted(palette, key=lambda pair: (pair[0], pair[1] or ''))
+    ]
+    return {
+        'types': MockupCatalogTypeSerializer(types, many=True, context={'request': request}).data,
+        'colors': colors,
+    }
+
+
+def with_live_stock(document, availability):
+    """A cached catalog document with each variant's stock taken from the availability map"""
+    types = [
+        {**mockup_type, 'variants': [
+            {**variant, 'stock': availability.get(variant['id'], variant['stock'])} for variant in mockup_type['variants']
+        ]}
+        for mockup_type in document['types']
+    ]
+    return {**document, 'types': types}
+
+
+def active_colors():
+    return MockupVariant.objects.filter(is_active=True).values(
+        'color_name', 'color_hex'
+    ).distinct().order_by('color_name')
+
+
+class MockupTypeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing mockup types (T-Shirt, Hoodie, etc.)
     Public can list and retrieve, only admins can create/update/delete
@@ -19,6 +72,19 @@ class MockupTypeViewSet(viewsets.ModelViewSet):
     queryset = MockupType.objects.filter(is_active=True)
     permission_classes = [AllowAny]
     lookup_field = 'slug'
+    conditional_actions = ('list', 'retrieve', 'variants', 'catalog')
+    conditional_related_models = (MockupVariant, Category)
+    cache_max_age = 300
+
+    def get_queryset(self):
+        queryset = (
+            super().get_queryset()
+            .select_related('category')
+            .annotate(active_variant_count=Count('variants', filter=Q(variants__is_active=True)))
+        )
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('variants')
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -30,6 +96,19 @@ class MockupTypeViewSet(viewsets.ModelViewSet):
             return [IsAdminUser()]
         return [AllowAny()]
 
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """
+        Everything the design studio needs at startup: active types with
+        their active variants and variant counts, plus the color palette.
+        Built from two queries and cached until a type/variant changes;
+        stock comes from the availability map on every request.
+        """
+        def build():
+            return catalog_document(list(catalog_types()), request)
+
+        return Response(with_live_stock(get_or_build_mockup_catalog(request, build), get_availability_map()))
+
     @action(detail=True, methods=['get'])
     def variants(self, request, slug=None):
         """Get all variants for a specific mockup type"""
@@ -39,7 +118,7 @@ class MockupTypeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class MockupVariantViewSet(viewsets.ModelViewSet):
+class MockupVariantViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing mockup variants (specific colors with front/back images)
     Public can list and retrieve, only admins can create/update/delete
@@ -48,6 +127,9 @@ class MockupVariantViewSet(viewsets.ModelViewSet):
     serializer_class = MockupVariantSerializer
     permission_classes = [AllowAny]
     parser_classes = [MultiPartParser, FormParser]
+    conditional_actions = ('list', 'retrieve', 'colors')
+    conditional_related_models = (MockupType,)
+    cache_max_age = 60
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -69,10 +151,13 @@ class MockupVariantViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        rows = MOCKUP_VARIANT_PROJECTION.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        data = MOCKUP_VARIANT_PROJECTION.render(rows if page is None else page, self.get_serializer_context())
+        return Response(data) if page is None else self.get_paginated_response(data)
+
     @action(detail=False, methods=['get'])
     def colors(self, request):
         """Get all available colors across all mockup types"""
-        colors = MockupVariant.objects.filter(is_active=True).values(
-            'color_name', 'color_hex'
-        ).distinct().order_by('color_name')
-        return Response(colors)
+        return Response(active_colors())
@@ -1,9 +1,13 @@
 from django.db import models
+from django.db.models import Case, When, F, Q, Value, ExpressionWrapper
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .mockup_models import MockupType, MockupVariant
+from .cache import bump_category_cache_version, bump_feed_cache_version, bump_mockup_cache_version
 
 
 class Category(models.Model):
@@ -67,6 +71,8 @@ class Store(models.Model):
     banner = models.ImageField(upload_to='stores/banners/', blank=True, null=True)
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # Resized WebP/JPEG copies per image field, written by products.renditions
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -88,6 +94,51 @@ class Store(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def storefront(self):
+        """Published, active design products as shown on the public storefront"""
+        return self.filter(is_active=True, is_published=True, kind='design')
+
+    def matching(self, query):
+        """Storefront search: every word must appear in the name, description, store, designer or category"""
+        qs = self
+        for term in query.split():
+            qs = qs.filter(
+                Q(name__icontains=term) | Q(description__icontains=term) | Q(store__name__icontains=term) |
+                Q(created_by__username__icontains=term) | Q(created_by__first_name__icontains=term) |
+                Q(created_by__last_name__icontains=term) | Q(category__name__icontains=term)
+            )
+        return qs
+
+    def with_display_fields(self):
+        """
+        Join and annotate everything the product serializers read, so listing N
+        products costs one query instead of N lookups for creator and store.
+        """
+        return self.select_related(
+            'store', 'category', 'mockup_variant', 'mockup_variant__mockup_type'
+        ).annotate(
+            designer_name=Coalesce(
+                NullIf(Trim(Concat('created_by__first_name', Value(' '), 'created_by__last_name')), Value('')),
+                'created_by__username',
+            ),
+            creator_store_slug=Case(
+                When(store__slug__gt='', then=F('store__slug')),
+                When(created_by__store__is_active=True, then=F('created_by__store__slug')),
+                default=None,
+                output_field=models.CharField(),
+            ),
+            admin_buy_price=Coalesce(
+                ExpressionWrapper(
+                    F('mockup_variant__mockup_type__base_price') + F('mockup_variant__price_modifier'),
+                    output_field=models.DecimalField(max_digits=10, decimal_places=2),
+                ),
+                'buy_price',
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+
+
 class Product(models.Model):
     KIND_CHOICES = [
         ('design', 'Design'),
@@ -116,11 +167,25 @@ class Product(models.Model):
     design_preview_back = models.ImageField(upload_to='designs/previews/back/', blank=True, null=True)
     design_data = models.JSONField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # Resized WebP/JPEG copies per image field, written by products.renditions
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Partial where the database supports it (PostgreSQL, SQLite): only storefront rows are indexed
+            models.Index(fields=['-created_at', '-id'], name='product_storefront_recent',
+                         condition=Q(is_active=True, is_published=True, kind='design')),
+            models.Index(fields=['category', '-created_at', '-id'], name='product_storefront_category',
+                         condition=Q(is_active=True, is_published=True, kind='design')),
+            models.Index(fields=['store', '-created_at', '-id'], name='product_storefront_store',
+                         condition=Q(is_active=True, is_published=True, kind='design')),
+            models.Index(fields=['created_by', 'kind', 'is_active', '-created_at'], name='product_creator_kind'),
+        ]
 
     def __str__(self):
         return self.name
@@ -171,11 +236,26 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_recent'),
+            models.Index(fields=['-created_at', '-id'], name='order_recent'),
+        ]
 
     def __str__(self):
         username = self.user.username if self.user else "Guest"
         return f"Order #{self.id} - {username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save handlers can react to transitions only
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    @property
+    def previous_status(self):
+        return getattr(self, '_loaded_status', None)
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
@@ -235,14 +315,49 @@ class DesignLibraryItem(models.Model):
     rejection_reason = models.TextField(blank=True, default='', help_text="Reason shown to seller on rejection")
     is_active = models.BooleanField(default=False, help_text="Approved and visible in Design Library")
     is_featured = models.BooleanField(default=False, help_text="Show in homepage featured section")
+    # Weighted tsvector over name/keywords/category, kept current by products.search (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # Resized WebP/JPEG copies per image field, written by products.renditions
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Usage and earnings counters, kept current by products.popularity as commissions are created and paid
+    use_count = models.IntegerField(default=0, editable=False, help_text="Commissions earned (one per order line using the design)")
+    quantity_used = models.IntegerField(default=0, editable=False, help_text="Items printed with this design")
+    pending_commission = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    paid_commission = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False, help_text="Time-decayed usage; see products.popularity")
+    last_used_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    COUNTER_FIELDS = ['use_count', 'quantity_used', 'pending_commission', 'paid_commission', 'trending_score', 'last_used_at']
+
     def __str__(self):
         return f"{self.name} by {self.owner.username} [{self.approval_status}]"
 
+    def save(self, *args, **kwargs):
+        # Counters only move through products.popularity's UPDATEs; saving an
+        # instance loaded before a sale must not write its stale copies back
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The public library only lists approved, active items; index just those rows
+            models.Index(fields=['-created_at', '-id'], name='designlib_public_recent',
+                         condition=Q(is_active=True, approval_status='approved')),
+            models.Index(fields=['-trending_score', '-id'], name='designlib_trending',
+                         condition=Q(is_active=True, approval_status='approved')),
+            models.Index(fields=['-use_count', '-created_at', '-id'], name='designlib_most_used',
+                         condition=Q(is_active=True, approval_status='approved')),
+            models.Index(fields=['-created_at', '-id'], name='designlib_featured_recent',
+                         condition=Q(is_active=True, is_featured=True)),
+            models.Index(fields=['owner', '-created_at', '-id'], name='designlib_owner_recent'),
+        ]
 
 
 class DesignCommission(models.Model):
@@ -263,11 +378,152 @@ class DesignCommission(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['order', 'status'], name='commission_order_status'),
+            models.Index(fields=['owner', '-created_at', '-id'], name='commission_owner_recent'),
+        ]
 
     def __str__(self):
         return f"DesignCommission({self.design_id} -> {self.owner_id}, {self.amount})"
 
 
+class StoreDailySales(models.Model):
+    """Per-store, per-day sales rollup backing the seller dashboard (maintained by products.sales)"""
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+    orders_count = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['store', 'date']
+        verbose_name_plural = 'Store daily sales'
+
+    def __str__(self):
+        return f"StoreDailySales({self.store_id}, {self.date}: {self.revenue})"
+
+
+class CommissionPayout(models.Model):
+    """Ledger row recording the balance credited to one designer for one delivered order"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='commission_payouts')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='commission_payouts')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    commission_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['order', 'owner']
+
+    def __str__(self):
+        return f"CommissionPayout(order #{self.order_id} -> {self.owner_id}, {self.amount})"
+
+
+class ImageJob(models.Model):
+    """Queued image processing (validation, re-encoding, renditions) for one model instance"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    model_label = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    fields = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='image_jobs')
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    result = models.JSONField(default=dict, blank=True)
+    run_after = models.DateTimeField(auto_now_add=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='imagejob_status_run_after'),
+            models.Index(fields=['model_label', 'object_id'], name='imagejob_target'),
+        ]
+
+    def __str__(self):
+        return f"ImageJob #{self.pk} {self.model_label}:{self.object_id} [{self.status}]"
+
+
+class StockReservation(models.Model):
+    """Stock held for a cart during checkout; it goes back on the shelf if the hold expires"""
+    STATUS_HELD = 'held'
+    STATUS_COMMITTED = 'committed'
+    STATUS_RELEASED = 'released'
+    STATUS_EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (STATUS_HELD, 'Held'),
+        (STATUS_COMMITTED, 'Committed'),
+        (STATUS_RELEASED, 'Released'),
+        (STATUS_EXPIRED, 'Expired'),
+    ]
+
+    token = models.UUIDField(db_index=True)
+    variant = models.ForeignKey(MockupVariant, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_reservations')
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_reservations')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='stockreservation_status_exp'),
+        ]
+
+    def __str__(self):
+        return f"StockReservation({self.variant_id} x{self.quantity}, {self.status})"
+
+
+class StockAdjustment(models.Model):
+    """
+    Manual stock changes (opening balance, admin edits, reconciliation fixes).
+
+    Sales and restocks are not recorded here: they are derived from order
+    history, so expected stock = sum(adjustments) - items sold since the
+    opening balance - active holds.
+    """
+    REASON_OPENING = 'opening'
+    REASON_MANUAL = 'manual'
+    REASON_RECONCILE = 'reconcile'
+    REASON_CHOICES = [
+        (REASON_OPENING, 'Opening balance'),
+        (REASON_MANUAL, 'Manual edit'),
+        (REASON_RECONCILE, 'Reconciliation'),
+    ]
+
+    variant = models.ForeignKey(MockupVariant, on_delete=models.CASCADE, related_name='stock_adjustments')
+    quantity = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default=REASON_MANUAL)
+    note = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"StockAdjustment({self.variant_id} {self.quantity:+d}, {self.reason})"
+
+
 class WholesaleInquiry(models.Model):
     name = models.CharField(max_length=150)
     email = models.EmailField()
@@ -290,26 +546,91 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
 
-# Signal to pay commissions when order status changes to delivered
+# Signal to drop cached storefront feed pages when catalog rows change
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=MockupVariant)
+def invalidate_feed_cache(sender, instance, **kwargs):
+    bump_feed_cache_version()
+
+# Signal to drop cached category lists (bootstrap payload) when categories change
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    bump_category_cache_version()
+
+# Signal to drop the cached mockup catalog when types or variants change
+@receiver([post_save, post_delete], sender=MockupType)
+@receiver([post_save, post_delete], sender=MockupVariant)
+def invalidate_mockup_cache(sender, instance, **kwargs):
+    bump_mockup_cache_version()
+
+# Signal to drop the availability map when a variant is edited directly (admin, scripts)
+@receiver([post_save, post_delete], sender=MockupVariant)
+def invalidate_variant_availability(sender, instance, **kwargs):
+    from .availability import invalidate_availability
+    invalidate_availability()
+
+# Signal to queue image processing (validation, renditions) for new or replaced uploads
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=MockupVariant)
+@receiver(post_save, sender=Store)
+@receiver(post_save, sender=DesignLibraryItem)
+def build_image_renditions(sender, instance, **kwargs):
+    from .jobs import enqueue_image_job
+    enqueue_image_job(instance)
+
+# Signal to keep the Design Library search index in step with item edits
+@receiver(post_save, sender=DesignLibraryItem)
+def index_design_library_item(sender, instance, **kwargs):
+    from .search import get_search_backend
+    get_search_backend().index([instance.pk])
+
+# Signals to keep design usage counters right for commissions written one at a
+# time (admin, scripts); checkout bulk-creates and records its own
+@receiver(post_save, sender=DesignCommission)
+def count_design_commission(sender, instance, created, **kwargs):
+    from .popularity import rebuild_design_stats, record_commissions
+    if created:
+        record_commissions([instance], at=instance.created_at)
+    else:
+        rebuild_design_stats([instance.design_id])
+
+@receiver(post_delete, sender=DesignCommission)
+def forget_design_commission(sender, instance, **kwargs):
+    from .popularity import forget_commission
+    forget_commission(instance)
+
+# Signal to react to order status transitions: refresh seller sales rollups,
+# pay commissions when the order becomes delivered and put stock back on cancel
 @receiver(post_save, sender=Order)
-def pay_commissions_on_delivery(sender, instance, **kwargs):
+def handle_order_status_change(sender, instance, created, **kwargs):
+    previous = instance.previous_status
+    instance._loaded_status = instance.status
+    if created or previous == instance.status:
+        return
+    # Stock first, then the sales rollup: checkout takes the variant locks before
+    # the StoreDailySales ones, and the same order here avoids a deadlock
+    if 'cancelled' in (previous, instance.status):
+        from .inventory import restock_order, withdraw_order_stock
+        if instance.status == 'cancelled':
+            restock_order(instance)
+        else:
+            withdraw_order_stock(instance)
+    from .sales import refresh_order_sales
+    refresh_order_sales(instance)
     if instance.status == 'delivered':
-        # Get all pending commissions for this order
-        pending_commissions = DesignCommission.objects.filter(
-            order=instance, 
-            status='pending'
-        ).select_related('owner')
-        
-        for commission in pending_commissions:
-            # Get or create user profile
-            profile, created = UserProfile.objects.get_or_create(user=commission.owner)
-            
-            # Add commission amount to user balance
-            profile.balance += commission.amount
-            profile.save()
-            
-            # Mark commission as completed
-            commission.status = 'completed'
-            commission.save()
-            
-            print(f"Completed commission: {commission.amount} to {commission.owner.username}")
+        from .payouts import pay_order_commissions
+        pay_order_commissions(instance)
+
+# Signal to log stock typed in by hand (admin, scripts) so reconciliation can account for it
+@receiver(post_save, sender=MockupVariant)
+def record_stock_adjustment(sender, instance, created, **kwargs):
+    previous = 0 if created else getattr(instance, '_loaded_stock', None)
+    current = int(instance.stock or 0)
+    instance._loaded_stock = current
+    if previous is None or (previous == current and not created):
+        return
+    StockAdjustment.objects.create(
+        variant=instance,
+        quantity=current - previous,
+        reason=StockAdjustment.REASON_OPENING if created else StockAdjustment.REASON_MANUAL,
+    )
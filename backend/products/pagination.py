@@ -0,0 +1,182 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination, newest first on (created_at, id) by default.
+
+    The cursor is an opaque token holding the last row's ordering values, so
+    every page is a single indexed range query no matter how deep the client
+    scrolls, and `has_more` comes from fetching one extra row instead of a
+    COUNT. A view can rank rows differently by defining
+    `get_keyset_ordering()`, as long as the ordering ends in a unique column.
+
+    Unless `paginate_by_default` is set, pagination only kicks in when the
+    client sends `cursor` or a limit, so existing plain-list clients keep
+    working.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 24
+    max_limit = 100
+    paginate_by_default = False
+
+    def __init__(self, paginate_by_default=None):
+        if paginate_by_default is not None:
+            self.paginate_by_default = paginate_by_default
+
+    def is_requested(self, request):
+        if self.paginate_by_default:
+            return True
+        params = request.query_params
+        return self.cursor_query_param in params or self.limit_query_param in params
+
+    def get_limit(self, request):
+        raw = request.query_params.get(self.limit_query_param)
+        if not raw:
+            return self.default_limit
+        try:
+            limit = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({self.limit_query_param: 'Must be an integer'})
+        return max(1, min(limit, self.max_limit))
+
+    def get_ordering(self, view):
+        if view is not None and hasattr(view, 'get_keyset_ordering'):
+            return tuple(view.get_keyset_ordering())
+        return self.ordering
+
+    def encode_cursor(self, obj, ordering):
+        # Rows are model instances, or dicts when the page was fetched with .values()
+        if isinstance(obj, dict):
+            values = [obj[name.lstrip('-')] for name in ordering]
+        else:
+            values = [getattr(obj, name.lstrip('-')) for name in ordering]
+        # DjangoJSONEncoder cuts datetimes to milliseconds, which would skip rows created within the same one
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+        raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, token, queryset, ordering):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            decoded = []
+            for name, value in zip(ordering, values):
+                try:
+                    field = queryset.model._meta.get_field(name.lstrip('-'))
+                except FieldDoesNotExist:
+                    # Annotations such as a search rank are stored as plain JSON numbers
+                    decoded.append(value)
+                else:
+                    decoded.append(field.to_python(value))
+            return decoded
+        except Exception:
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+
+    def seek_filter(self, ordering, values):
+        """(a, b, c) after (A, B, C) -> a<A | (a=A & b<B) | (a=A & b=B & c<C)"""
+        condition = Q()
+        equal = {}
+        for name, value in zip(ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The ordered, seek-filtered slice for the requested page, plus the ordering used"""
+        self.limit = self.get_limit(request)
+        ordering = self.get_ordering(view)
+        queryset = queryset.order_by(*ordering)
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            values = self.decode_cursor(token, queryset, ordering)
+            queryset = queryset.filter(self.seek_filter(ordering, values))
+
+        # Fetch one extra row to learn whether another page exists without a COUNT.
+        return queryset[:self.limit + 1], ordering
+
+    def finish_page(self, rows, ordering):
+        self.has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_cursor = self.encode_cursor(rows[-1], ordering) if self.has_more else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        queryset, ordering = self.get_page_queryset(queryset, request, view)
+        return self.finish_page(list(queryset), ordering)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, fetching the page with the async ORM"""
+        if not self.is_requested(request):
+            return None
+        queryset, ordering = self.get_page_queryset(queryset, request, view)
+        return self.finish_page([row async for row in queryset.aiterator()], ordering)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('results', data),
+            ('next_cursor', self.next_cursor),
+            ('has_more', self.has_more),
+            ('limit', self.limit),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class FeedPagination(KeysetPagination):
+    default_limit = 24
+    max_limit = 60
+
+
+class StorefrontPagination(FeedPagination):
+    """/api/products/ listings; always paginated so no request returns the whole catalog"""
+    default_limit = 60
+    paginate_by_default = True
+
+
+class DesignLibraryPagination(KeysetPagination):
+    """Design Library listings; `page_size` is kept as the limit parameter for existing clients"""
+    limit_query_param = 'page_size'
+    default_limit = 20
+    max_limit = 50
+    paginate_by_default = True
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('results', data),
+            ('next_cursor', self.next_cursor),
+            ('has_more', self.has_more),
+            ('page_size', self.limit),
+        ])
+
+
+class SellerOrdersPagination(KeysetPagination):
+    """A store's received orders, newest first; paged when the client sends `cursor` or `limit`"""
+    default_limit = 50
+    max_limit = 100
+
+
+class CommissionPagination(KeysetPagination):
+    """Commission history, newest first; always paginated since busy designers have thousands of rows"""
+    default_limit = 20
+    max_limit = 100
+    paginate_by_default = True
@@ -0,0 +1,70 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Now
+
+from .models import DesignCommission, CommissionPayout, UserProfile
+from .popularity import record_payouts
+
+
+def pay_order_commissions(order):
+    """
+    Credit designers for every pending commission on a delivered order.
+
+    Safe to call repeatedly: pending rows are locked before anything is
+    credited and marked completed in the same transaction, so a replay
+    finds nothing left to pay. Balances move with a single F() UPDATE (no
+    read-modify-write). Each owner has one CommissionPayout ledger row per
+    order; commissions added after it was written are added to it. Returns
+    the number of commissions completed.
+    """
+    with transaction.atomic():
+        pending = list(
+            DesignCommission.objects
+            .select_for_update()
+            .filter(order=order, status='pending')
+            .order_by('pk')
+            .values_list('pk', 'owner_id', 'amount', 'design_id')
+        )
+        if not pending:
+            return 0
+
+        totals = defaultdict(Decimal)
+        counts = defaultdict(int)
+        for _, owner_id, amount, _ in pending:
+            totals[owner_id] += amount
+            counts[owner_id] += 1
+
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=owner_id) for owner_id in totals],
+            ignore_conflicts=True,
+        )
+        UserProfile.objects.filter(user_id__in=totals).update(
+            balance=F('balance') + Case(
+                *[When(user_id=owner_id, then=Value(total)) for owner_id, total in totals.items()],
+                default=Value(Decimal('0')),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+            updated_at=Now(),
+        )
+
+        already_paid = set(
+            CommissionPayout.objects
+            .filter(order=order, owner_id__in=totals)
+            .values_list('owner_id', flat=True)
+        )
+        for owner_id in already_paid:
+            CommissionPayout.objects.filter(order=order, owner_id=owner_id).update(
+                amount=F('amount') + totals[owner_id],
+                commission_count=F('commission_count') + counts[owner_id],
+            )
+        CommissionPayout.objects.bulk_create([
+            CommissionPayout(order=order, owner_id=owner_id, amount=total, commission_count=counts[owner_id])
+            for owner_id, total in totals.items() if owner_id not in already_paid
+        ])
+
+        DesignCommission.objects.filter(pk__in=[pk for pk, _, _, _ in pending]).update(status='completed')
+        record_payouts([(design_id, amount) for _, _, amount, design_id in pending])
+        return len(pending)
@@ -0,0 +1,163 @@
+"""
+Per-design usage and earnings counters on DesignLibraryItem.
+
+Checkout bumps `use_count`, `quantity_used`, `pending_commission` and
+`trending_score` for the designs on an order, payouts move amounts from
+pending to paid, and deleted commissions are taken back out, each in a
+single UPDATE. `rebuild_design_stats()` recomputes everything from the
+commission history for backfills and repairs; migration 0030 backfills only
+the plain counters, so run `manage.py rebuild_design_stats` once after it to
+fill in `trending_score`.
+
+`trending_score` is exponentially decayed usage stored relative to a fixed
+epoch: a use at time t adds quantity * 2 ** ((t - epoch) / half_life). All
+scores decay at the same rate, so ordering by the stored value is the same
+as ordering by current decayed usage, and nothing needs a periodic job.
+
+Weights grow without bound, so the exponent is capped at
+MAX_TRENDING_EXPONENT to keep scores finite (a float overflows past 2 ** 1023).
+At the cap new uses stop outweighing old ones. The `products.W002` check
+warns a year ahead: then move DESIGN_TRENDING_EPOCH forward and run
+`manage.py rebuild_design_stats`.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, DecimalField, F, FloatField, IntegerField, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DesignCommission, DesignLibraryItem
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+# Leaves room for summing 2 ** 100 uses at full weight below the float limit
+MAX_TRENDING_EXPONENT = 900
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _half_life_seconds():
+    return getattr(settings, 'DESIGN_TRENDING_HALF_LIFE_DAYS', 7) * 86400
+
+
+def trending_epoch():
+    epoch = getattr(settings, 'DESIGN_TRENDING_EPOCH', None)
+    if not epoch:
+        return TRENDING_EPOCH
+    return datetime.fromisoformat(epoch).replace(tzinfo=dt_timezone.utc)
+
+
+def trending_saturates_at():
+    """When new uses reach MAX_TRENDING_EXPONENT and stop outweighing older ones"""
+    return trending_epoch() + timedelta(seconds=MAX_TRENDING_EXPONENT * _half_life_seconds())
+
+
+def trending_weight(at):
+    exponent = (at - trending_epoch()).total_seconds() / _half_life_seconds()
+    return 2 ** min(exponent, MAX_TRENDING_EXPONENT)
+
+
+def _shift(deltas, output_field):
+    """F(column) + per-design delta, as one CASE over the designs being updated"""
+    return Case(
+        *[When(pk=design_id, then=Value(delta)) for design_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def _apply(design_ids, **columns):
+    """Add {design_id: delta} maps to the named counter columns in a single UPDATE"""
+    if not design_ids:
+        return 0
+    output = {
+        'use_count': IntegerField(),
+        'quantity_used': IntegerField(),
+        'pending_commission': MONEY,
+        'paid_commission': MONEY,
+        'trending_score': FloatField(),
+    }
+    updates = {
+        name: F(name) + _shift(deltas, output[name])
+        for name, deltas in columns.items() if name in output and deltas
+    }
+    if 'last_used_at' in columns:
+        updates['last_used_at'] = columns['last_used_at']
+    return DesignLibraryItem.objects.filter(pk__in=list(design_ids)).update(**updates)
+
+
+def record_commissions(commissions, at=None):
+    """Count newly created commissions towards their designs"""
+    at = at or timezone.now()
+    weight = trending_weight(at)
+    uses, quantity, pending, trending = defaultdict(int), defaultdict(int), defaultdict(Decimal), defaultdict(float)
+    for commission in commissions:
+        uses[commission.design_id] += 1
+        quantity[commission.design_id] += commission.quantity
+        pending[commission.design_id] += commission.amount
+        trending[commission.design_id] += commission.quantity * weight
+    return _apply(
+        uses, use_count=uses, quantity_used=quantity, pending_commission=pending,
+        trending_score=trending, last_used_at=Value(at),
+    )
+
+
+def record_payouts(paid):
+    """Move paid commission amounts ([(design_id, amount)]) from pending to paid"""
+    totals = defaultdict(Decimal)
+    for design_id, amount in paid:
+        totals[design_id] += amount
+    return _apply(
+        totals,
+        pending_commission={design_id: -amount for design_id, amount in totals.items()},
+        paid_commission=totals,
+    )
+
+
+def forget_commission(commission):
+    """Take a deleted commission back out of its design's counters"""
+    amount_field = 'paid_commission' if commission.status == 'completed' else 'pending_commission'
+    design_id = commission.design_id
+    return _apply(
+        [design_id],
+        use_count={design_id: -1},
+        quantity_used={design_id: -commission.quantity},
+        trending_score={design_id: -commission.quantity * trending_weight(commission.created_at)},
+        **{amount_field: {design_id: -commission.amount}},
+    )
+
+
+def rebuild_design_stats(design_ids=None):
+    """Recompute every counter from DesignCommission (backfills, repairs); returns designs with usage"""
+    commissions = DesignCommission.objects.all()
+    designs = DesignLibraryItem.objects.all()
+    if design_ids:
+        commissions = commissions.filter(design_id__in=design_ids)
+        designs = designs.filter(pk__in=design_ids)
+
+    zero = Value(Decimal('0'), output_field=MONEY)
+    rows = {
+        row['design_id']: row for row in
+        commissions.values('design_id').annotate(
+            use_count=Count('id'),
+            quantity_used=Coalesce(Sum('quantity'), 0),
+            pending_commission=Coalesce(Sum('amount', filter=~Q(status='completed')), zero),
+            paid_commission=Coalesce(Sum('amount', filter=Q(status='completed')), zero),
+            last_used_at=Max('created_at'),
+        ).order_by()
+    }
+    trending = defaultdict(float)
+    for design_id, created_at, quantity in commissions.values_list('design_id', 'created_at', 'quantity').iterator():
+        trending[design_id] += quantity * trending_weight(created_at)
+
+    designs.update(
+        use_count=0, quantity_used=0, pending_commission=0, paid_commission=0, trending_score=0, last_used_at=None,
+    )
+    used = list(DesignLibraryItem.objects.filter(pk__in=list(rows)).only('pk'))
+    for design in used:
+        row = rows[design.pk]
+        for name in DesignLibraryItem.COUNTER_FIELDS:
+            setattr(design, name, trending[design.pk] if name == 'trending_score' else row[name])
+    DesignLibraryItem.objects.bulk_update(used, DesignLibraryItem.COUNTER_FIELDS, batch_size=500)
+    return len(used)
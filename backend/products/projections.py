@@ -0,0 +1,325 @@
+"""
+Read-only projections: serializer output built straight from .values() rows.
+
+A Projection is compiled once from a ModelSerializer class. Model fields,
+foreign keys and dotted sources (`category.name`) become .values() columns,
+each with a converter picked up front: identity for strings, integers,
+booleans, choices and JSON, a precompiled quantize for decimals, ISO 8601
+in a timezone looked up once per response for datetimes, and a media URL
+prefix computed once per response for file fields. Values the serializer
+gets from Python (model properties, SerializerMethodFields) are supplied as
+functions of the row.
+
+Rows never become model instances and no serializer field is bound per row,
+which is where ModelSerializer spends its time on long lists. The output
+is the serializer's, key for key; tests compare the two for every
+projection below.
+"""
+import decimal
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+from .availability import get_availability_map, stock_for
+from .mockup_serializers import MockupVariantSerializer
+from .renditions import srcsets_from
+from .serializers import DesignLibraryItemSerializer, ProductListSerializer, ProductSerializer
+
+# Fields whose to_representation() returns database values unchanged
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField,
+)
+
+COLUMN, FILE, DATETIME, VALUE, METHOD, NESTED, RELATED = range(7)
+
+
+class MediaURLs:
+    """
+    name -> absolute URL, as FileField.to_representation() builds it with
+    `request`. For the default filesystem storage the absolute MEDIA_URL
+    prefix is built once and names are appended to it.
+    """
+
+    def __init__(self, request, storage=default_storage):
+        self.request = request
+        self.storage = storage
+        self.prefix = None
+        base_url = getattr(storage, 'base_url', None) if isinstance(storage, FileSystemStorage) else None
+        if base_url and base_url.startswith('/') and not base_url.startswith('//'):
+            self.prefix = request.build_absolute_uri(base_url) if request else base_url
+
+    def __call__(self, name):
+        # Names that build_absolute_uri() would normalise go the long way
+        if self.prefix is not None and '//' not in name and '/.' not in name and not name.startswith('.'):
+            return self.prefix + filepath_to_uri(name).lstrip('/')
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request else url
+
+
+def _decimal_converter(field):
+    """DecimalField.to_representation() with its quantize context and exponent built once"""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or not coerce_to_string or field.localize:
+        return field.to_representation
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+
+    return convert
+
+
+def _plain_datetime(field):
+    """A DateTimeField rendering ISO 8601 in the current timezone (no per-field format or timezone)"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (
+        isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone')
+        and isinstance(output_format, str) and output_format.lower() == ISO_8601
+    )
+
+
+def _iso_datetime(value, tz, to_representation):
+    """DateTimeField.to_representation() for aware datetimes, with the timezone looked up once per response"""
+    if tz is None or isinstance(value, str) or not timezone.is_aware(value):
+        return to_representation(value)
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _relations(model, attrs):
+    """The model fields a source path such as ('mockup_variant', 'mockup_type') goes through"""
+    relations = []
+    for attr in attrs:
+        relations.append(model._meta.get_field(attr))
+        model = relations[-1].related_model
+    return relations
+
+
+def media_url(context, name):
+    """Absolute URL for a stored file name, or None for an empty one"""
+    return context['media_urls'](name) if name else None
+
+
+class Projection:
+    """
+    `values=` maps field names to fn(row, context) returning what the
+    serializer would read from the instance (a property or an annotation);
+    the field's converter still applies. `methods=` does the same for
+    SerializerMethodFields, whose return value is used as is. `columns=`
+    lists extra .values() columns those functions read.
+    """
+
+    def __init__(self, serializer_class, values=None, methods=None, columns=()):
+        self.serializer_class = serializer_class
+        self.value_getters = values or {}
+        self.method_getters = methods or {}
+        self.extra_columns = tuple(columns)
+        self._compiled = None
+
+    def _compile_fields(self, fields, model, prefix, columns, top_level):
+        plan = []
+        for name, field in fields.items():
+            if field.write_only:
+                continue
+            if top_level and name in self.method_getters:
+                plan.append((name, METHOD, self.method_getters[name], None))
+            elif top_level and name in self.value_getters:
+                plan.append((name, VALUE, self.value_getters[name], self._converter(field)))
+            elif isinstance(field, serializers.BaseSerializer):
+                if getattr(field, 'many', False) or isinstance(field, serializers.ListSerializer):
+                    raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{name}: nested lists cannot be projected")
+                presence = prefix + '__'.join(field.source_attrs)
+                columns.append(presence)
+                related_model = _relations(model, field.source_attrs)[-1].related_model
+                plan.append((name, NESTED, presence, self._compile_fields(field.fields, related_model, presence + '__', columns, False)))
+            elif isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField)) or not field.source_attrs:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} needs a getter in the projection's values= or methods="
+                )
+            else:
+                column = prefix + '__'.join(field.source_attrs)
+                columns.append(column)
+                if isinstance(field, serializers.FileField) and getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+                    entry = (name, FILE, column, None)
+                elif _plain_datetime(field):
+                    entry = (name, DATETIME, column, field.to_representation)
+                else:
+                    entry = (name, COLUMN, column, self._converter(field))
+                # Relations a dotted source walks through, each flagged when it is a reverse one-to-one
+                guards = tuple(
+                    (prefix + '__'.join(field.source_attrs[:depth]), relation.auto_created and not relation.concrete)
+                    for depth, relation in enumerate(_relations(model, field.source_attrs[:-1]), 1)
+                )
+                if guards:
+                    columns.extend(column for column, _ in guards)
+                    entry = (name, RELATED, guards, (entry, field))
+                plan.append(entry)
+        return plan
+
+    def _converter(self, field):
+        if isinstance(field, serializers.JSONField) and not field.binary:
+            return None
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+        if isinstance(field, serializers.DecimalField):
+            return _decimal_converter(field)
+        return field.to_representation
+
+    def compile(self):
+        if self._compiled is None:
+            columns = []
+            serializer = self.serializer_class()
+            plan = self._compile_fields(serializer.fields, serializer.Meta.model, '', columns, True)
+            self._compiled = (plan, tuple(dict.fromkeys([*columns, *self.extra_columns])))
+        return self._compiled
+
+    @property
+    def columns(self):
+        return self.compile()[1]
+
+    def values(self, queryset, extra=()):
+        """`queryset` as the .values() rows render() expects; `extra` adds columns, e.g. a keyset ordering"""
+        return queryset.values(*dict.fromkeys([*self.columns, *(name.lstrip('-') for name in extra)]))
+
+    def _row(self, plan, row, context):
+        out = {}
+        for name, kind, source, convert in plan:
+            if kind == RELATED:
+                entry, field = convert
+                reverse = next((reverse for guard, reverse in source if row[guard] is None), None)
+                if reverse is not None:
+                    # A missing reverse one-to-one renders as None; on a null foreign key the
+                    # serializer hits AttributeError and uses the default, None or leaves the key out
+                    if reverse or field.allow_null:
+                        out[name] = None
+                    elif field.default is not empty:
+                        out[name] = field.get_default()
+                    continue
+                name, kind, source, convert = entry
+            if kind == METHOD:
+                out[name] = source(row, context)
+                continue
+            if kind == NESTED:
+                out[name] = None if row[source] is None else self._row(convert, row, context)
+                continue
+            if kind == FILE:
+                out[name] = media_url(context, row[source])
+                continue
+            if kind == DATETIME:
+                value = row[source]
+                out[name] = _iso_datetime(value, context['timezone'], convert) if value else None
+                continue
+            value = row[source] if kind == COLUMN else source(row, context)
+            if value is None:
+                out[name] = None
+            elif convert is None:
+                out[name] = value
+            else:
+                out[name] = convert(value)
+        return out
+
+    def render(self, rows, context=None):
+        """Serializer-equivalent dicts for .values() rows; `context` is the serializer context"""
+        plan, _ = self.compile()
+        context = dict(context or {})
+        context.setdefault('media_urls', MediaURLs(context.get('request')))
+        # What DateTimeField.enforce_timezone() would look up for every value
+        context['timezone'] = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [self._row(plan, row, context) for row in rows]
+
+
+def _availability(context):
+    availability = context.get('availability')
+    if availability is None:
+        availability = context['availability'] = get_availability_map()
+    return availability
+
+
+def _effective_price(row, context):
+    return row['discount_price'] if row['discount_price'] else row['price']
+
+
+def _discount_percentage(row, context):
+    if row['discount_price'] and row['price'] > 0:
+        return int((1 - row['discount_price'] / row['price']) * 100)
+    return 0
+
+
+def _profit_per_unit(row, context):
+    # Product.profit_per_unit: against the variant's price when there is one
+    base_cost = row['buy_price']
+    if row['mockup_variant'] and row['mockup_variant__mockup_type__base_price'] is not None:
+        base_cost = row['mockup_variant__mockup_type__base_price'] + row['mockup_variant__price_modifier']
+    return _effective_price(row, context) - base_cost
+
+
+def _admin_buy_price(row, context):
+    return str(Decimal(row['admin_buy_price'] or 0).quantize(Decimal('0.01')))
+
+
+def _srcsets(row, context):
+    return srcsets_from(row['image_renditions'], context['media_urls'])
+
+
+PRODUCT_VALUES = {
+    'effective_price': _effective_price,
+    'discount_percentage': _discount_percentage,
+}
+PRODUCT_METHODS = {
+    'designer_name': lambda row, context: row['designer_name'],
+    'creator_store_slug': lambda row, context: row['creator_store_slug'],
+    'available_stock': lambda row, context: stock_for(row['mockup_variant'], row['stock'], _availability(context)),
+    'image_srcsets': _srcsets,
+}
+# Everything the getters read besides serialized columns; the annotations come from with_display_fields()
+PRODUCT_COLUMNS = ('price', 'discount_price', 'stock', 'mockup_variant', 'designer_name', 'creator_store_slug', 'image_renditions')
+
+# Product.objects...with_display_fields() querysets
+PRODUCT_PROJECTION = Projection(
+    ProductSerializer,
+    values={**PRODUCT_VALUES, 'profit_per_unit': _profit_per_unit},
+    methods={**PRODUCT_METHODS, 'admin_buy_price': _admin_buy_price},
+    columns=(
+        *PRODUCT_COLUMNS, 'buy_price', 'admin_buy_price',
+        'mockup_variant__mockup_type__base_price', 'mockup_variant__price_modifier',
+    ),
+)
+PRODUCT_LIST_PROJECTION = Projection(
+    ProductListSerializer, values=PRODUCT_VALUES, methods=PRODUCT_METHODS, columns=PRODUCT_COLUMNS,
+)
+
+
+def _variant_image(field_name):
+    return lambda row, context: media_url(context, row[field_name])
+
+
+MOCKUP_VARIANT_PROJECTION = Projection(
+    MockupVariantSerializer,
+    values={'effective_price': lambda row, context: row['mockup_type__base_price'] + row['price_modifier']},
+    methods={
+        'front_image': _variant_image('front_image'),
+        'back_image': _variant_image('back_image'),
+        'thumbnail': _variant_image('thumbnail'),
+        'image_srcsets': _srcsets,
+    },
+    columns=('front_image', 'back_image', 'thumbnail', 'image_renditions', 'price_modifier', 'mockup_type__base_price'),
+)
+
+DESIGN_LIBRARY_ITEM_PROJECTION = Projection(
+    DesignLibraryItemSerializer,
+    methods={'image_srcsets': _srcsets},
+    columns=('image_renditions',),
+)
@@ -0,0 +1,56 @@
+"""
+JSON rendering and parsing for the API, with orjson when it is installed.
+
+FastJSONRenderer and FastJSONParser are drop-in replacements for DRF's
+JSONRenderer/JSONParser (see REST_FRAMEWORK in settings). With orjson
+available and JSON_ENCODER left at 'auto' they encode and decode through it
+and emit the same bytes DRF would: compact separators, unescaped unicode,
+"Z" for UTC datetimes, U+2028/U+2029 escaped. datetime, date and UUID are
+encoded by orjson itself; anything else it does not know (Decimal, lazy
+strings, querysets, ...) goes through DRF's encoder. Set JSON_ENCODER=json
+or uninstall orjson to get the stdlib path.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only where orjson is missing
+    orjson = None
+
+_drf_encoder = JSONEncoder()
+
+
+def json_backend():
+    """'orjson' or 'json': what FastJSONRenderer/FastJSONParser actually use"""
+    if orjson is None or getattr(settings, 'JSON_ENCODER', 'auto') == 'json':
+        return 'json'
+    return 'orjson'
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        # orjson has no indent width, ASCII-only or NaN-emitting modes; leave those to the stdlib
+        if json_backend() != 'orjson' or indent is not None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_drf_encoder.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if json_backend() != 'orjson' or not self.strict or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (160, 320, 640, 1024)
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+# Image fields that get renditions, per model label
+RENDITION_FIELDS = {
+    'products.product': ['image', 'design_preview', 'design_preview_front', 'design_preview_back'],
+    'products.mockupvariant': ['front_image', 'back_image', 'thumbnail'],
+    'products.store': ['logo', 'banner'],
+    'products.designlibraryitem': ['image'],
+}
+
+
+def rendition_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_RENDITION_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def rendition_fields(model):
+    return RENDITION_FIELDS.get(model._meta.label_lower, [])
+
+
+def _flatten(image):
+    """JPEG has no alpha channel: composite transparent images onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def build_renditions(field_file):
+    """
+    Write resized WebP/JPEG copies of `field_file` next to the original.
+
+    Names carry a hash of the source bytes (`shirt.3f9a1c2b7d10.320w.webp`),
+    so a re-upload never serves a stale rendition from a CDN and re-running
+    on the same file reuses what is already in storage. Returns the manifest
+    stored on the model: {'source', 'hash', 'width', 'webp': {w: name}, 'jpeg': {...}}.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as fh:
+        raw = fh.read()
+    digest = hashlib.sha1(raw).hexdigest()[:12]
+
+    image = Image.open(BytesIO(raw))
+    image = ImageOps.exif_transpose(image)
+    source_width = image.width
+    widths = [w for w in rendition_widths() if w < source_width] or [source_width]
+
+    directory, filename = posixpath.split(field_file.name)
+    stem = filename.rsplit('.', 1)[0]
+    manifest = {'source': field_file.name, 'hash': digest, 'width': source_width}
+
+    frames = {}
+    for ext, pil_format, options in FORMATS:
+        names = {}
+        for width in widths:
+            name = posixpath.join(directory, f"{stem}.{digest}.{width}w.{ext}")
+            if not storage.exists(name):
+                if pil_format not in frames:
+                    frames[pil_format] = _flatten(image) if pil_format == 'JPEG' else image.convert(
+                        'RGBA' if image.has_transparency_data else 'RGB'
+                    )
+                frame = frames[pil_format]
+                height = max(1, round(frame.height * width / frame.width))
+                resized = frame.resize((width, height), Image.LANCZOS) if width != frame.width else frame
+                buffer = BytesIO()
+                resized.save(buffer, pil_format, **options)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            names[str(width)] = name
+        manifest[ext] = names
+    return manifest
+
+
+def stale_rendition_fields(instance):
+    """Image fields whose manifest no longer matches the stored file (new, replaced or cleared)"""
+    manifests = instance.image_renditions or {}
+    stale = []
+    for field_name in rendition_fields(type(instance)):
+        field_file = getattr(instance, field_name)
+        source = (manifests.get(field_name) or {}).get('source')
+        if (field_file.name or None) != source:
+            stale.append(field_name)
+    return stale
+
+
+def refresh_renditions(instance, fields=None):
+    """
+    Generate renditions for new or changed images on `instance` and store the
+    manifests without re-saving the row (no signals). updated_at is still
+    bumped so conditional-GET validators see the new image URLs.
+    Returns the fields that were processed.
+    """
+    fields = stale_rendition_fields(instance) if fields is None else fields
+    if not fields:
+        return []
+
+    manifests = dict(instance.image_renditions or {})
+    done = []
+    for field_name in fields:
+        field_file = getattr(instance, field_name)
+        if not field_file:
+            manifests.pop(field_name, None)
+            continue
+        try:
+            manifests[field_name] = build_renditions(field_file)
+            done.append(field_name)
+        except (FileNotFoundError, UnidentifiedImageError) as exc:
+            # Remember the unusable source so every later save doesn't retry it
+            logger.info('Skipping renditions for %s.%s #%s: %s', instance._meta.label, field_name, instance.pk, exc)
+            manifests[field_name] = {'source': field_file.name, 'error': exc.__class__.__name__}
+        except Exception:
+            logger.exception('Could not build renditions for %s.%s #%s', instance._meta.label, field_name, instance.pk)
+
+    instance.image_renditions = manifests
+    type(instance).objects.filter(pk=instance.pk).update(image_renditions=manifests, updated_at=timezone.now())
+    return done
+
+
+def srcset(manifest, ext, url_for):
+    names = (manifest or {}).get(ext) or {}
+    if not names:
+        return None
+    return ', '.join(f"{url_for(name)} {width}w" for width, name in sorted(names.items(), key=lambda kv: int(kv[0])))
+
+
+def srcsets_for(instance, request=None):
+    """{field: {'webp': srcset, 'jpeg': srcset}} for every image with renditions (print files and failures are skipped)"""
+    def url_for(name):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return srcsets_from(getattr(instance, 'image_renditions', None), url_for)
+
+
+def srcsets_from(manifests, url_for):
+    """srcsets_for() given the `image_renditions` value itself and a name -> URL function"""
+    if not manifests:
+        return {}
+    return {
+        field_name: {ext: srcset(manifest, ext, url_for) for ext, _, _ in FORMATS}
+        for field_name, manifest in manifests.items()
+        if 'webp' in manifest
+    }
@@ -0,0 +1,179 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderItem, StoreDailySales
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+CENTS = Decimal('0.01')
+SALES_FIELDS = ('orders_count', 'items_sold', 'revenue', 'profit')
+
+
+def _sales_aggregates():
+    """Sum/Count expressions over OrderItem rows, shared by the rollup refresh and rebuild"""
+    return {
+        'orders_count': Count('order', distinct=True),
+        'items_sold': Coalesce(Sum('quantity'), Value(0), output_field=IntegerField()),
+        'revenue': Coalesce(
+            Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=MONEY)),
+            Value(Decimal('0')), output_field=MONEY,
+        ),
+        'profit': Coalesce(
+            Sum(ExpressionWrapper((F('price') - F('buy_price')) * F('quantity'), output_field=MONEY)),
+            Value(Decimal('0')), output_field=MONEY,
+        ),
+    }
+
+
+def counted_items():
+    """Line items that count towards seller sales (cancelled orders are excluded)"""
+    return OrderItem.objects.exclude(order__status='cancelled').filter(product__store__isnull=False)
+
+
+def refresh_order_sales(order):
+    """
+    Recompute the StoreDailySales rows touched by one order.
+
+    Only the (store, day) buckets the order belongs to are re-aggregated,
+    so the cost stays bounded by one day's sales no matter how long the
+    store has been trading. The rows are created if missing and locked
+    before aggregating: a concurrent checkout for the same store and day
+    waits for the lock, and its aggregate (a new statement under READ
+    COMMITTED) then includes this order's committed items.
+    """
+    store_ids = sorted(set(
+        OrderItem.objects.filter(order=order, product__store__isnull=False)
+        .values_list('product__store_id', flat=True)
+    ))
+    if not store_ids:
+        return
+    day = timezone.localdate(order.created_at)
+    with transaction.atomic():
+        StoreDailySales.objects.bulk_create(
+            [StoreDailySales(store_id=store_id, date=day) for store_id in store_ids], ignore_conflicts=True,
+        )
+        # Locked in store order, so two orders spanning the same stores cannot deadlock
+        buckets = list(
+            StoreDailySales.objects.select_for_update()
+            .filter(store_id__in=store_ids, date=day).order_by('store_id')
+        )
+        rows = {
+            row['product__store_id']: row for row in
+            counted_items()
+            .filter(product__store_id__in=store_ids, order__created_at__date=day)
+            .values('product__store_id')
+            .annotate(**_sales_aggregates())
+            .order_by()
+        }
+        now = timezone.now()
+        counted = []
+        for bucket in buckets:
+            row = rows.get(bucket.store_id)
+            if row is not None:
+                for name in SALES_FIELDS:
+                    setattr(bucket, name, row[name])
+                bucket.updated_at = now
+                counted.append(bucket)
+        StoreDailySales.objects.bulk_update(counted, [*SALES_FIELDS, 'updated_at'])
+        # Every counted item in the bucket was cancelled
+        StoreDailySales.objects.filter(pk__in=[bucket.pk for bucket in buckets if bucket.store_id not in rows]).delete()
+
+
+def rebuild_store_daily_sales(store_ids=None):
+    """Rebuild the rollup from order history in one grouped query (backfills, repairs)"""
+    items = counted_items()
+    existing = StoreDailySales.objects.all()
+    if store_ids:
+        items = items.filter(product__store_id__in=store_ids)
+        existing = existing.filter(store_id__in=store_ids)
+    rows = (
+        items
+        .annotate(day=TruncDate('order__created_at'))
+        .values('product__store_id', 'day')
+        .annotate(**_sales_aggregates())
+        .order_by()
+    )
+    existing.delete()
+    created = StoreDailySales.objects.bulk_create([
+        StoreDailySales(
+            store_id=row['product__store_id'],
+            date=row['day'],
+            orders_count=row['orders_count'],
+            items_sold=row['items_sold'],
+            revenue=row['revenue'],
+            profit=row['profit'],
+        )
+        for row in rows
+    ])
+    return len(created)
+
+
+def seller_stats(store, date_from=None, date_to=None):
+    """Dashboard totals for a store, summed from its daily rollup rows"""
+    qs = StoreDailySales.objects.filter(store=store)
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    totals = qs.aggregate(
+        orders_count=Coalesce(Sum('orders_count'), Value(0)),
+        items_sold=Coalesce(Sum('items_sold'), Value(0)),
+        seller_revenue=Coalesce(Sum('revenue'), Value(Decimal('0')), output_field=MONEY),
+        seller_profit=Coalesce(Sum('profit'), Value(Decimal('0')), output_field=MONEY),
+    )
+    return {
+        'orders_count': totals['orders_count'],
+        'items_sold': totals['items_sold'],
+        'seller_revenue': str(Decimal(totals['seller_revenue']).quantize(CENTS)),
+        'seller_profit': str(Decimal(totals['seller_profit']).quantize(CENTS)),
+    }
+
+
+def seller_orders(store, date_from=None, date_to=None):
+    """Orders containing at least one of the store's products, newest first"""
+    qs = Order.objects.filter(
+        id__in=OrderItem.objects.filter(product__store=store).values('order_id')
+    ).select_related('user')
+    if date_from:
+        qs = qs.filter(created_at__date__gte=date_from)
+    if date_to:
+        qs = qs.filter(created_at__date__lte=date_to)
+    return qs
+
+
+def serialize_seller_order(order):
+    """Seller-facing view of an order; expects `seller_items` prefetched with the store's lines only"""
+    seller_total = Decimal('0')
+    seller_profit = Decimal('0')
+    items_payload = []
+    for oi in order.seller_items:
+        line_total = (oi.price or 0) * oi.quantity
+        line_profit = ((oi.price or 0) - (oi.buy_price or 0)) * oi.quantity
+        seller_total += line_total
+        seller_profit += line_profit
+        items_payload.append({
+            'id': oi.id,
+            'product_id': oi.product_id,
+            'product_name': oi.product.name,
+            'quantity': oi.quantity,
+            'buy_price': str(oi.buy_price),
+            'price': str(oi.price),
+            'line_total': str(line_total),
+            'line_profit': str(line_profit),
+        })
+    return {
+        'id': order.id,
+        'created_at': order.created_at,
+        'status': order.status,
+        'payment_method': order.payment_method,
+        'customer_name': order.customer_name,
+        'customer_phone': order.customer_phone,
+        'shipping_address': order.shipping_address,
+        'buyer_email': getattr(order.user, 'email', ''),
+        'items': items_payload,
+        'seller_total': str(seller_total),
+        'seller_profit': str(seller_profit),
+    }
@@ -0,0 +1,115 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+SEARCH_CONFIG = 'simple'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [t.lower() for t in TOKEN_RE.findall(text or '')]
+
+
+class BaseSearchBackend:
+    """Ranks Design Library items for a free-text query"""
+
+    def search(self, queryset, query):
+        """Return `queryset` narrowed to matches for `query`, best match first"""
+        raise NotImplementedError
+
+    def index(self, item_ids):
+        """Refresh whatever the backend keeps for the given item ids"""
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Full-text search over the `search_vector` column (GIN indexed).
+
+    Name, keywords and category are weighted A/B/C so name hits rank first.
+    Every term is matched as a prefix, which gives type-ahead for free.
+    """
+
+    def search_vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return (
+            SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('search_keywords', weight='B', config=SEARCH_CONFIG) +
+            SearchVector('category', weight='C', config=SEARCH_CONFIG)
+        )
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        ts_query = SearchQuery(' & '.join(f"{t}:*" for t in terms), search_type='raw', config=SEARCH_CONFIG)
+        return (
+            queryset
+            .filter(search_vector=ts_query)
+            .annotate(search_rank=SearchRank('search_vector', ts_query))
+            .order_by('-search_rank', '-created_at', '-id')
+        )
+
+    def index(self, item_ids):
+        from .models import DesignLibraryItem
+        DesignLibraryItem.objects.filter(pk__in=item_ids).update(search_vector=self.search_vector())
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    In-process fallback for SQLite (tests, local dev).
+
+    Scores each candidate row in Python with the same weighting as the
+    PostgreSQL backend: every query term must prefix-match a token, and
+    matches in the name outrank keywords, which outrank the category; a
+    whole-word match only breaks ties within the same field.
+    """
+    weights = (('name', 8), ('search_keywords', 4), ('category', 2))
+
+    def score(self, row, terms):
+        fields = {name: tokenize(row[name]) for name, _ in self.weights}
+        total = 0
+        for term in terms:
+            best = 0
+            for name, weight in self.weights:
+                for token in fields[name]:
+                    if token == term:
+                        best = max(best, weight + 1)
+                    elif token.startswith(term):
+                        best = max(best, weight)
+            if not best:
+                return 0
+            total += best
+        return total
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        rows = queryset.order_by().values('id', 'name', 'search_keywords', 'category')
+        scored = [(self.score(row, terms), row['id']) for row in rows]
+        ranked = {pk: score for score, pk in scored if score}
+        if not ranked:
+            return queryset.none()
+        return (
+            queryset
+            .filter(pk__in=ranked)
+            .annotate(search_rank=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in ranked.items()],
+                output_field=IntegerField(),
+            ))
+            .order_by('-search_rank', '-created_at', '-id')
+        )
+
+
+def get_search_backend():
+    path = getattr(settings, 'DESIGN_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SimpleSearchBackend()
@@ -1,6 +1,9 @@
+from decimal import Decimal
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Category, SellerProfile, Store, Product, Order, OrderItem, DesignLibraryItem, DesignCommission, DesignCategory, UserProfile, WholesaleInquiry
+from .availability import available_stock, get_availability_map
+from .renditions import srcsets_for
+from .models import Category, SellerProfile, Store, Product, Order, OrderItem, DesignLibraryItem, DesignCommission, DesignCategory, UserProfile, ImageJob, WholesaleInquiry
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -34,10 +37,14 @@ class SellerProfileSerializer(serializers.ModelSerializer):
 class StoreSerializer(serializers.ModelSerializer):
     slug = serializers.CharField(read_only=True)
     owner = UserSerializer(read_only=True)
+    image_srcsets = serializers.SerializerMethodField()
 
     class Meta:
         model = Store
-        fields = ['id', 'owner', 'name', 'slug', 'logo', 'banner', 'description', 'is_active', 'created_at', 'updated_at']
+        fields = ['id', 'owner', 'name', 'slug', 'logo', 'banner', 'image_srcsets', 'description', 'is_active', 'created_at', 'updated_at']
+
+    def get_image_srcsets(self, obj):
+        return srcsets_for(obj, self.context.get('request'))
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -48,56 +55,51 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'image', 'image_url', 'is_active', 'order', 'product_count']
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    category_name = serializers.CharField(source='category.name', read_only=True)
-    mockup_type_name = serializers.CharField(source='mockup_variant.mockup_type.name', read_only=True)
-    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    discount_percentage = serializers.IntegerField(read_only=True)
-    profit_per_unit = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    store_name = serializers.CharField(source='store.name', read_only=True)
-    store_slug = serializers.CharField(source='store.slug', read_only=True)
-    designer_name = serializers.SerializerMethodField()
-    creator_store_slug = serializers.SerializerMethodField()
-    available_stock = serializers.SerializerMethodField()
-    admin_buy_price = serializers.SerializerMethodField()
-     
-    class Meta:
-        model = Product
-        fields = '__all__'
-        extra_kwargs = {
-            'created_by': {'read_only': True},
-        }
+class ProductComputedFieldsMixin:
+    """
+    Computed product fields shared by the full and list serializers.
+
+    Querysets built with Product.objects.with_display_fields() carry these
+    values as annotations; the per-object fallbacks only run for instances
+    loaded some other way (e.g. right after create/update). Stock always
+    comes from the cached availability map, never from a join.
+    """
 
     def get_available_stock(self, obj: Product):
-        try:
-            if getattr(obj, 'mockup_variant_id', None) and getattr(obj, 'mockup_variant', None):
-                return int(obj.mockup_variant.stock or 0)
-        except Exception:
-            pass
-        try:
-            return int(obj.stock or 0)
-        except Exception:
-            return 0
+        # One availability map per response (the context is shared by every row)
+        availability = self.context.get('availability')
+        if availability is None:
+            availability = self.context['availability'] = get_availability_map()
+        return available_stock(obj, availability)
 
     def get_designer_name(self, obj: Product):
+        if hasattr(obj, 'designer_name'):
+            return obj.designer_name
         if obj.created_by:
             full_name = f"{obj.created_by.first_name} {obj.created_by.last_name}".strip()
             return full_name if full_name else obj.created_by.username
         return None
 
     def get_creator_store_slug(self, obj: Product):
+        if hasattr(obj, 'creator_store_slug'):
+            return obj.creator_store_slug
         if obj.store and obj.store.slug:
             return obj.store.slug
         if obj.created_by:
             try:
-                store = obj.created_by.stores.filter(is_active=True).first()
-                if store:
+                store = obj.created_by.store
+                if store.is_active:
                     return store.slug
-            except Exception:
+            except Store.DoesNotExist:
                 pass
         return None
 
+    def get_image_srcsets(self, obj: Product):
+        return srcsets_for(obj, self.context.get('request'))
+
     def get_admin_buy_price(self, obj: Product):
+        if hasattr(obj, 'admin_buy_price'):
+            return str(Decimal(obj.admin_buy_price or 0).quantize(Decimal('0.01')))
         try:
             if getattr(obj, 'mockup_variant_id', None) and getattr(obj, 'mockup_variant', None):
                 return str(obj.mockup_variant.effective_price)
@@ -109,6 +111,53 @@ class ProductSerializer(serializers.ModelSerializer):
             return '0'
 
 
+class ProductSerializer(ProductComputedFieldsMixin, serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    mockup_type_name = serializers.CharField(source='mockup_variant.mockup_type.name', read_only=True)
+    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount_percentage = serializers.IntegerField(read_only=True)
+    profit_per_unit = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    store_name = serializers.CharField(source='store.name', read_only=True)
+    store_slug = serializers.CharField(source='store.slug', read_only=True)
+    designer_name = serializers.SerializerMethodField()
+    creator_store_slug = serializers.SerializerMethodField()
+    available_stock = serializers.SerializerMethodField()
+    admin_buy_price = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
+     
+    class Meta:
+        model = Product
+        exclude = ['image_renditions']
+        extra_kwargs = {
+            'created_by': {'read_only': True},
+        }
+
+
+class ProductListSerializer(ProductComputedFieldsMixin, serializers.ModelSerializer):
+    """Slim read-only representation used by paginated storefront listings"""
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    mockup_type_name = serializers.CharField(source='mockup_variant.mockup_type.name', read_only=True)
+    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount_percentage = serializers.IntegerField(read_only=True)
+    store_name = serializers.CharField(source='store.name', read_only=True)
+    store_slug = serializers.CharField(source='store.slug', read_only=True)
+    designer_name = serializers.SerializerMethodField()
+    creator_store_slug = serializers.SerializerMethodField()
+    available_stock = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'name', 'kind', 'price', 'discount_price', 'effective_price', 'discount_percentage',
+            'image', 'image_url', 'design_preview', 'design_preview_front', 'design_preview_back', 'image_srcsets',
+            'category', 'category_name', 'mockup_variant', 'mockup_type_name',
+            'store', 'store_name', 'store_slug', 'designer_name', 'creator_store_slug',
+            'available_stock', 'created_at',
+        ]
+        read_only_fields = fields
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     total_profit = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
@@ -139,11 +188,16 @@ class OrderSerializer(serializers.ModelSerializer):
 
 class DesignLibraryItemSerializer(serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
+    image_srcsets = serializers.SerializerMethodField()
 
     class Meta:
         model = DesignLibraryItem
-        fields = '__all__'
-        read_only_fields = ['owner', 'is_active', 'is_featured', 'approval_status', 'rejection_reason', 'created_at', 'updated_at']
+        # Earnings and ranking internals stay private; use_count is the public popularity figure
+        exclude = ['search_vector', 'image_renditions', 'quantity_used', 'pending_commission', 'paid_commission', 'trending_score', 'last_used_at']
+        read_only_fields = ['owner', 'use_count', 'is_active', 'is_featured', 'approval_status', 'rejection_reason', 'created_at', 'updated_at']
+
+    def get_image_srcsets(self, obj):
+        return srcsets_for(obj, self.context.get('request'))
 
 
 class DesignCategorySerializer(serializers.ModelSerializer):
@@ -152,16 +206,30 @@ class DesignCategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['slug', 'created_at', 'updated_at']
 
+class CommissionDesignSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DesignLibraryItem
+        fields = ['id', 'name', 'image', 'category']
+        read_only_fields = fields
+
+
+class CommissionUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+        read_only_fields = fields
+
+
 class DesignCommissionSerializer(serializers.ModelSerializer):
-    design = DesignLibraryItemSerializer(read_only=True)
-    owner = UserSerializer(read_only=True)
-    used_by = UserSerializer(read_only=True)
+    """One commission row; the design and buyer are nested slim (the owner is always the caller)"""
+    design = CommissionDesignSerializer(read_only=True)
+    used_by = CommissionUserSerializer(read_only=True)
     order_status = serializers.CharField(source='order.status', read_only=True)
 
     class Meta:
         model = DesignCommission
-        fields = '__all__'
-        read_only_fields = ['design', 'owner', 'used_by', 'order', 'order_item', 'created_at']
+        fields = ['id', 'design', 'owner', 'used_by', 'order', 'order_status', 'order_item', 'quantity', 'amount', 'status', 'created_at']
+        read_only_fields = fields
 
 
 class WholesaleInquirySerializer(serializers.ModelSerializer):
@@ -169,3 +237,10 @@ class WholesaleInquirySerializer(serializers.ModelSerializer):
         model = WholesaleInquiry
         fields = '__all__'
         read_only_fields = ['created_at']
+
+
+class ImageJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageJob
+        fields = ['id', 'model_label', 'object_id', 'fields', 'status', 'attempts', 'error', 'result', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
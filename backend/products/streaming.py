@@ -0,0 +1,64 @@
+"""
+Opt-in streaming for large, unpaginated list responses.
+
+`?stream=1` on a supporting endpoint returns the same JSON array, but the
+queryset is read with .iterator(chunk_size=...) and each chunk of rows is
+serialized and encoded as it is sent. Peak memory is one chunk of model
+instances and their JSON instead of the whole list twice over. Streamed
+responses are never cached, and paginated requests (cursor/limit) ignore
+the parameter.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+
+STREAM_QUERY_PARAM = 'stream'
+
+
+def _chunk_size():
+    return getattr(settings, 'STREAM_CHUNK_SIZE', 500)
+
+
+def wants_stream(request):
+    return request.query_params.get(STREAM_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def _batches(queryset, size):
+    batch = []
+    for row in queryset.iterator(chunk_size=size):
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_json_list(queryset, serializer_class, context, chunk_size=None):
+    """Byte chunks of the JSON array `serializer_class(queryset, many=True).data` would render to"""
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    yield b'['
+    first = True
+    for batch in _batches(queryset, chunk_size or _chunk_size()):
+        # Render the batch as an array and drop its brackets, so separators and
+        # encoding are exactly what the non-streaming response would produce
+        body = renderer.render(serializer_class(batch, many=True, context=context).data)[1:-1]
+        yield body if first else b',' + body
+        first = False
+    yield b']'
+
+
+def stream_json_list(queryset, serializer_class, context, chunk_size=None):
+    return StreamingHttpResponse(
+        iter_json_list(queryset, serializer_class, context, chunk_size),
+        content_type='application/json',
+    )
+
+
+class StreamingListMixin:
+    """For viewsets: `self.stream_list(queryset)` streams the view's serializer over a queryset"""
+
+    def stream_list(self, queryset, serializer_class=None):
+        return stream_json_list(
+            queryset, serializer_class or self.get_serializer_class(), self.get_serializer_context(),
+        )
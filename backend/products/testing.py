@@ -0,0 +1,133 @@
+"""
+Test helpers that catch per-row queries (N+1) before they ship.
+
+QueryScalingMixin.assertQueriesDoNotScale() requests an endpoint, doubles
+the rows behind it, requests it again and fails if the second response
+needed more queries; assertWriteDoesNotScale() does the same for a write
+such as checkout. QueryAuditTestRunner (the project's TEST_RUNNER) profiles every
+request made through the test client, turns a statement repeated
+REQUEST_PROFILING_DUPLICATE_THRESHOLD times into a test failure, and with
+`--query-report` prints the per-view query counts at the end of the run.
+
+Tests and benchmarks clear the cache and bump its version keys freely, so
+both run against isolated_cache(), never the configured CACHES backend
+(which may be a Redis shared with a live deployment).
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .instrumentation import RequestProfile, request_stats, reset_stats
+
+ISOLATED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'isolated'},
+}
+
+
+def isolated_cache():
+    """override_settings() pointing the default cache at a private in-process LocMemCache"""
+    return override_settings(CACHES=ISOLATED_CACHES)
+
+
+def result_rows(data):
+    """Number of rows in a list response, whatever its envelope"""
+    if isinstance(data, list):
+        return len(data)
+    for key in ('results', 'orders', 'types'):
+        if isinstance(data, dict) and isinstance(data.get(key), list):
+            return len(data[key])
+    return None
+
+
+class QueryScalingMixin:
+    """For TestCase subclasses; expects `self.client` to be an APIClient"""
+
+    def _profile_request(self, path):
+        cache.clear()
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, f"GET {path}: {response.status_code} {getattr(response, 'data', '')}")
+        return response, profile.statements
+
+    def _assertNoGrowth(self, label, before, rows_before, after, rows_after):
+        if sum(after.values()) > sum(before.values()):
+            grown = [(count, count - before.get(sql, 0), sql) for sql, count in after.items() if count > before.get(sql, 0)]
+            lines = '\n'.join(f"  {count}x (+{delta}) {sql}" for count, delta, sql in sorted(grown, reverse=True))
+            self.fail(
+                f"{label}: {sum(before.values())} queries for {rows_before} rows, "
+                f"{sum(after.values())} for {rows_after}; statements that grew:\n{lines}"
+            )
+
+    def assertQueriesDoNotScale(self, path, add_rows, extra=3):
+        """
+        Call `add_rows(extra)` to create matching rows and GET `path`, then add
+        as many again and assert the second request ran no more queries.
+        Statements are compared with their parameters left out, so the
+        failure message names the query that ran once per row.
+        """
+        add_rows(extra)
+        first, before = self._profile_request(path)
+        add_rows(extra)
+        second, after = self._profile_request(path)
+
+        rows_before, rows_after = result_rows(first.data), result_rows(second.data)
+        if rows_before is not None:
+            self.assertGreater(rows_after, rows_before, f"GET {path}: add_rows() did not add visible rows")
+        self._assertNoGrowth(f"GET {path}", before, rows_before, after, rows_after)
+
+    def assertWriteDoesNotScale(self, label, prepare, write, small=1, large=20):
+        """
+        Like assertQueriesDoNotScale() for a write: `prepare(rows)` sets up
+        input of that many rows (cart lines, say) and `write(input)`, the only
+        part profiled, performs it. The run with `large` rows may not need
+        more queries than the one with `small`.
+        """
+        counts = []
+        for rows in (small, large):
+            prepared = prepare(rows)
+            profile = RequestProfile()
+            with connection.execute_wrapper(profile):
+                write(prepared)
+            counts.append(profile.statements)
+        self._assertNoGrowth(label, counts[0], small, counts[1], large)
+
+
+class QueryAuditTestRunner(DiscoverRunner):
+    def __init__(self, query_report=False, **kwargs):
+        super().__init__(**kwargs)
+        self.query_report = query_report
+        self._profiling = None
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--query-report', action='store_true',
+            help='Print per-view query counts and the slowest statements after the run',
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._profiling = override_settings(REQUEST_PROFILING_SAMPLE_RATE=1, REQUEST_PROFILING_RAISE=True)
+        self._profiling.enable()
+        self._cache = isolated_cache()
+        self._cache.enable()
+        reset_stats()
+
+    def teardown_test_environment(self, **kwargs):
+        if self.query_report:
+            self.print_query_report()
+        self._cache.disable()
+        self._profiling.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def print_query_report(self):
+        views = sorted(request_stats()['views'], key=lambda view: view['queries']['max'], reverse=True)
+        print(f"\n{'view':<48}{'requests':>9}{'max q':>7}{'repeat':>8}{'slowest ms':>12}")
+        for view in views:
+            print(
+                f"{view['view']:<48}{view['samples']:>9}{view['queries']['max']:>7}"
+                f"{view['duplicates_max']:>8}{view['slowest_query']['ms']:>12.2f}"
+            )
@@ -1,3 +1,1703 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import (
+    Category, DesignCategory, DesignCommission, DesignLibraryItem, ImageJob, Order, OrderItem, Product, SellerProfile,
+    StockReservation, Store, StoreDailySales, UserProfile, WholesaleInquiry,
+)
+from .mockup_models import MockupType, MockupVariant
+from .testing import QueryScalingMixin
+
+
+class ProductListQueryBudgetTests(TestCase):
+    """Product list endpoints must cost a fixed number of queries regardless of row count"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.mockup_type = MockupType.objects.create(name='T-Shirt', slug='t-shirt', base_price=Decimal('300'))
+        self.variant = MockupVariant.objects.create(
+            mockup_type=self.mockup_type, size='M', color_name='White',
+            front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=40,
+        )
+
+    def _create_products(self, count):
+        for i in range(count):
+            seller = User.objects.create_user(username=f'seller{Product.objects.count()}', first_name='Sel', last_name=str(i))
+            store = Store.objects.create(owner=seller, name=f'Store {seller.username}')
+            Product.objects.create(
+                store=store, created_by=seller, mockup_variant=self.variant, name=f'Design {i}',
+                price=Decimal('550'), is_published=True, kind='design',
+            )
+            # A store-less custom product exercises the creator store lookup path
+            Product.objects.create(
+                created_by=seller, name=f'Custom {i}', price=Decimal('550'),
+                is_published=True, kind='design', stock=3,
+            )
+
+    def _count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_feed_query_count_is_constant(self):
+        # Each cold-cache request also builds the availability map (one query);
+        # /api/products/ additionally runs the conditional-GET validator query
+        budgets = {'/api/feed': 2, '/api/feed?limit=50': 2, '/api/products/': 3, '/api/seller-products/published/': 2}
+        for url, budget in budgets.items():
+            self._create_products(2)
+            small, _ = self._count_queries(url)
+            self._create_products(10)
+            large, _ = self._count_queries(url)
+            self.assertEqual(small, large, url)
+            self.assertLessEqual(large, budget, url)
+
+    def test_annotated_fields_match_per_object_fallback(self):
+        self._create_products(1)
+        # The unpaged published list renders every annotated field the full serializer reads
+        _, response = self._count_queries('/api/seller-products/published/')
+        by_name = {row['name']: row for row in response.json()}
+
+        design = by_name['Design 0']
+        self.assertEqual(design['designer_name'], 'Sel 0')
+        self.assertEqual(design['available_stock'], 40)
+        self.assertEqual(design['admin_buy_price'], '300.00')
+        self.assertTrue(design['creator_store_slug'])
+
+        custom = by_name['Custom 0']
+        self.assertEqual(custom['available_stock'], 3)
+        self.assertEqual(custom['admin_buy_price'], '0.00')
+        self.assertEqual(custom['creator_store_slug'], design['creator_store_slug'])
+
+
+class FeedPagingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.products = [
+            Product.objects.create(name=f'Tee {i}', price=Decimal('500'), stock=5, is_published=True, kind='design')
+            for i in range(30)
+        ]
+
+    def test_feed_is_paged_by_default_and_bounded(self):
+        page = self.client.get('/api/feed').json()
+        self.assertEqual((len(page['results']), page['limit'], page['has_more']), (24, 24, True))
+        self.assertEqual(page['results'][0]['name'], 'Tee 29')
+        self.assertEqual(self.client.get('/api/feed', {'limit': 1000}).json()['limit'], 60)
+
+        rest = self.client.get('/api/feed', {'cursor': page['next_cursor']}).json()
+        self.assertEqual([row['name'] for row in rest['results']], [f'Tee {i}' for i in range(5, -1, -1)])
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(self.client.get('/api/feed', {'cursor': 'bogus'}).status_code, 400)
+
+    def test_product_list_is_paged_by_default(self):
+        page = self.client.get('/api/products/').json()
+        self.assertEqual((len(page['results']), page['limit'], page['has_more']), (30, 60, False))
+        page = self.client.get('/api/products/', {'limit': 20}).json()
+        self.assertEqual((len(page['results']), page['has_more']), (20, True))
+
+    def test_search_and_sale_filters_reach_past_the_first_page(self):
+        oldest = self.products[0]
+        oldest.description = 'Glow in the dark print'
+        oldest.discount_price = Decimal('400')
+        oldest.save()
+
+        for params in ({'q': 'GLOW dark'}, {'on_sale': 'true'}):
+            page = self.client.get('/api/feed', {**params, 'limit': 6}).json()
+            self.assertEqual([row['name'] for row in page['results']], ['Tee 0'], params)
+            page = self.client.get('/api/products/', params).json()
+            self.assertEqual([row['name'] for row in page['results']], ['Tee 0'], params)
+        self.assertEqual(self.client.get('/api/feed', {'q': 'glow light'}).json()['results'], [])
+
+    def test_cached_page_is_invalidated_by_a_product_save(self):
+        self.client.get('/api/feed')
+        with self.assertNumQueries(0):
+            self.client.get('/api/feed')  # page and availability map both cached
+
+        product = self.products[-1]
+        product.name = 'Renamed'
+        product.save()
+        self.assertEqual(self.client.get('/api/feed').json()['results'][0]['name'], 'Renamed')
+
+        product.delete()
+        self.assertEqual(self.client.get('/api/feed').json()['results'][0]['name'], 'Tee 28')
+
+    def test_page_cache_key_ignores_parameters_the_view_does_not_read(self):
+        self.client.get('/api/feed', {'limit': 5})
+        with self.assertNumQueries(0):
+            self.client.get('/api/feed', {'limit': 5, 'utm_source': 'mail', 'junk': 'x' * 50})
+            self.client.get('/api/feed', {'limit': 5, 'category': '1'})  # only /api/products/ filters by category
+        self.assertEqual(self.client.get('/api/feed', {'limit': 5, 'q': 'Tee 28'}).json()['results'][0]['name'], 'Tee 28')
+        page = self.client.get('/api/products/', {'limit': 5, 'category': '999'}).json()
+        self.assertEqual(page['results'], [])
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        from .checks import check_shared_cache
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1'}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['products.E001'])
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class BootstrapEndpointTests(TestCase):
+    def setUp(self):
+        from settings.cache import _local
+        from settings.models import SiteSettings
+        SiteSettings.load()
+        cache.clear()
+        _local.clear()
+        self.client = APIClient()
+        Category.objects.create(name='Tees')
+
+    def test_payload_is_cached_until_categories_change(self):
+        response = self.client.get('/api/bootstrap')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.data),
+            {'site_info', 'meta_tags', 'contact_info', 'promotional_banners', 'categories', 'feed'},
+        )
+        self.assertEqual([c['name'] for c in response.data['categories']], ['Tees'])
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/bootstrap')
+        response = self.client.get('/api/bootstrap', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        Category.objects.create(name='Hoodies')
+        response = self.client.get('/api/bootstrap')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['categories']), 2)
+
+    def test_invalid_token_is_ignored(self):
+        response = self.client.get('/api/bootstrap', HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Tees')
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=300', response['Cache-Control'])
+        self.assertTrue(response['Last-Modified'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_validator_changes_on_update_delete_and_related_rows(self):
+        etag = self.client.get('/api/categories/')['ETag']
+
+        self.category.name = 'T-Shirts'
+        self.category.save()
+        response = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        Product.objects.create(name='Shirt', price=Decimal('500'), category=self.category, is_published=True)
+        response = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        Category.objects.create(name='Temp').delete()
+        response = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_string_is_part_of_the_validator(self):
+        etag = self.client.get('/api/mockup-variants/')['ETag']
+        response = self.client.get('/api/mockup-variants/?color=red', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_stores_are_not_validated_on_their_own_table_alone(self):
+        owner = User.objects.create_user(username='owner', first_name='Ann')
+        Store.objects.create(owner=owner, name='Ann Tees')
+        response = self.client.get('/api/stores/')
+        self.assertNotIn('ETag', response)
+        User.objects.filter(pk=owner.pk).update(first_name='Anne')
+        self.assertEqual(self.client.get('/api/stores/').json()[0]['owner']['first_name'], 'Anne')
+
+
+class MockupCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for name in ['T-Shirt', 'Hoodie']:
+            mockup_type = MockupType.objects.create(name=name, slug=name.lower(), base_price=Decimal('300'))
+            for color, hex_value in [('White', '#FFFFFF'), ('Black', '#000000')]:
+                MockupVariant.objects.create(
+                    mockup_type=mockup_type, color_name=color, color_hex=hex_value,
+                    front_image='mockups/front/x.png', back_image='mockups/back/x.png',
+                )
+        MockupVariant.objects.filter(mockup_type__slug='hoodie', color_name='Black').update(is_active=False)
+
+    def test_catalog_is_built_from_two_queries_and_cached(self):
+        with self.assertNumQueries(4):  # validator + types + prefetched variants + availability map
+            response = self.client.get('/api/mockup-types/catalog/')
+        types = {t['slug']: t for t in response.data['types']}
+        self.assertEqual(types['hoodie']['variant_count'], 1)
+        self.assertEqual([v['color_name'] for v in types['hoodie']['variants']], ['White'])
+        self.assertEqual(types['t-shirt']['variant_count'], 2)
+        self.assertEqual([c['color_name'] for c in response.data['colors']], ['Black', 'White'])
+
+        with self.assertNumQueries(1):
+            self.client.get('/api/mockup-types/catalog/')
+
+        MockupVariant.objects.filter(mockup_type__slug='hoodie', color_name='Black').get().save()
+        response = self.client.get('/api/mockup-types/catalog/')
+        self.assertEqual(len(response.data['types'][0]['variants']) + len(response.data['types'][1]['variants']), 3)
+
+        MockupType.objects.create(name='Cap', slug='cap', base_price=Decimal('200'))
+        response = self.client.get('/api/mockup-types/catalog/')
+        self.assertEqual(len(response.data['types']), 3)
+
+    def test_cached_catalog_shows_live_stock(self):
+        from .inventory import decrement_stock
+        variant = MockupVariant.objects.get(mockup_type__slug='t-shirt', color_name='White')
+        MockupVariant.objects.filter(pk=variant.pk).update(stock=100)
+        self.client.get('/api/mockup-types/catalog/')
+        self.client.get('/api/async/mockup-types/catalog')
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock({variant.pk: 5})
+
+        for path in ['/api/mockup-types/catalog/', '/api/async/mockup-types/catalog']:
+            stock = {v['id']: v['stock'] for t in self.client.get(path).json()['types'] for v in t['variants']}
+            self.assertEqual(stock[variant.pk], 95, path)
+
+    def test_type_list_counts_do_not_query_per_row(self):
+        with self.assertNumQueries(2):  # validator + annotated list
+            response = self.client.get('/api/mockup-types/')
+        self.assertEqual({t['slug']: t['variant_count'] for t in response.data}, {'hoodie': 1, 't-shirt': 2})
+
+
+class InventoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.shopper = User.objects.create_user(username='shopper')
+        self.client.force_authenticate(self.shopper)
+        self.mockup_type = MockupType.objects.create(name='T-Shirt', slug='t-shirt', base_price=Decimal('300'))
+        self.variant = MockupVariant.objects.create(
+            mockup_type=self.mockup_type, size='M', color_name='White',
+            front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=5,
+        )
+        seller = User.objects.create_user(username='seller')
+        store = Store.objects.create(owner=seller, name='Shop')
+        self.product = Product.objects.create(
+            store=store, created_by=seller, mockup_variant=self.variant, name='Design',
+            price=Decimal('550'), is_published=True, kind='design',
+        )
+
+    def _order(self, quantity, **extra):
+        return self.client.post('/api/orders/', {
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}],
+            'shipping_address': 'Dhaka', **extra,
+        }, format='json')
+
+    def _stock(self):
+        self.variant.refresh_from_db()
+        return self.variant.stock
+
+    def test_checkout_decrements_and_rejects_oversell(self):
+        self.assertEqual(self._order(3).status_code, 201)
+        self.assertEqual(self._stock(), 2)
+        self.assertEqual(self._order(3).status_code, 400)
+        self.assertEqual(self._stock(), 2)
+
+    def test_sale_changes_validators_of_lists_showing_stock(self):
+        cache.clear()
+        products = self.client.get('/api/products/')
+        variants = self.client.get('/api/mockup-variants/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._order(2).status_code, 201)
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=products['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['available_stock'], 3)
+        response = self.client.get('/api/mockup-variants/', HTTP_IF_NONE_MATCH=variants['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['stock'], 3)
+
+    def test_reservation_holds_stock_until_committed_or_released(self):
+        response = self.client.post('/api/stock-reservations', {
+            'items': [{'product_id': self.product.pk, 'quantity': 4}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        token = response.data['token']
+        self.assertEqual(self._stock(), 1)
+        self.assertEqual(self._order(2).status_code, 400)
+
+        # The order uses 3 of the 4 held units; the spare one goes back
+        self.assertEqual(self._order(3, reservation_token=token).status_code, 201)
+        self.assertEqual(self._stock(), 2)
+        reservation = StockReservation.objects.get(token=token)
+        self.assertEqual(reservation.status, StockReservation.STATUS_COMMITTED)
+        self.assertEqual(self._order(1, reservation_token=token).status_code, 400)
+
+        token = self.client.post('/api/stock-reservations', {
+            'items': [{'product_id': self.product.pk, 'quantity': 2}],
+        }, format='json').data['token']
+        self.assertEqual(self._stock(), 0)
+        self.assertEqual(self.client.delete(f'/api/stock-reservations/{token}').status_code, 204)
+        self.assertEqual(self._stock(), 2)
+
+    def _reserve(self, quantity):
+        return self.client.post('/api/stock-reservations', {
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}],
+        }, format='json')
+
+    @override_settings(STOCK_RESERVATION_MAX_QUANTITY=2, STOCK_RESERVATION_MAX_LIVE=2)
+    def test_reservations_need_a_login_and_are_capped(self):
+        self.assertEqual(self._reserve(3).status_code, 400)
+        tokens = [self._reserve(1).data['token'] for _ in range(2)]
+        self.assertEqual(self._reserve(1).status_code, 400)
+        self.assertEqual(self._stock(), 3)
+
+        # Someone else can neither release these holds nor hold anything without signing in
+        self.client.force_authenticate(User.objects.create_user(username='other'))
+        self.assertEqual(self.client.delete(f'/api/stock-reservations/{tokens[0]}').status_code, 204)
+        self.assertEqual(self._stock(), 3)
+        self.client.force_authenticate(None)
+        self.assertEqual(self._reserve(1).status_code, 401)
+        self.assertEqual(self.client.delete(f'/api/stock-reservations/{tokens[0]}').status_code, 401)
+
+        # Releasing one frees a slot
+        self.client.force_authenticate(self.shopper)
+        self.assertEqual(self.client.delete(f'/api/stock-reservations/{tokens[0]}').status_code, 204)
+        self.assertEqual(self._reserve(1).status_code, 201)
+
+    def test_reservations_are_rate_limited(self):
+        from unittest import mock
+        from .views import StockReservationThrottle
+        cache.clear()
+        with mock.patch.object(StockReservationThrottle, 'THROTTLE_RATES', {'stock_reservations': '2/hour'}):
+            self.assertEqual(self._reserve(1).status_code, 201)
+            self.assertEqual(self._reserve(1).status_code, 201)
+            self.assertEqual(self._reserve(1).status_code, 429)
+
+    def test_expired_reservations_are_released(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .inventory import release_expired_reservations, reserve_stock
+
+        reserve_stock({self.variant.pk: 5})
+        self.assertEqual(self._stock(), 0)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(release_expired_reservations(), 1)
+        self.assertEqual(self._stock(), 5)
+
+    def test_cancel_restocks_and_reconcile_matches_history(self):
+        from .inventory import reconcile_stock
+
+        order_id = self._order(2).data['id']
+        order = Order.objects.get(pk=order_id)
+        order.status = 'cancelled'
+        order.save()
+        self.assertEqual(self._stock(), 5)
+        order.status = 'processing'
+        order.save()
+        self.assertEqual(self._stock(), 3)
+        self.assertEqual(reconcile_stock(), [])
+
+        # Admin edit is booked as an adjustment, so history still adds up
+        variant = MockupVariant.objects.get(pk=self.variant.pk)
+        variant.stock = 10
+        variant.save()
+        self.assertEqual(reconcile_stock(), [])
+
+        MockupVariant.objects.filter(pk=variant.pk).update(stock=7)
+        drifted = reconcile_stock(fix=True)
+        self.assertEqual([(stored, expected) for _, stored, expected in drifted], [(7, 10)])
+        self.assertEqual(self._stock(), 10)
+
+    def _variant_statements(self, ctx):
+        """(kind, sql) for statements that lock or update variant rows, in order"""
+        statements = []
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if sql.startswith('UPDATE "products_mockupvariant"'):
+                statements.append(('update', sql))
+            elif sql.startswith('SELECT "products_mockupvariant"."id" FROM') and sql.endswith(
+                    ('ORDER BY "products_mockupvariant"."id" ASC', 'FOR UPDATE')):
+                statements.append(('lock', sql))
+        return statements
+
+    def test_stock_changes_lock_variants_in_pk_order_first(self):
+        from .checkout import place_order
+        buyer = User.objects.create_user(username='buyer')
+        other = MockupVariant.objects.create(
+            mockup_type=self.mockup_type, size='L', color_name='White',
+            front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=5,
+        )
+        second = Product.objects.create(
+            store=self.product.store, created_by=self.product.created_by, mockup_variant=other, name='Design L',
+            price=Decimal('550'), is_published=True, kind='design',
+        )
+        # The hold covers more of `other` than the order takes, so stock moves twice in one checkout
+        items = [{'product_id': second.pk, 'quantity': 1}, {'product_id': self.product.pk, 'quantity': 1}]
+        token = self.client.post('/api/stock-reservations', {'items': [{'product_id': second.pk, 'quantity': 3}]}, format='json').data['token']
+        with CaptureQueriesContext(connection) as ctx:
+            place_order(buyer, items, 'Dhaka', reservation_token=token)
+        statements = self._variant_statements(ctx)
+        self.assertEqual([kind for kind, _ in statements], ['lock', 'lock', 'update', 'lock', 'update'])
+        first, second_id = sorted([self.variant.pk, other.pk])
+        self.assertIn(f'IN ({first}, {second_id})', statements[0][1])
+        if connection.features.has_select_for_update:
+            self.assertTrue(statements[0][1].endswith('FOR UPDATE'))
+
+    def test_cancel_restocks_before_locking_the_sales_rollup(self):
+        # Checkout locks variants before StoreDailySales buckets; cancelling must use the same order
+        order = Order.objects.get(pk=self._order(2).data['id'])
+        order.status = 'cancelled'
+        with CaptureQueriesContext(connection) as ctx:
+            order.save()
+        statements = [query['sql'] for query in ctx.captured_queries]
+        restock = next(i for i, sql in enumerate(statements) if sql.startswith('UPDATE "products_mockupvariant"'))
+        rollup = next(i for i, sql in enumerate(statements) if 'products_storedailysales' in sql)
+        self.assertLess(restock, rollup)
+        self.assertEqual(self._stock(), 5)
+
+    def test_failed_conditional_decrement_rolls_back_the_whole_cart(self):
+        other = MockupVariant.objects.create(
+            mockup_type=self.mockup_type, size='L', color_name='White',
+            front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=1,
+        )
+        short = Product.objects.create(
+            store=self.product.store, created_by=self.product.created_by, mockup_variant=other, name='Design L',
+            price=Decimal('550'), is_published=True, kind='design',
+        )
+        # Another checkout takes the last unit after this cart was priced: only the UPDATE's WHERE can notice
+        MockupVariant.objects.filter(pk=other.pk).update(stock=0)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/orders/', {
+                'items': [{'product_id': self.product.pk, 'quantity': 2}, {'product_id': short.pk, 'quantity': 1}],
+                'shipping_address': 'Dhaka',
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        decrement = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('UPDATE "products_mockupvariant"')]
+        self.assertEqual(len(decrement), 1)
+        self.assertIn('"stock" >= 1', decrement[0])
+        self.assertEqual(self._stock(), 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+
+class CheckoutQueryScalingTests(QueryScalingMixin, TestCase):
+    def test_checkout_queries_do_not_grow_with_the_cart(self):
+        import itertools
+        mockup_type = MockupType.objects.create(name='T-Shirt', slug='t-shirt', base_price=Decimal('300'))
+        buyer = User.objects.create_user(username='buyer')
+        designer = User.objects.create_user(username='designer')
+        category = DesignCategory.objects.create(name='Animals', slug='animals')
+        self.client = APIClient()
+        self.client.force_authenticate(buyer)
+        serial = itertools.count()
+
+        def cart(lines):
+            # Each line is a seller's design from its own store and a custom product using a library design
+            items = []
+            for _ in range(lines):
+                i = next(serial)
+                seller = User.objects.create_user(username=f'seller-{i}')
+                variant = MockupVariant.objects.create(
+                    mockup_type=mockup_type, size=str(i), color_name='White',
+                    front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=10,
+                )
+                design = DesignLibraryItem.objects.create(
+                    owner=designer, category=category, name=f'Design {i}', image='design-library/x.png', is_active=True,
+                )
+                products = [
+                    Product.objects.create(
+                        store=Store.objects.create(owner=seller, name=f'Shop {i}'), created_by=seller,
+                        mockup_variant=variant, name='Design', price=Decimal('550'), is_published=True, kind='design',
+                    ),
+                    Product.objects.create(
+                        created_by=buyer, mockup_variant=variant, name='Custom', price=Decimal('600'), kind='custom',
+                        design_data={'sides': {'front': {'library_design_id': design.pk}}},
+                    ),
+                ]
+                items += [{'product_id': product.pk, 'quantity': 2} for product in products]
+            return items
+
+        def reserved_cart(lines):
+            items = cart(lines)
+            token = self.client.post('/api/stock-reservations', {'items': items}, format='json').data['token']
+            return items, {'reservation_token': token}
+
+        def checkout(prepared):
+            items, extra = prepared if isinstance(prepared, tuple) else (prepared, {})
+            response = self.client.post('/api/orders/', {'items': items, 'shipping_address': 'Dhaka', **extra}, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(len(response.data['items']), len(items))
+
+        self.assertWriteDoesNotScale('POST /api/orders/', cart, checkout)
+        self.assertWriteDoesNotScale('POST /api/orders/ with a reservation', reserved_cart, checkout)
+        self.assertEqual(DesignCommission.objects.count(), 2 * (1 + 20))
+        self.assertEqual(StockReservation.objects.filter(status=StockReservation.STATUS_COMMITTED).count(), 1 + 20)
+
+
+class SellerSalesRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = User.objects.create_user(username='seller')
+        SellerProfile.objects.create(user=self.seller, status='approved')
+        store = Store.objects.create(owner=self.seller, name='Shop')
+        self.product = Product.objects.create(
+            store=store, created_by=self.seller, name='Design', price=Decimal('550'), buy_price=Decimal('300'),
+            stock=50, is_published=True, kind='design',
+        )
+
+    def _order(self, quantity):
+        response = self.client.post('/api/orders/', {
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}], 'shipping_address': 'Dhaka',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Order.objects.get(pk=response.data['id'])
+
+    def _seller_view(self, **params):
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        return client.get('/api/orders/seller/', params).json()
+
+    def test_seller_orders_are_paged_only_on_request(self):
+        orders = [self._order(1).pk for _ in range(3)]
+        data = self._seller_view()
+        self.assertEqual([order['id'] for order in data['orders']], orders[::-1])
+        self.assertEqual((data['next_cursor'], data['has_more']), (None, False))
+
+        page = self._seller_view(limit=2)
+        self.assertEqual([order['id'] for order in page['orders']], orders[:0:-1])
+        self.assertTrue(page['has_more'])
+        page = self._seller_view(limit=2, cursor=page['next_cursor'])
+        self.assertEqual([order['id'] for order in page['orders']], orders[:1])
+        self.assertFalse(page['has_more'])
+
+    def test_seller_endpoint_reads_the_rollup(self):
+        self._order(2)
+        cancelled = self._order(1)
+        data = self._seller_view()
+        self.assertEqual(data['stats'], {
+            'orders_count': 2, 'items_sold': 3, 'seller_revenue': '1650.00', 'seller_profit': '750.00',
+        })
+        self.assertEqual(len(data['orders']), 2)
+
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        self.assertEqual(self._seller_view()['stats']['items_sold'], 2)
+        # The stats come from the rollup row, not from the order history
+        StoreDailySales.objects.update(revenue=Decimal('999'))
+        self.assertEqual(self._seller_view()['stats']['seller_revenue'], '999.00')
+
+    def test_bucket_is_locked_before_aggregating(self):
+        from .sales import refresh_order_sales
+        order = self._order(1)
+        with CaptureQueriesContext(connection) as ctx:
+            refresh_order_sales(order)
+        statements = [query['sql'] for query in ctx.captured_queries]
+        lock = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT') and 'products_storedailysales' in sql)
+        aggregate = next(i for i, sql in enumerate(statements) if 'SUM(' in sql)
+        self.assertLess(lock, aggregate)
+        self.assertEqual(StoreDailySales.objects.get().items_sold, 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs row locks')
+class SellerSalesConcurrencyTests(TransactionTestCase):
+    def test_concurrent_orders_for_one_store_and_day_are_both_counted(self):
+        import threading
+        from django.db import close_old_connections, transaction
+        from .sales import refresh_order_sales
+        seller = User.objects.create_user(username='seller')
+        product = Product.objects.create(
+            store=Store.objects.create(owner=seller, name='Shop'), created_by=seller, name='Design',
+            price=Decimal('100'), is_published=True, kind='design',
+        )
+        first_refreshed = threading.Event()
+
+        def checkout(quantity, hold=None, wait=None):
+            try:
+                with transaction.atomic():
+                    order = Order.objects.create(total_amount=Decimal('100') * quantity, shipping_address='Dhaka')
+                    OrderItem.objects.create(order=order, product=product, quantity=quantity, price=Decimal('100'))
+                    if wait:
+                        wait.wait(5)
+                    refresh_order_sales(order)
+                    if hold:
+                        hold.set()
+                        # Keep the bucket locked while the other checkout aggregates
+                        threading.Event().wait(0.5)
+            finally:
+                close_old_connections()
+
+        threads = [
+            threading.Thread(target=checkout, args=(1, first_refreshed)),
+            threading.Thread(target=checkout, args=(2, None, first_refreshed)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        bucket = StoreDailySales.objects.get()
+        self.assertEqual((bucket.orders_count, bucket.items_sold), (2, 3))
+
+
+class AvailabilityMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        mockup_type = MockupType.objects.create(name='T-Shirt', slug='t-shirt', base_price=Decimal('300'))
+        self.variant = MockupVariant.objects.create(
+            mockup_type=mockup_type, size='M', color_name='White',
+            front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=8,
+        )
+        seller = User.objects.create_user(username='seller')
+        self.product = Product.objects.create(
+            store=Store.objects.create(owner=seller, name='Shop'), created_by=seller,
+            mockup_variant=self.variant, name='Design', price=Decimal('550'), is_published=True, kind='design', stock=99,
+        )
+
+    def _feed_stock(self):
+        return self.client.get('/api/feed').data['results'][0]['available_stock']
+
+    def test_available_stock_follows_the_variant_not_the_product_copy(self):
+        self.assertEqual(self._feed_stock(), 8)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/orders/', {
+                'items': [{'product_id': self.product.pk, 'quantity': 3}], 'shipping_address': 'Dhaka',
+            }, format='json')
+        self.assertEqual(self._feed_stock(), 5)
+
+    def test_stock_moves_keep_cached_pages_and_overlay_live_stock(self):
+        from .cache import get_feed_cache_version
+        version = get_feed_cache_version()
+        self.assertEqual(self._feed_stock(), 8)
+        bootstrap = self.client.get('/api/bootstrap')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/orders/', {
+                'items': [{'product_id': self.product.pk, 'quantity': 3}], 'shipping_address': 'Dhaka',
+            }, format='json')
+
+        self.assertEqual(get_feed_cache_version(), version)
+        with self.assertNumQueries(1):  # the rebuilt availability map; the page itself is a cache hit
+            self.assertEqual(self._feed_stock(), 5)
+        self.assertEqual(self.client.get('/api/feed', {'limit': 5}).data['results'][0]['available_stock'], 5)
+        response = self.client.get('/api/bootstrap', HTTP_IF_NONE_MATCH=bootstrap['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['feed']['results'][0]['available_stock'], 5)
+
+    def test_admin_drift_filter(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        MockupVariant.objects.filter(pk=self.variant.pk).update(stock=3)
+
+        request = RequestFactory().get('/admin/products/mockupvariant/', {'stock_drift': 'yes'})
+        request.user = admin_user
+        changelist = site._registry[MockupVariant].get_changelist_instance(request)
+        self.assertEqual([(v.stock, v.expected_stock) for v in changelist.queryset], [(3, 8)])
+
+
+class ImageRenditionTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.designer = User.objects.create_user(username='designer')
+
+    def _upload(self, name, size=(1200, 600), mode='RGBA', data=None):
+        from io import BytesIO
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from PIL import Image
+        if data is None:
+            buffer = BytesIO()
+            Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+            data = buffer.getvalue()
+        return default_storage.save(name, ContentFile(data))
+
+    def _design(self, image):
+        return DesignLibraryItem.objects.create(owner=self.designer, name='Lion', image=image)
+
+    def _open(self, name):
+        from django.core.files.storage import default_storage
+        from PIL import Image
+        with default_storage.open(name, 'rb') as fh:
+            image = Image.open(fh)
+            image.load()
+        return image
+
+    def test_upload_gets_webp_and_jpeg_renditions_per_width(self):
+        from .renditions import srcsets_for
+        design = self._design(self._upload('design-library/lion.png'))
+        design.refresh_from_db()
+        manifest = design.image_renditions['image']
+        self.assertEqual(manifest['source'], design.image.name)
+        self.assertEqual(manifest['width'], 1200)
+        self.assertEqual(len(manifest['hash']), 12)
+        for ext, pil_format, alpha in [('webp', 'WEBP', True), ('jpeg', 'JPEG', False)]:
+            self.assertEqual(list(manifest[ext]), ['160', '320', '640', '1024'])
+            for width, name in manifest[ext].items():
+                self.assertEqual(name, f"design-library/lion.{manifest['hash']}.{width}w.{ext}")
+                image = self._open(name)
+                self.assertEqual((image.format, image.size), (pil_format, (int(width), int(width) // 2)))
+                # JPEG has no alpha: transparent sources are flattened onto white
+                self.assertEqual('A' in image.mode, alpha, name)
+        srcset = srcsets_for(design)['image']['webp']
+        self.assertTrue(srcset.endswith(f"lion.{manifest['hash']}.1024w.webp 1024w"))
+        self.assertEqual(srcset.count('w, '), 3)
+
+    def test_small_source_is_not_upscaled_and_renditions_are_reused(self):
+        from django.core.files.storage import default_storage
+        from .renditions import build_renditions
+        design = self._design(self._upload('design-library/tiny.png', size=(100, 40), mode='RGB'))
+        design.refresh_from_db()
+        manifest = design.image_renditions['image']
+        self.assertEqual((list(manifest['webp']), list(manifest['jpeg'])), (['100'], ['100']))
+        files = sorted(default_storage.listdir('design-library')[1])
+        self.assertEqual(build_renditions(design.image), manifest)
+        self.assertEqual(sorted(default_storage.listdir('design-library')[1]), files)
+
+    def test_undecodable_upload_is_recorded_instead_of_failing_the_save(self):
+        from .renditions import refresh_renditions, srcsets_for, stale_rendition_fields
+        design = self._design(self._upload('design-library/broken.png', data=b'not an image'))
+        design.refresh_from_db()
+        self.assertEqual(design.image_renditions['image'], {'source': design.image.name, 'error': 'ImageValidationError'})
+        self.assertEqual(srcsets_for(design), {})
+        # The failure is remembered, so later saves do not retry it
+        self.assertEqual(stale_rendition_fields(design), [])
+
+        # The rendition step on its own records Pillow's error the same way
+        design.image_renditions = {}
+        self.assertEqual(refresh_renditions(design, ['image']), [])
+        self.assertEqual(design.image_renditions['image'], {'source': design.image.name, 'error': 'UnidentifiedImageError'})
+
+    def test_print_file_replaces_the_upload_only_on_commit(self):
+        from datetime import timedelta
+        from django.core.files.storage import default_storage
+        from django.utils import timezone
+        from .jobs import process_inline
+        upload = self._upload('designs/logos/lion.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(created_by=self.designer, name='Tee', price=Decimal('10'), design_logo=upload)
+            product.refresh_from_db()
+            self.assertEqual(product.design_logo.name, 'designs/logos/lion.png')
+            self.assertTrue(default_storage.exists(upload))
+        self.assertFalse(default_storage.exists(upload))
+        self.assertEqual(round(self._open(product.design_logo.name).info['dpi'][0]), 300)
+
+        # Reprocessing bumps updated_at, so conditional-GET validators notice the new file
+        stale = timezone.now() - timedelta(hours=1)
+        Product.objects.filter(pk=product.pk).update(updated_at=stale)
+        process_inline(product, ['design_logo'])
+        product.refresh_from_db()
+        self.assertNotEqual(product.design_logo.name, 'designs/logos/lion.png')
+        self.assertGreater(product.updated_at, stale)
+
+
+@override_settings(IMAGE_JOBS_ASYNC=True)
+class ImageJobQueueTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username='seller')
+        self.product = Product.objects.create(created_by=self.seller, name='Tee', price=Decimal('10'))
+
+    def _job(self, **fields):
+        return ImageJob.objects.create(model_label='products.product', object_id=self.product.pk, fields=['image'], **fields)
+
+    def test_inline_processing_is_the_default(self):
+        from django.conf import settings
+        from .jobs import enqueue_image_job
+        with override_settings():
+            del settings.IMAGE_JOBS_ASYNC
+            self.assertIsNone(enqueue_image_job(self.product, ['image']))
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_inline_processing_survives_a_missing_upload(self):
+        with self.settings(IMAGE_JOBS_ASYNC=False):
+            self.product.image = 'products/missing.png'
+            self.product.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_renditions['image'], {'source': 'products/missing.png', 'error': 'FileNotFoundError'})
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_jobs_are_visible_to_their_owner_and_staff_only(self):
+        client = APIClient()
+        guest_job, own_job = self._job(), self._job(requested_by=self.seller)
+        self.assertEqual(client.get(f'/api/image-jobs/{guest_job.pk}/').status_code, 401)
+        client.force_authenticate(self.seller)
+        self.assertEqual(client.get(f'/api/image-jobs/{guest_job.pk}/').status_code, 404)
+        self.assertEqual(client.get(f'/api/image-jobs/{own_job.pk}/').status_code, 200)
+        self.assertEqual([job['id'] for job in client.get('/api/image-jobs/').json()], [own_job.pk])
+        client.force_authenticate(User.objects.create_user(username='staff', is_staff=True))
+        self.assertEqual(client.get(f'/api/image-jobs/{guest_job.pk}/').status_code, 200)
+
+    def test_pending_job_absorbs_new_fields(self):
+        from .jobs import enqueue_image_job
+        job = enqueue_image_job(self.product, ['image'])
+        self.assertEqual(enqueue_image_job(self.product, ['design_logo', 'image'], requested_by=self.seller), job)
+        job.refresh_from_db()
+        self.assertEqual(job.fields, ['design_logo', 'image'])
+        self.assertEqual(job.requested_by, self.seller)
+        # Once the worker picked it up, a new upload gets its own job
+        ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.STATUS_RUNNING)
+        self.assertNotEqual(enqueue_image_job(self.product, ['image']), job)
+        self.assertEqual(ImageJob.objects.count(), 2)
+
+    def test_claim_takes_runnable_jobs_once(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .jobs import STALE_RUNNING_AFTER, claim_jobs
+        now = timezone.now()
+        ready = [self._job() for _ in range(3)]
+        backing_off = self._job()
+        ImageJob.objects.filter(pk=backing_off.pk).update(run_after=now + timedelta(minutes=1))
+        self._job(status=ImageJob.STATUS_RUNNING, started_at=now)
+        stale = self._job(status=ImageJob.STATUS_RUNNING, started_at=now - STALE_RUNNING_AFTER - timedelta(seconds=1), attempts=1)
+        self._job(status=ImageJob.STATUS_DONE)
+
+        with CaptureQueriesContext(connection) as ctx:
+            first = claim_jobs(2, 'w1')
+        self.assertEqual(first, [ready[0].pk, ready[1].pk])
+        if connection.features.has_select_for_update_skip_locked:
+            self.assertIn('SKIP LOCKED', ctx.captured_queries[0]['sql'])
+        self.assertEqual(claim_jobs(10, 'w2'), [ready[2].pk, stale.pk])
+        self.assertEqual(claim_jobs(10, 'w3'), [])
+        claimed = ImageJob.objects.get(pk=stale.pk)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (ImageJob.STATUS_RUNNING, 'w2', 2))
+
+    def test_failures_back_off_then_give_up(self):
+        from unittest import mock
+        from django.utils import timezone
+        from .jobs import MAX_ATTEMPTS, claim_jobs, run_image_job
+        job = self._job()
+        with mock.patch('products.jobs.process_instance_images', side_effect=RuntimeError('disk full')), \
+                self.assertLogs('products.jobs', 'ERROR'):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                ImageJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                self.assertEqual(claim_jobs(1, 'w'), [job.pk])
+                before = timezone.now()
+                status = run_image_job(job.pk)
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+                self.assertEqual(job.error, 'RuntimeError: disk full')
+                if attempt < MAX_ATTEMPTS:
+                    self.assertEqual(status, ImageJob.STATUS_PENDING)
+                    delay = (job.run_after - before).total_seconds()
+                    self.assertAlmostEqual(delay, 30 * 2 ** attempt, delta=5)
+                    self.assertEqual(claim_jobs(1, 'w'), [])
+        self.assertEqual(status, ImageJob.STATUS_FAILED)
+        self.assertEqual(claim_jobs(1, 'w'), [])
+
+    def test_invalid_image_fails_without_retry(self):
+        from unittest import mock
+        from .jobs import ImageValidationError, run_image_job
+        job = self._job(attempts=1)
+        with mock.patch('products.jobs.process_instance_images', side_effect=ImageValidationError('tee.jpg: not a valid image')):
+            self.assertEqual(run_image_job(job.pk), ImageJob.STATUS_FAILED)
+
+    def test_job_for_a_deleted_object_is_skipped(self):
+        from .jobs import run_image_job
+        job = self._job(attempts=1)
+        self.product.delete()
+        self.assertEqual(run_image_job(job.pk), ImageJob.STATUS_DONE)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'skipped': 'object no longer exists'})
+
+
+@skipUnless(connection.vendor == 'postgresql', 'needs row locks')
+class ImageJobClaimConcurrencyTests(TransactionTestCase):
+    def test_claim_skips_jobs_locked_by_another_worker(self):
+        import threading
+        from django.db import close_old_connections, transaction
+        from .jobs import claim_jobs
+        jobs = [ImageJob.objects.create(model_label='products.product', object_id=i, fields=['image']) for i in range(2)]
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.extend(claim_jobs(10, 'w2'))
+            finally:
+                close_old_connections()
+
+        with transaction.atomic():
+            ImageJob.objects.select_for_update().get(pk=jobs[0].pk)
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            thread.join(5)
+        self.assertEqual(claimed, [jobs[1].pk])
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_runs_never_touch_the_configured_cache(self):
+        from django.conf import settings
+        from .testing import ISOLATED_CACHES, isolated_cache
+        # The test runner already swapped CACHES out; benchmark commands do the same
+        self.assertEqual(settings.CACHES, ISOLATED_CACHES)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'live'}}):
+            cache.set('live-entry', 1)
+            with isolated_cache():
+                cache.clear()
+                cache.set('benchmark-entry', 1)
+            self.assertEqual(cache.get('live-entry'), 1)
+            self.assertIsNone(cache.get('benchmark-entry'))
+
+    def test_seed_and_time_every_endpoint(self):
+        from .benchmark import ENDPOINTS, run_benchmarks, seed_dataset
+        counts, users = seed_dataset(stores=2, products_per_store=3, mockup_types=1, designs=5, orders=4)
+        self.assertEqual(counts['products'], 6)
+        self.assertEqual(Order.objects.count(), 4)
+
+        results = run_benchmarks(users, iterations=2, warmup=0)
+        self.assertEqual(set(results), {name for name, *_ in ENDPOINTS})
+        for name, result in results.items():
+            self.assertLess(result['status'], 300, name)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+
+    def test_concurrency_run_counts_errors(self):
+        from .benchmark import run_concurrency
+        statuses = iter([200, 200, 500, 200, 0, 304])
+        run = run_concurrency(lambda path: next(statuses), '/api/async/feed', concurrency=1, requests=6)
+        self.assertEqual(run['errors'], 2)
+        self.assertGreater(run['requests_per_second'], 0)
+
+
+@override_settings(REQUEST_PROFILING_SAMPLE_RATE=1)
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _samples(self, view):
+        from .instrumentation import request_stats
+        return {stats['view']: stats for stats in request_stats()['views']}.get(view, {}).get('samples', 0)
+
+    def test_server_timing_header_and_admin_stats(self):
+        for name in ['Tees', 'Hoodies']:
+            Category.objects.create(name=name, slug=name.lower())
+        before = self._samples('GET active-categories')
+        response = self.client.get('/api/categories/active')
+        self.assertRegex(response['Server-Timing'], r'^db;desc="\d+ queries, 0 repeated";dur=[\d.]+, serialize;dur=[\d.]+, total;dur=')
+
+        self.assertEqual(self.client.get('/api/request-stats').status_code, 401)
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        views = {view['view']: view for view in self.client.get('/api/request-stats').data['views']}
+        self.assertEqual(views['GET active-categories']['samples'], before + 1)
+        self.assertGreater(views['GET active-categories']['queries']['max'], 0)
+
+    def test_serializer_timing_is_only_installed_by_sampled_requests(self):
+        from unittest import mock
+        with mock.patch('products.instrumentation.install_serializer_timing') as install:
+            with override_settings(REQUEST_PROFILING_SAMPLE_RATE=0):
+                self.client.get('/api/categories/active')
+            install.assert_not_called()
+            self.client.get('/api/categories/active')
+            install.assert_called_once_with()
+
+    def test_startup_leaves_drf_unpatched(self):
+        import os
+        import subprocess
+        import sys
+        from django.conf import settings
+        script = (
+            "import django; django.setup(); "
+            "from rest_framework.serializers import BaseSerializer; "
+            "print(BaseSerializer.data.fget.__module__)"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'lyriczfashion.settings', 'REQUEST_PROFILING_SAMPLE_RATE': '0'},
+        ).stdout
+        self.assertEqual(output.strip(), 'rest_framework.serializers')
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/categories/active'))
+
+    def test_repeated_statements_are_counted(self):
+        from .instrumentation import RequestProfile
+        categories = [Category.objects.create(name=name, slug=name.lower()) for name in ['A', 'B', 'C']]
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            for category in categories:
+                list(Product.objects.filter(category=category))
+        self.assertEqual(profile.query_count, 3)
+        self.assertEqual(profile.duplicate_count, 2)
+        self.assertEqual(profile.repeated_statements()[0][1], 3)
+
+
+class ListEndpointQueryScalingTests(QueryScalingMixin, TestCase):
+    """Every list endpoint in products/urls.py must cost the same number of queries for 3 rows as for 6"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Tees', slug='tees')
+        self.mockup_type = MockupType.objects.create(name='T-Shirt', slug='t-shirt', category=self.category, base_price=Decimal('300'))
+        self.variant = MockupVariant.objects.create(
+            mockup_type=self.mockup_type, size='M', color_name='White',
+            front_image='mockups/front/white.png', back_image='mockups/back/white.png', stock=50,
+        )
+        self.buyer = User.objects.create_user(username='buyer')
+        self.seller = self._seller('seller')
+        self.store = self.seller.store
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.counter = 0
+
+    def _next(self):
+        self.counter += 1
+        return self.counter
+
+    def _seller(self, username):
+        user = User.objects.create_user(username=username, first_name='Seller')
+        SellerProfile.objects.create(user=user, status='approved')
+        Store.objects.create(owner=user, name=f"{username} store")
+        return user
+
+    def _product(self, **kwargs):
+        fields = {
+            'name': f"Product {self._next()}", 'price': Decimal('550'), 'mockup_variant': self.variant,
+            'category': self.category, 'is_published': True, 'kind': 'design',
+        }
+        fields.update(kwargs)
+        return Product.objects.create(**fields)
+
+    def _designs(self, count, **kwargs):
+        for _ in range(count):
+            fields = {
+                'owner': self._seller(f"designer{self._next()}"), 'name': f"Lion {self.counter}",
+                'image': 'design-library/lion.png', 'approval_status': DesignLibraryItem.APPROVAL_APPROVED,
+                'is_active': True, 'is_featured': True,
+            }
+            fields.update(kwargs)
+            DesignLibraryItem.objects.create(**fields)
+
+    def _storefront_products(self, count):
+        for _ in range(count):
+            owner = self._seller(f"maker{self._next()}")
+            self._product(store=owner.store, created_by=owner)
+
+    def _orders(self, count, store=None):
+        for _ in range(count):
+            order = Order.objects.create(user=self.buyer, total_amount=Decimal('550'), shipping_address='Dhaka')
+            product = self._product(store=store or self.store, created_by=self.seller)
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+
+    def _commissions(self, count):
+        for _ in range(count):
+            self._orders(1)
+            order_item = OrderItem.objects.latest('id')
+            self._designs(1)
+            DesignCommission.objects.create(
+                design=DesignLibraryItem.objects.latest('id'), owner=self.seller, used_by=self._seller(f"customer{self._next()}"),
+                order=order_item.order, order_item=order_item, amount=Decimal('49'),
+            )
+
+    def _mockup_types(self, count):
+        for _ in range(count):
+            number = self._next()
+            mockup_type = MockupType.objects.create(
+                name=f"Type {number}", slug=f"type-{number}", category=Category.objects.create(name=f"Cat {number}", slug=f"cat-{number}"),
+                base_price=Decimal('300'),
+            )
+            for color in ['Black', 'Red']:
+                MockupVariant.objects.create(
+                    mockup_type=mockup_type, size='M', color_name=color,
+                    front_image='mockups/front/x.png', back_image='mockups/back/x.png',
+                )
+
+    def _variants(self, count, mockup_type=None):
+        for _ in range(count):
+            MockupVariant.objects.create(
+                mockup_type=mockup_type or MockupType.objects.create(name=f"Type {self._next()}", slug=f"type-{self.counter}", base_price=Decimal('300')),
+                size='L', color_name=f"Color {self._next()}",
+                front_image='mockups/front/x.png', back_image='mockups/back/x.png',
+            )
+
+    def _check(self, path, add_rows, user=None):
+        self.client.force_authenticate(user)
+        with self.subTest(path=path):
+            self.assertQueriesDoNotScale(path, add_rows)
+
+    def test_catalog_endpoints(self):
+        self._check('/api/categories/', lambda n: [Category.objects.create(name=f"C{self._next()}", slug=f"c{self.counter}") for _ in range(n)])
+        self._check('/api/categories/active', lambda n: [Category.objects.create(name=f"C{self._next()}", slug=f"c{self.counter}") for _ in range(n)])
+        self._check('/api/design-categories/', lambda n: [DesignCategory.objects.create(name=f"D{self._next()}", slug=f"d{self.counter}") for _ in range(n)])
+        self._check('/api/mockup-types/', self._mockup_types)
+        self._check('/api/mockup-types/catalog/', self._mockup_types)
+        self._check(f"/api/mockup-types/{self.mockup_type.slug}/variants/", lambda n: self._variants(n, self.mockup_type))
+        self._check('/api/mockup-variants/', self._variants)
+
+    def test_storefront_endpoints(self):
+        self._check('/api/feed', self._storefront_products)
+        self._check('/api/products/', self._storefront_products)
+        self._check('/api/seller-products/published/', self._storefront_products)
+        self._check('/api/stores/', lambda n: [self._seller(f"owner{self._next()}") for _ in range(n)])
+
+    def test_design_library_endpoints(self):
+        self._check('/api/design-library/', self._designs)
+        self._check('/api/design-library/?search=lion', self._designs)
+        self._check('/api/design-library/featured/?page_size=20', self._designs)
+        self._check('/api/design-library/my/', lambda n: self._designs(n, owner=self.seller), user=self.seller)
+
+    def test_account_endpoints(self):
+        self._check('/api/custom-products/', lambda n: [self._product(kind='custom', created_by=self.buyer) for _ in range(n)], user=self.buyer)
+        self._check('/api/seller-products/', lambda n: [self._product(store=self.store, created_by=self.seller) for _ in range(n)], user=self.seller)
+        self._check('/api/orders/', self._orders, user=self.buyer)
+        self._check('/api/orders/seller/', self._orders, user=self.seller)
+        self._check('/api/design-commissions/', self._commissions, user=self.seller)
+        self._check('/api/image-jobs/', lambda n: [ImageJob.objects.create(model_label='products.Product', object_id=i, requested_by=self.buyer) for i in range(n)], user=self.buyer)
+        self._check('/api/wholesale-inquiries/', lambda n: [WholesaleInquiry.objects.create(name='Shop', email='shop@example.com', phone='01700000000', message='Bulk') for _ in range(n)], user=self.admin)
+
+
+class DesignCommissionFeedTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.designer = User.objects.create_user(username='designer')
+        self.buyer = User.objects.create_user(username='buyer')
+        self.client.force_authenticate(self.designer)
+        order = Order.objects.create(user=self.buyer, total_amount=Decimal('550'), shipping_address='Dhaka')
+        product = Product.objects.create(name='Tee', price=Decimal('550'), kind='custom', created_by=self.buyer)
+        item = OrderItem.objects.create(order=order, product=product, quantity=2, price=product.price)
+        lion, tiger = [
+            DesignLibraryItem.objects.create(owner=self.designer, name=name, image='design-library/x.png')
+            for name in ['Lion', 'Tiger']
+        ]
+        for design, status, quantity in [(lion, 'pending', 2), (lion, 'completed', 1), (lion, 'completed', 1), (tiger, 'pending', 1)]:
+            DesignCommission.objects.create(
+                design=design, owner=self.designer, used_by=self.buyer, order=order, order_item=item,
+                quantity=quantity, amount=Decimal('49') * quantity, status=status,
+            )
+
+    def test_feed_is_paginated_and_slim(self):
+        page = self.client.get('/api/design-commissions/', {'limit': 3}).data
+        self.assertEqual(len(page['results']), 3)
+        self.assertTrue(page['has_more'])
+        row = page['results'][0]
+        self.assertEqual(set(row['design']), {'id', 'name', 'image', 'category'})
+        self.assertNotIn('balance', row['used_by'])
+
+        rest = self.client.get('/api/design-commissions/', {'cursor': page['next_cursor']}).data
+        self.assertEqual(len(rest['results']), 1)
+        self.assertFalse(rest['has_more'])
+
+    def test_summary_totals(self):
+        with self.assertNumQueries(2):
+            summary = self.client.get('/api/design-commissions/summary/').data
+        self.assertEqual(summary['pending'], {'count': 2, 'amount': Decimal('147.00')})
+        self.assertEqual(summary['completed'], {'count': 2, 'amount': Decimal('98.00')})
+        self.assertEqual(
+            [(row['design_name'], row['commissions'], row['uses']) for row in summary['designs']],
+            [('Lion', 3, 4), ('Tiger', 1, 1)],
+        )
+
+
+class DesignPopularityTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.designer = User.objects.create_user(username='designer')
+        self.buyer = User.objects.create_user(username='buyer')
+        self.lion, self.tiger = [
+            DesignLibraryItem.objects.create(
+                owner=self.designer, name=name, image='design-library/x.png',
+                approval_status=DesignLibraryItem.APPROVAL_APPROVED, is_active=True, is_featured=True,
+            )
+            for name in ['Lion', 'Tiger']
+        ]
+
+    def _buy(self, design, quantity):
+        product = Product.objects.create(
+            name='Custom', price=Decimal('500'), kind='custom', created_by=self.buyer,
+            design_data={'library_design_id': design.pk},
+        )
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post('/api/orders/', {
+            'items': [{'product_id': product.pk, 'quantity': quantity}], 'shipping_address': 'Dhaka',
+        }, format='json')
+        self.client.force_authenticate(None)
+        return Order.objects.get(pk=response.data['id'])
+
+    def _counters(self, design):
+        design.refresh_from_db()
+        return {name: getattr(design, name) for name in ['use_count', 'quantity_used', 'pending_commission', 'paid_commission']}
+
+    def test_counters_follow_checkout_payout_and_delete(self):
+        from .popularity import rebuild_design_stats
+        order = self._buy(self.lion, 2)
+        self._buy(self.lion, 1)
+        self.assertEqual(self._counters(self.lion), {
+            'use_count': 2, 'quantity_used': 3, 'pending_commission': Decimal('147.00'), 'paid_commission': Decimal('0.00'),
+        })
+
+        order.status = 'delivered'
+        order.save()
+        self.assertEqual(self._counters(self.lion)['paid_commission'], Decimal('98.00'))
+        self.assertEqual(self._counters(self.lion)['pending_commission'], Decimal('49.00'))
+
+        # A stale instance saved after the sales must not roll the counters back
+        stale = DesignLibraryItem.objects.get(pk=self.tiger.pk)
+        self._buy(self.tiger, 1)
+        stale.name = 'Tiger II'
+        stale.save()
+        self.assertEqual(self._counters(self.tiger)['use_count'], 1)
+
+        DesignCommission.objects.filter(design=self.tiger).delete()
+        incremental = self._counters(self.lion), self._counters(self.tiger)
+        rebuild_design_stats()
+        self.assertEqual((self._counters(self.lion), self._counters(self.tiger)), incremental)
+        self.assertEqual(incremental[1]['use_count'], 0)
+
+    def _balance(self):
+        return UserProfile.objects.get(user=self.designer).balance
+
+    def test_commissions_are_paid_once_on_the_transition_to_delivered(self):
+        from .models import CommissionPayout
+        order = self._buy(self.lion, 2)
+        order.status = 'processing'
+        order.save()
+        self.assertFalse(CommissionPayout.objects.exists())
+
+        # Credited with F() on top of whatever the stored balance is
+        UserProfile.objects.update_or_create(user=self.designer, defaults={'balance': Decimal('10')})
+        order.status = 'delivered'
+        with CaptureQueriesContext(connection) as ctx:
+            order.save()
+        self.assertEqual(self._balance(), Decimal('108.00'))
+        credit = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "products_userprofile"')]
+        self.assertEqual(len(credit), 1)
+        self.assertIn('"products_userprofile"."balance" +', credit[0])
+
+        order.save()
+        order.status = 'processing'
+        order.save()
+        order.status = 'delivered'
+        order.save()
+        self.assertEqual(self._balance(), Decimal('108.00'))
+        self.assertEqual(DesignCommission.objects.get(order=order).status, 'completed')
+
+    def test_commission_added_after_the_payout_is_credited(self):
+        from .models import CommissionPayout
+        from .payouts import pay_order_commissions
+        order = self._buy(self.lion, 1)
+        order.status = 'delivered'
+        order.save()
+        self.assertEqual(self._balance(), Decimal('49.00'))
+
+        first = DesignCommission.objects.get(order=order)
+        DesignCommission.objects.create(
+            design=self.tiger, owner=self.designer, order=order, order_item=first.order_item,
+            quantity=1, amount=Decimal('30'),
+        )
+        self.assertEqual(pay_order_commissions(order), 1)
+        self.assertEqual(pay_order_commissions(order), 0)
+        self.assertEqual(self._balance(), Decimal('79.00'))
+        payout = CommissionPayout.objects.get(order=order)
+        self.assertEqual((payout.amount, payout.commission_count), (Decimal('79.00'), 2))
+
+    def test_trending_and_most_used_orderings(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .popularity import rebuild_design_stats
+        order = self._buy(self.lion, 1)
+        for _ in range(2):
+            self._buy(self.lion, 1)
+        self._buy(self.tiger, 1)
+        # Lion's uses were long ago; Tiger's single use is recent
+        DesignCommission.objects.filter(design=self.lion).update(created_at=timezone.now() - timedelta(days=60))
+        rebuild_design_stats()
+
+        def names(ordering, path='/api/design-library/'):
+            data = self.client.get(path, {'ordering': ordering, 'page_size': 10}).data
+            return [row['name'] for row in data['results']]
+
+        self.assertEqual(names('most_used'), ['Lion', 'Tiger'])
+        self.assertEqual(names('trending'), ['Tiger', 'Lion'])
+        self.assertEqual(names('most_used', '/api/design-library/featured/'), ['Lion', 'Tiger'])
+        self.assertEqual(self.client.get('/api/design-library/', {'ordering': 'bogus'}).status_code, 400)
+        self.assertNotIn('paid_commission', self.client.get('/api/design-library/').data['results'][0])
+        self.assertEqual(order.design_commissions.count(), 1)
+
+    def test_short_half_life_does_not_overflow_checkout(self):
+        from datetime import datetime, timezone as dt_timezone
+        from django.utils import timezone
+        from .checks import check_trending_half_life
+        from .popularity import MAX_TRENDING_EXPONENT, trending_weight
+        with override_settings(DESIGN_TRENDING_HALF_LIFE_DAYS=0.5):
+            self.assertEqual(trending_weight(datetime(2030, 1, 1, tzinfo=dt_timezone.utc)), 2.0 ** MAX_TRENDING_EXPONENT)
+            self._buy(self.lion, 1)
+            self.assertEqual([warning.id for warning in check_trending_half_life(None)], ['products.W002'])
+            # Re-basing the epoch moves the cap out again
+            with override_settings(DESIGN_TRENDING_EPOCH=timezone.now().date().isoformat()):
+                self.assertEqual(check_trending_half_life(None), [])
+        self.lion.refresh_from_db()
+        self.assertGreater(self.lion.trending_score, 0)
+        self.assertEqual(check_trending_half_life(None), [])
+        with override_settings(DESIGN_TRENDING_HALF_LIFE_DAYS=0):
+            self.assertEqual([error.id for error in check_trending_half_life(None)], ['products.E002'])
+
+
+class DesignSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        designer = User.objects.create_user(username='designer')
+        for name, keywords, category in [
+            ('Sunset', 'beach', 'lions'),
+            ('Roaring Tiger', 'lion stripes', 'animals'),
+            ('Lioness', 'hunt', 'animals'),
+            ('Lion King', 'cat roar', 'animals'),
+        ]:
+            DesignLibraryItem.objects.create(
+                owner=designer, name=name, search_keywords=keywords, category=category, image='design-library/x.png',
+                approval_status=DesignLibraryItem.APPROVAL_APPROVED, is_active=True,
+            )
+
+    def _ranked(self, backend, query):
+        return list(backend.search(DesignLibraryItem.objects.all(), query).values_list('name', flat=True))
+
+    def test_simple_backend_ranks_name_over_keywords_over_category(self):
+        from .search import SimpleSearchBackend
+        backend = SimpleSearchBackend()
+        # A whole-word name hit beats a prefix one, and both beat keyword and category hits
+        self.assertEqual(self._ranked(backend, 'lion'), ['Lion King', 'Lioness', 'Roaring Tiger', 'Sunset'])
+        # Equal scores fall back to newest first
+        self.assertEqual(self._ranked(backend, 'Li'), ['Lion King', 'Lioness', 'Roaring Tiger', 'Sunset'])
+        # Every term must match somewhere; the scores per term add up
+        self.assertEqual(self._ranked(backend, 'lio roar'), ['Lion King', 'Roaring Tiger'])
+        self.assertEqual(self._ranked(backend, 'lion zebra'), [])
+        self.assertEqual(self._ranked(backend, ' -- '), list(DesignLibraryItem.objects.values_list('name', flat=True)))
+
+    @skipUnless(connection.vendor == 'postgresql', 'needs PostgreSQL full-text search')
+    def test_postgres_backend_ranks_name_over_keywords_over_category(self):
+        from .search import PostgresSearchBackend
+        backend = PostgresSearchBackend()
+        ranked = self._ranked(backend, 'lion')
+        self.assertEqual(set(ranked[:2]), {'Lion King', 'Lioness'})
+        self.assertEqual(ranked[2:], ['Roaring Tiger', 'Sunset'])
+        self.assertEqual(set(self._ranked(backend, 'lio roar')), {'Lion King', 'Roaring Tiger'})
+        self.assertEqual(self._ranked(backend, 'lion zebra'), [])
+
+    def test_search_endpoint_uses_the_rank(self):
+        response = self.client.get('/api/design-library/', {'search': 'lion', 'page_size': 2})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Lion King', 'Lioness'])
+        response = self.client.get('/api/design-library/', {'search': 'lion', 'cursor': response.data['next_cursor']})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Roaring Tiger', 'Sunset'])
+        self.assertFalse(response.data['has_more'])
+
+    def test_backend_follows_setting_then_database_vendor(self):
+        from types import SimpleNamespace
+        from unittest import mock
+        from .search import PostgresSearchBackend, SimpleSearchBackend, get_search_backend
+        with mock.patch('products.search.connection', SimpleNamespace(vendor='postgresql')):
+            self.assertIsInstance(get_search_backend(), PostgresSearchBackend)
+            with override_settings(DESIGN_SEARCH_BACKEND='products.search.SimpleSearchBackend'):
+                self.assertIsInstance(get_search_backend(), SimpleSearchBackend)
+        with mock.patch('products.search.connection', SimpleNamespace(vendor='sqlite')):
+            self.assertIsInstance(get_search_backend(), SimpleSearchBackend)
+
+
+class DesignLibraryPaginationTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        self.client = APIClient()
+        designer = User.objects.create_user(username='designer')
+        self.designs = [
+            DesignLibraryItem.objects.create(
+                owner=designer, name=f'Design {i}', image='design-library/x.png',
+                approval_status=DesignLibraryItem.APPROVAL_APPROVED, is_active=True,
+            )
+            for i in range(7)
+        ]
+        # Pairs share every ordering value but the id, so ties must be broken on -id
+        created_at = timezone.now()
+        for i, design in enumerate(self.designs):
+            DesignLibraryItem.objects.filter(pk=design.pk).update(
+                created_at=created_at - timedelta(hours=i // 2), trending_score=float(i % 3), use_count=i % 2,
+            )
+
+    def _walk(self, params, page_size=2):
+        ids, cursor = [], None
+        while True:
+            response = self.client.get('/api/design-library/', {**params, 'page_size': page_size, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertLessEqual(len(response.data['results']), page_size)
+            ids += [row['id'] for row in response.data['results']]
+            if not response.data['has_more']:
+                self.assertIsNone(response.data['next_cursor'])
+                return ids
+            cursor = response.data['next_cursor']
+
+    def test_cursor_walk_covers_every_ordering_once(self):
+        orderings = {
+            'newest': ('-created_at', '-id'),
+            'trending': ('-trending_score', '-id'),
+            'most_used': ('-use_count', '-created_at', '-id'),
+        }
+        for name, ordering in orderings.items():
+            expected = list(DesignLibraryItem.objects.order_by(*ordering).values_list('id', flat=True))
+            self.assertEqual(self._walk({'ordering': name}), expected, name)
+            self.assertEqual(self._walk({'ordering': name}, page_size=3), expected, name)
+        # Every design matches equally, so search results fall back to newest first
+        newest = list(DesignLibraryItem.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk({'search': 'design'}), newest)
+        self.assertEqual(self._walk({}), newest)
+
+    def test_ties_are_broken_on_descending_id(self):
+        trending = self._walk({'ordering': 'trending'}, page_size=1)
+        tied = [pk for pk in trending if DesignLibraryItem.objects.get(pk=pk).trending_score == 2.0]
+        self.assertEqual(tied, sorted(tied, reverse=True))
+        self.assertEqual(len(tied), 2)
+
+    def test_invalid_or_tampered_cursor_is_rejected(self):
+        import base64
+        cursor = self.client.get('/api/design-library/', {'page_size': 2}).data['next_cursor']
+
+        def encode(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+        for bad in [
+            'not-a-cursor', cursor[:-4], encode({'created_at': 1}), encode(['2025-01-01T00:00:00+00:00']),
+            encode(['yesterday', 3]), encode(['2025-01-01T00:00:00+00:00', 'three']),
+        ]:
+            response = self.client.get('/api/design-library/', {'page_size': 2, 'cursor': bad})
+            self.assertEqual(response.status_code, 400, bad)
+            self.assertIn('cursor', response.data)
+        # A newest-first cursor does not fit the three-column most_used ordering
+        response = self.client.get('/api/design-library/', {'ordering': 'most_used', 'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_page_size_is_capped(self):
+        designer = self.designs[0].owner
+        DesignLibraryItem.objects.bulk_create([
+            DesignLibraryItem(
+                owner=designer, name=f'Extra {i}', image='design-library/x.png',
+                approval_status=DesignLibraryItem.APPROVAL_APPROVED, is_active=True,
+            )
+            for i in range(50)
+        ])
+        response = self.client.get('/api/design-library/', {'page_size': 500})
+        self.assertEqual((len(response.data['results']), response.data['page_size']), (50, 50))
+        self.assertTrue(response.data['has_more'])
+        self.assertEqual(len(self.client.get('/api/design-library/').data['results']), 20)
+        self.assertEqual(len(self.client.get('/api/design-library/', {'page_size': 0}).data['results']), 1)
+        self.assertEqual(self.client.get('/api/design-library/', {'page_size': 'all'}).status_code, 400)
+
+
+class HotQueryIndexTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        from .benchmark import seed_dataset
+        from .explain import explain_hot_queries
+        seed_dataset(stores=2, products_per_store=3, mockup_types=1, designs=5, orders=4)
+        results = explain_hot_queries()
+        self.assertTrue(results)
+        for name, plan, scanned in results:
+            self.assertEqual(scanned, [], f"{name} scans {scanned}:\n{plan}")
+
+    def test_seq_scan_detection(self):
+        from .explain import seq_scans
+        plan = 'Limit\n  ->  Index Scan using product_storefront_recent on products_product\n  ->  Seq Scan on products_store'
+        self.assertEqual(seq_scans(plan, 'postgresql'), ['products_store'])
+        plan = 'SCAN products_product USING INDEX product_storefront_recent\nSCAN products_store\nSEARCH auth_user USING INTEGER PRIMARY KEY (rowid=?)'
+        self.assertEqual(seq_scans(plan, 'sqlite'), ['products_store'])
+
+
+class AsyncReadPathTests(TestCase):
+    def setUp(self):
+        from .benchmark import seed_dataset
+        seed_dataset(stores=2, products_per_store=4, mockup_types=2, designs=2, orders=2)
+        cache.clear()
+        self.client = APIClient()
+
+    def assertSameAsSync(self, sync_path, async_path):
+        sync = self.client.get(sync_path)
+        cache.clear()
+        response = self.client.get(async_path)
+        self.assertEqual(response.status_code, 200, async_path)
+        self.assertEqual(response.json(), sync.json(), async_path)
+        return response.json()
+
+    def test_async_endpoints_match_sync_ones(self):
+        self.assertSameAsSync('/api/feed', '/api/async/feed')
+        self.assertSameAsSync('/api/feed?q=store+1', '/api/async/feed?q=store+1')
+        self.assertSameAsSync('/api/categories/active', '/api/async/categories/active')
+        self.assertSameAsSync('/api/mockup-types/catalog/', '/api/async/mockup-types/catalog')
+        self.assertSameAsSync('/api/mockup-variants/colors/', '/api/async/mockup-variants/colors')
+
+        page = self.assertSameAsSync('/api/feed?limit=3', '/api/async/feed?limit=3')
+        self.assertTrue(page['has_more'])
+        cursor = page['next_cursor']
+        self.assertSameAsSync(f'/api/feed?limit=3&cursor={cursor}', f'/api/async/feed?limit=3&cursor={cursor}')
+        self.assertEqual(self.client.get('/api/async/feed?cursor=bogus').status_code, 400)
+
+    def test_async_catalog_is_cached_and_conditional(self):
+        first = self.client.get('/api/async/mockup-types/catalog')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/async/mockup-types/catalog', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        variant = MockupVariant.objects.first()
+        variant.color_name = 'Ultraviolet'
+        variant.save()
+        response = self.client.get('/api/async/mockup-types/catalog', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Ultraviolet', [color['color_name'] for color in response.json()['colors']])
+
+    async def test_served_through_asgi_handler(self):
+        response = await self.async_client.get('/api/async/feed?limit=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        # The profiling middleware runs natively async and still sees the async ORM's queries
+        self.assertRegex(response['Server-Timing'], r'db;desc="[1-9]\d* queries')
+
+
+@override_settings(STREAM_CHUNK_SIZE=3)
+class StreamingListTests(TestCase):
+    def setUp(self):
+        from .benchmark import seed_dataset
+        seed_dataset(stores=2, products_per_store=4, mockup_types=1, designs=7, orders=1)
+        self.designer = DesignLibraryItem.objects.values_list('owner', flat=True).first()
+        cache.clear()
+        self.client = APIClient()
+
+    def assertStreamsSameList(self, path, buffered_path=None):
+        expected = self.client.get(buffered_path or path)
+        response = self.client.get(path, {'stream': '1'})
+        self.assertTrue(response.streaming, path)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(body), expected.json(), path)
+        self.assertGreater(len(json.loads(body)), 3, path)
+
+    def test_streamed_lists_match_buffered_ones(self):
+        # The buffered feed and product list are always paged; the published list is the same queryset unpaged
+        self.assertStreamsSameList('/api/feed', '/api/seller-products/published/')
+        self.assertStreamsSameList('/api/products/', '/api/seller-products/published/')
+        self.assertStreamsSameList('/api/seller-products/published/')
+        self.client.force_authenticate(User.objects.get(pk=self.designer))
+        self.assertStreamsSameList('/api/design-library/my/')
+
+    def test_paginated_requests_and_empty_lists(self):
+        self.assertFalse(self.client.get('/api/feed', {'stream': '1', 'limit': 2}).streaming)
+        Product.objects.all().delete()
+        response = self.client.get('/api/products/', {'stream': '1'})
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+
+class FastJSONTests(TestCase):
+    def test_renders_same_bytes_as_drf(self):
+        import uuid
+        from collections import OrderedDict
+        from datetime import date, datetime, timedelta, timezone as dt_timezone
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import FastJSONRenderer, json_backend
+        data = OrderedDict([
+            ('price', Decimal('12.50')),
+            ('utc', datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=dt_timezone.utc)),
+            ('dhaka', datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=6)))),
+            ('naive', datetime(2026, 1, 2, 3, 4, 5)),
+            ('day', date(2026, 1, 2)),
+            ('id', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+            ('label', gettext_lazy('Required')),
+            ('text', 'লিরিক্স \u2028 "quoted"'),
+            ('by_id', {1: [1.5, None, True]}),
+        ])
+        self.assertEqual(json_backend(), 'orjson')
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        with override_settings(JSON_ENCODER='json'):
+            self.assertEqual(json_backend(), 'json')
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_api_uses_fast_renderer_and_parser(self):
+        from io import BytesIO
+        from rest_framework.exceptions import ParseError
+        from rest_framework.settings import api_settings
+        from .renderers import FastJSONParser, FastJSONRenderer
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], FastJSONRenderer)
+        self.assertIs(api_settings.DEFAULT_PARSER_CLASSES[0], FastJSONParser)
+        self.assertEqual(FastJSONParser().parse(BytesIO('{"name": "টি-শার্ট", "qty": 2}'.encode())), {'name': 'টি-শার্ট', 'qty': 2})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"name": '))
+        response = APIClient().post('/api/auth/login', '{"username": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_json_benchmark_on_product_output(self):
+        from .benchmark import run_json_benchmark, seed_dataset
+        from .serializers import ProductSerializer
+        seed_dataset(stores=1, products_per_store=5, mockup_types=1, designs=1, orders=1)
+        data = ProductSerializer(Product.objects.storefront().with_display_fields(), many=True).data
+        results = run_json_benchmark(data, iterations=2)
+        self.assertTrue(results['identical'])
+        self.assertGreater(results['fast']['render_ms']['p50'], 0)
+
+
+class ProjectionTests(TestCase):
+    def setUp(self):
+        from .benchmark import seed_dataset
+        seed_dataset(stores=2, products_per_store=4, mockup_types=2, designs=3, orders=1)
+        product = Product.objects.first()
+        product.discount_price = product.price - 50
+        product.image = 'products/summer tee.png'
+        product.image_renditions = {'image': {
+            'source': 'products/summer tee.png',
+            'webp': {'320': 'products/summer tee.320w.webp'}, 'jpeg': {'320': 'products/summer tee.320w.jpg'},
+        }}
+        product.save()
+        Product.objects.create(name='No variant', price=Decimal('410'), stock=2, is_published=True, kind='design')
+        cache.clear()
+        self.client = APIClient()
+
+    def test_projections_match_serializers(self):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from .mockup_serializers import MockupVariantSerializer
+        from .projections import (
+            DESIGN_LIBRARY_ITEM_PROJECTION, MOCKUP_VARIANT_PROJECTION, PRODUCT_LIST_PROJECTION, PRODUCT_PROJECTION,
+        )
+        from .serializers import DesignLibraryItemSerializer, ProductListSerializer, ProductSerializer
+        context = {'request': Request(APIRequestFactory().get('/api/feed'))}
+        products = Product.objects.storefront().with_display_fields()
+        cases = [
+            (PRODUCT_PROJECTION, ProductSerializer, products),
+            (PRODUCT_LIST_PROJECTION, ProductListSerializer, products),
+            (MOCKUP_VARIANT_PROJECTION, MockupVariantSerializer, MockupVariant.objects.select_related('mockup_type')),
+            (DESIGN_LIBRARY_ITEM_PROJECTION, DesignLibraryItemSerializer, DesignLibraryItem.objects.all()),
+        ]
+        for projection, serializer_class, queryset in cases:
+            expected = serializer_class(queryset, many=True, context=context).data
+            rendered = projection.render(projection.values(queryset), context)
+            self.assertEqual(json.dumps(rendered), json.dumps(expected), serializer_class.__name__)
+            self.assertGreater(len(rendered), 1, serializer_class.__name__)
+
+    def test_paginated_endpoints_walk_every_row(self):
+        # Rows here are created microseconds apart, so cursors must keep full datetime precision
+        products = Product.objects.storefront().count()
+        designs = DesignLibraryItem.objects.filter(is_active=True, approval_status=DesignLibraryItem.APPROVAL_APPROVED).count()
+        walks = [('/api/feed', 'limit', products), ('/api/products/', 'limit', products), ('/api/design-library/', 'page_size', designs)]
+        for path, key, total in walks:
+            seen, cursor = [], None
+            while True:
+                params = {key: 2, **({'cursor': cursor} if cursor else {})}
+                page = self.client.get(path, params).json()
+                seen += [row['id'] for row in page['results']]
+                if not page['has_more']:
+                    break
+                cursor = page['next_cursor']
+            self.assertEqual(len(seen), len(set(seen)), path)
+            self.assertEqual(len(seen), total, path)
@@ -14,6 +14,7 @@ router.register(r'design-library', views.DesignLibraryItemViewSet, basename='des
 router.register(r'design-categories', views.DesignCategoryViewSet, basename='design-category')
 router.register(r'design-commissions', views.DesignCommissionViewSet, basename='design-commissions')
 router.register(r'orders', views.OrderViewSet, basename='order')
+router.register(r'image-jobs', views.ImageJobViewSet, basename='image-jobs')
 router.register(r'wholesale-inquiries', views.WholesaleInquiryViewSet, basename='wholesale-inquiry')
 router.register(r'mockup-types', mockup_views.MockupTypeViewSet, basename='mockup-types')
 router.register(r'mockup-variants', mockup_views.MockupVariantViewSet, basename='mockup-variants')
@@ -24,6 +25,10 @@ urlpatterns = [
     path('auth/me', views.get_current_user, name='current-user'),
     path('seller/become', views.become_seller, name='become-seller'),
     path('feed', views.feed, name='feed'),
+    path('bootstrap', views.bootstrap, name='bootstrap'),
+    path('stock-reservations', views.create_stock_reservation, name='stock-reservations'),
+    path('stock-reservations/<uuid:token>', views.release_stock_reservation, name='stock-reservation-release'),
+    path('request-stats', views.request_stats, name='request-stats'),
     path('categories/active', views.get_categories, name='active-categories'),
     path('', include(router.urls)),
 ]
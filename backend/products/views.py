@@ -1,22 +1,42 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser, BasePermission, SAFE_METHODS
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.throttling import UserRateThrottle
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db.models import Count, DecimalField, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
 from decimal import Decimal
 import json
-from .models import Category, SellerProfile, Store, Product, Order, OrderItem, DesignLibraryItem, DesignCommission, DesignCategory, WholesaleInquiry
+import uuid
+from .models import Category, SellerProfile, Store, Product, Order, OrderItem, DesignLibraryItem, DesignCommission, DesignCategory, ImageJob, WholesaleInquiry
 from .mockup_models import MockupVariant
 from .serializers import (
     UserSerializer, UserCreateSerializer, SellerProfileSerializer, StoreSerializer,
-    CategorySerializer, ProductSerializer, OrderSerializer, DesignLibraryItemSerializer, DesignCommissionSerializer, DesignCategorySerializer, WholesaleInquirySerializer
+    CategorySerializer, ProductSerializer, OrderSerializer, DesignLibraryItemSerializer, DesignCommissionSerializer, DesignCategorySerializer, WholesaleInquirySerializer, ImageJobSerializer
 )
+from .pagination import (
+    FeedPagination, StorefrontPagination, DesignLibraryPagination, CommissionPagination, SellerOrdersPagination,
+)
+from .projections import DESIGN_LIBRARY_ITEM_PROJECTION, PRODUCT_LIST_PROJECTION
+from .availability import get_availability_map, overlay_available_stock
+from .bootstrap import bootstrap_etag, get_bootstrap_payload
+from .cache import FEED_PAGE_PARAMS, get_or_build_feed_page
+from .conditional import ConditionalGetMixin
+from .checkout import cart_demand, load_variants, parse_order_lines, place_order
+from .instrumentation import request_stats as profiling_stats, reset_stats
+from .inventory import release_reservation, reserve_stock
+from .jobs import active_job_for
+from .search import get_search_backend
+from .sales import seller_orders, seller_stats, serialize_seller_order
+from .streaming import StreamingListMixin, stream_json_list, wants_stream
 
 
 class IsStoreOwnerOrReadOnly(BasePermission):
@@ -26,6 +46,31 @@ class IsStoreOwnerOrReadOnly(BasePermission):
         return getattr(obj, 'owner_id', None) == request.user.id
 
 
+class ImageJobResponseMixin:
+    """
+    Adds `image_job` ({id, status} or null) to create/update responses so the
+    client can poll /api/image-jobs/<id>/ until its uploads are processed.
+    Guests get null: jobs without an owner are only visible to staff.
+    """
+
+    def create(self, request, *args, **kwargs):
+        return self._attach_image_job(super().create(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        return self._attach_image_job(super().update(request, *args, **kwargs))
+
+    def _attach_image_job(self, response):
+        object_id = response.data.get('id') if isinstance(response.data, dict) else None
+        if not self.request.user.is_authenticated:
+            object_id = None
+        job = active_job_for(self.get_serializer_class().Meta.model, object_id) if object_id else None
+        if job and not job.requested_by_id:
+            job.requested_by = self.request.user
+            job.save(update_fields=['requested_by', 'updated_at'])
+        response.data['image_job'] = {'id': job.id, 'status': job.status} if job else None
+        return response
+
+
 class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
@@ -150,18 +195,56 @@ def become_seller(request):
     return Response(SellerProfileSerializer(profile).data)
 
 
+def filter_storefront(qs, params):
+    """Narrow storefront products by the `q` (search) and `on_sale` query parameters"""
+    query = (params.get('q') or '').strip()
+    if query:
+        qs = qs.matching(query)
+    if params.get('on_sale', '').lower() in ('1', 'true', 'yes'):
+        qs = qs.filter(discount_price__isnull=False)
+    return qs
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def feed(request):
-    qs = Product.objects.filter(is_active=True, is_published=True, kind='design').select_related('store', 'category', 'mockup_variant', 'mockup_variant__mockup_type')
-    data = ProductSerializer(qs, many=True, context={'request': request}).data
-    return Response(data)
+    qs = filter_storefront(Product.objects.storefront().with_display_fields(), request.query_params)
+    # Always paged; the whole list is only sent streamed, when asked for without cursor/limit
+    paginator = FeedPagination(paginate_by_default=True)
+    if wants_stream(request) and not FeedPagination().is_requested(request):
+        return stream_json_list(qs, ProductSerializer, {'request': request})
+
+    def build():
+        rows = PRODUCT_LIST_PROJECTION.values(qs, extra=paginator.ordering)
+        page = paginator.paginate_queryset(rows, request)
+        return paginator.get_paginated_data(PRODUCT_LIST_PROJECTION.render(page, {'request': request}))
+
+    return Response(overlay_available_stock(get_or_build_feed_page(request, build), get_availability_map()))
+
+
+def _bootstrap_etag(request, *args, **kwargs):
+    return bootstrap_etag(request)
+
+
+@condition(etag_func=_bootstrap_etag)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def bootstrap(request):
+    """
+    First-paint payload: site info, meta tags, contact info, banners, active
+    categories and the first feed page (continue with /feed?cursor=...).
+    Nothing in it depends on the user, so JWT auth is skipped entirely.
+    """
+    return Response(get_bootstrap_payload(request))
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
+    conditional_related_models = (Product,)
+    cache_max_age = 300
     
     def get_queryset(self):
         from django.db.models import Count, Q
@@ -170,12 +253,15 @@ class CategoryViewSet(viewsets.ModelViewSet):
         ).filter(is_active=True)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, StreamingListMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    pagination_class = StorefrontPagination
+    conditional_related_models = (MockupVariant, Store, Category)
+    cache_max_age = 30
 
     def get_queryset(self):
-        qs = Product.objects.filter(is_active=True, is_published=True, kind='design').select_related('store', 'category', 'mockup_variant', 'mockup_variant__mockup_type')
+        qs = filter_storefront(Product.objects.storefront().with_display_fields(), self.request.query_params)
         store_slug = self.request.query_params.get('store')
         category_id = self.request.query_params.get('category')
         if store_slug:
@@ -184,6 +270,21 @@ class ProductViewSet(viewsets.ModelViewSet):
             qs = qs.filter(category_id=category_id)
         return qs
 
+    def list(self, request, *args, **kwargs):
+        # Always paged, like the feed; the whole list is only sent streamed, when asked for without cursor/limit
+        if wants_stream(request) and not FeedPagination().is_requested(request):
+            return self.stream_list(self.filter_queryset(self.get_queryset()))
+
+        def build():
+            queryset = self.filter_queryset(self.get_queryset())
+            context = self.get_serializer_context()
+            rows = PRODUCT_LIST_PROJECTION.values(queryset, extra=self.paginator.get_ordering(self))
+            page = self.paginate_queryset(rows)
+            return self.paginator.get_paginated_data(PRODUCT_LIST_PROJECTION.render(page, context))
+
+        page = get_or_build_feed_page(request, build, params=(*FEED_PAGE_PARAMS, 'store', 'category'))
+        return Response(overlay_available_stock(page, get_availability_map()))
+
     def create(self, request, *args, **kwargs):
         raise PermissionDenied('Public product creation is not allowed')
 
@@ -197,13 +298,13 @@ class ProductViewSet(viewsets.ModelViewSet):
         raise PermissionDenied('Public product delete is not allowed')
 
 
-class CustomProductViewSet(viewsets.ModelViewSet):
+class CustomProductViewSet(ImageJobResponseMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        return Product.objects.filter(created_by=self.request.user, kind='custom', is_active=True).select_related('store', 'category')
+        return Product.objects.filter(created_by=self.request.user, kind='custom', is_active=True).with_display_fields()
 
     def perform_create(self, serializer):
         design_data = self.request.data.get('design_data')
@@ -224,7 +325,7 @@ class CustomProductViewSet(viewsets.ModelViewSet):
         serializer.save(**payload)
 
 
-class GuestCustomProductViewSet(viewsets.ModelViewSet):
+class GuestCustomProductViewSet(ImageJobResponseMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
     parser_classes = [MultiPartParser, FormParser]
@@ -252,15 +353,17 @@ class GuestCustomProductViewSet(viewsets.ModelViewSet):
         serializer.save(**payload)
 
 
-class StoreViewSet(viewsets.ModelViewSet):
+# No ConditionalGetMixin: stores nest their owner (auth_user has no updated_at), so a
+# table-state validator would keep answering 304 after the owner's details change
+class StoreViewSet(ImageJobResponseMixin, viewsets.ModelViewSet):
     serializer_class = StoreSerializer
     lookup_field = 'slug'
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
         if self.action in ['update', 'partial_update', 'destroy', 'my']:
-            return Store.objects.filter(owner=self.request.user)
-        return Store.objects.filter(is_active=True)
+            return Store.objects.filter(owner=self.request.user).select_related('owner__profile')
+        return Store.objects.filter(is_active=True).select_related('owner__profile')
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'my']:
@@ -293,13 +396,13 @@ class WholesaleInquiryViewSet(viewsets.ModelViewSet):
         return [IsAdminUser()]
 
 
-class SellerProductViewSet(viewsets.ModelViewSet):
+class SellerProductViewSet(ImageJobResponseMixin, StreamingListMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
-        return Product.objects.filter(store__owner=self.request.user).select_related('store', 'category', 'mockup_variant', 'mockup_variant__mockup_type')
+        return Product.objects.filter(store__owner=self.request.user).with_display_fields()
 
     def perform_create(self, serializer):
         profile, _ = SellerProfile.objects.get_or_create(user=self.request.user)
@@ -355,7 +458,6 @@ class SellerProductViewSet(viewsets.ModelViewSet):
 
         save_kwargs['mockup_variant'] = variant
         save_kwargs['buy_price'] = variant.effective_price
-        save_kwargs['stock'] = int(variant.stock or 0)
 
         serializer.save(**save_kwargs)
 
@@ -372,26 +474,27 @@ class SellerProductViewSet(viewsets.ModelViewSet):
             if variant:
                 save_kwargs['mockup_variant'] = instance.mockup_variant
                 save_kwargs['buy_price'] = variant.effective_price
-                save_kwargs['stock'] = int(variant.stock or 0)
         serializer.save(**save_kwargs)
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def published(self, request):
-        qs = Product.objects.filter(is_active=True, is_published=True, kind='design').select_related('store', 'category', 'mockup_variant', 'mockup_variant__mockup_type')
+        qs = Product.objects.storefront().with_display_fields()
+        if wants_stream(request):
+            return self.stream_list(qs)
         return Response(ProductSerializer(qs, many=True, context={'request': request}).data)
 
 
-class DesignLibraryItemViewSet(viewsets.ModelViewSet):
+class DesignLibraryItemViewSet(ImageJobResponseMixin, StreamingListMixin, viewsets.ModelViewSet):
     serializer_class = DesignLibraryItemSerializer
     parser_classes = [MultiPartParser, FormParser]
     lookup_field = 'id'
-    pagination_class = None
+    pagination_class = DesignLibraryPagination
 
     def get_queryset(self):
         if self.action in ['update', 'partial_update', 'destroy', 'my']:
-            return DesignLibraryItem.objects.filter(owner=self.request.user).select_related('owner')
+            return DesignLibraryItem.objects.filter(owner=self.request.user).select_related('owner__profile')
         
-        qs = DesignLibraryItem.objects.filter(is_active=True, approval_status=DesignLibraryItem.APPROVAL_APPROVED).select_related('owner')
+        qs = DesignLibraryItem.objects.filter(is_active=True, approval_status=DesignLibraryItem.APPROVAL_APPROVED).select_related('owner__profile')
         
         # Add filtering by category and search
         category = self.request.query_params.get('category')
@@ -401,33 +504,40 @@ class DesignLibraryItemViewSet(viewsets.ModelViewSet):
             qs = qs.filter(category__icontains=category)
         
         if search:
-            qs = qs.filter(
-                models.Q(name__icontains=search) |
-                models.Q(search_keywords__icontains=search) |
-                models.Q(category__icontains=search)
-            )
+            qs = get_search_backend().search(qs, search)
         
         return qs
 
+    # ?ordering= choices; the counters behind trending/most_used are kept by products.popularity
+    orderings = {
+        'newest': ('-created_at', '-id'),
+        'trending': ('-trending_score', '-id'),
+        'most_used': ('-use_count', '-created_at', '-id'),
+    }
+
+    def get_keyset_ordering(self):
+        ordering = self.request.query_params.get('ordering')
+        if ordering:
+            if ordering not in self.orderings:
+                raise ValidationError({'ordering': f"Choose one of: {', '.join(self.orderings)}"})
+            return self.orderings[ordering]
+        if self.action == 'list' and self.request.query_params.get('search'):
+            return ('-search_rank', '-created_at', '-id')
+        return self.orderings['newest']
+
+    def _list_response(self, queryset, paginator):
+        context = {'request': self.request}
+        if not paginator.is_requested(self.request):
+            if wants_stream(self.request):
+                return self.stream_list(queryset)
+            rows = DESIGN_LIBRARY_ITEM_PROJECTION.values(queryset)
+            return Response(DESIGN_LIBRARY_ITEM_PROJECTION.render(rows, context))
+        rows = DESIGN_LIBRARY_ITEM_PROJECTION.values(queryset, extra=paginator.get_ordering(self))
+        page = paginator.paginate_queryset(rows, self.request, view=self)
+        return paginator.get_paginated_response(DESIGN_LIBRARY_ITEM_PROJECTION.render(page, context))
+
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        
-        # Manual pagination
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
-        
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        items = queryset[start:end]
-        serializer = self.get_serializer(items, many=True)
-        
-        return Response({
-            'results': serializer.data,
-            'page': page,
-            'page_size': page_size,
-            'has_more': len(items) == page_size
-        })
+        return self._list_response(self.get_queryset(), self.paginator)
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'my']:
@@ -455,14 +565,27 @@ class DesignLibraryItemViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my(self, request):
-        qs = DesignLibraryItem.objects.filter(owner=request.user).select_related('owner')
-        return Response(DesignLibraryItemSerializer(qs, many=True, context={'request': request}).data)
+        qs = DesignLibraryItem.objects.filter(owner=request.user).select_related('owner__profile')
+        return self._list_response(qs, DesignLibraryPagination(paginate_by_default=False))
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def suggest(self, request):
+        """Type-ahead: best matching approved design names for a partial query"""
+        q = (request.query_params.get('q') or '').strip()
+        if not q:
+            return Response([])
+        qs = DesignLibraryItem.objects.filter(is_active=True, approval_status=DesignLibraryItem.APPROVAL_APPROVED)
+        matches = get_search_backend().search(qs, q).values('id', 'name', 'category')[:8]
+        return Response(list(matches))
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def featured(self, request):
         """Get featured logos for homepage"""
-        qs = DesignLibraryItem.objects.filter(is_active=True, is_featured=True).select_related('owner')[:8]
-        return Response(DesignLibraryItemSerializer(qs, many=True, context={'request': request}).data)
+        qs = DesignLibraryItem.objects.filter(is_active=True, is_featured=True).select_related('owner__profile')
+        paginator = DesignLibraryPagination(paginate_by_default=False)
+        if not paginator.is_requested(request):
+            qs = qs.order_by(*self.get_keyset_ordering())[:8]
+        return self._list_response(qs, paginator)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def approve(self, request, id=None):
@@ -484,9 +607,10 @@ class DesignLibraryItemViewSet(viewsets.ModelViewSet):
         return Response({'status': 'rejected', 'id': item.id, 'name': item.name, 'reason': reason})
 
 
-class DesignCategoryViewSet(viewsets.ModelViewSet):
+class DesignCategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = DesignCategorySerializer
     permission_classes = [AllowAny]
+    cache_max_age = 300
     
     def get_queryset(self):
         return DesignCategory.objects.filter(is_active=True)
@@ -495,13 +619,64 @@ class DesignCategoryViewSet(viewsets.ModelViewSet):
 class DesignCommissionViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = DesignCommissionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CommissionPagination
 
     def get_queryset(self):
-        return (
-            DesignCommission.objects
-            .filter(owner=self.request.user)
-            .select_related('design', 'owner', 'used_by', 'order', 'order_item')
+        qs = DesignCommission.objects.filter(owner=self.request.user).select_related('design', 'used_by', 'order')
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            qs = qs.filter(status=status_filter)
+        return qs
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Pending/completed totals and per-design usage and earnings"""
+        qs = DesignCommission.objects.filter(owner=request.user)
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+        pending, completed = Q(status='pending'), Q(status='completed')
+        totals = qs.aggregate(
+            pending_count=Count('id', filter=pending),
+            pending_amount=Coalesce(Sum('amount', filter=pending), zero),
+            completed_count=Count('id', filter=completed),
+            completed_amount=Coalesce(Sum('amount', filter=completed), zero),
+        )
+        # Per-design figures come from the counters on each design (products.popularity)
+        designs = (
+            DesignLibraryItem.objects.filter(owner=request.user, use_count__gt=0)
+            .order_by('-use_count', 'id')
+            .values('id', 'name', 'use_count', 'quantity_used', 'pending_commission', 'paid_commission')
         )
+        return Response({
+            'pending': {'count': totals['pending_count'], 'amount': totals['pending_amount']},
+            'completed': {'count': totals['completed_count'], 'amount': totals['completed_amount']},
+            'designs': [
+                {
+                    'design_id': row['id'],
+                    'design_name': row['name'],
+                    'commissions': row['use_count'],
+                    'uses': row['quantity_used'],
+                    'pending_amount': row['pending_commission'],
+                    'completed_amount': row['paid_commission'],
+                }
+                for row in designs
+            ],
+        })
+
+
+class ImageJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Processing state of uploaded images. Users see their own jobs; jobs
+    without an owner (guest uploads) are only visible to staff, since job
+    ids are sequential and would otherwise be enumerable.
+    """
+    serializer_class = ImageJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_staff:
+            return ImageJob.objects.all()
+        return ImageJob.objects.filter(requested_by=user)
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -516,7 +691,12 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Order.objects.none()
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related('user')
+            .prefetch_related('items__product')
+            .order_by('-created_at')
+        )
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def seller(self, request):
@@ -529,6 +709,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({
                 'store_id': None,
                 'orders': [],
+                'next_cursor': None,
+                'has_more': False,
                 'stats': {
                     'orders_count': 0,
                     'items_sold': 0,
@@ -537,82 +719,39 @@ class OrderViewSet(viewsets.ModelViewSet):
                 },
             })
 
-        qs = (
-            Order.objects
-            .filter(items__product__store=store)
-            .distinct()
-            .prefetch_related('items__product', 'user')
-        )
+        date_from = self._parse_date_param(request, 'date_from')
+        date_to = self._parse_date_param(request, 'date_to')
 
-        orders = []
-        total_revenue = Decimal('0')
-        total_profit = Decimal('0')
-        items_sold = 0
-
-        for order in qs:
-            relevant_items = [
-                oi for oi in order.items.all()
-                if oi.product and oi.product.store_id == store.id
-            ]
-
-            seller_total = Decimal('0')
-            seller_profit = Decimal('0')
-
-            items_payload = []
-            for oi in relevant_items:
-                try:
-                    line_total = Decimal(str(oi.price)) * Decimal(str(oi.quantity))
-                except Exception:
-                    line_total = Decimal('0')
-
-                try:
-                    line_profit = (Decimal(str(oi.price)) - Decimal(str(oi.buy_price))) * Decimal(str(oi.quantity))
-                except Exception:
-                    line_profit = Decimal('0')
-
-                seller_total += line_total
-                seller_profit += line_profit
-                items_sold += int(oi.quantity or 0)
-
-                items_payload.append({
-                    'id': oi.id,
-                    'product_id': oi.product_id,
-                    'product_name': oi.product.name,
-                    'quantity': oi.quantity,
-                    'buy_price': str(oi.buy_price),
-                    'price': str(oi.price),
-                    'line_total': str(line_total),
-                    'line_profit': str(line_profit),
-                })
-
-            total_revenue += seller_total
-            total_profit += seller_profit
-
-            orders.append({
-                'id': order.id,
-                'created_at': order.created_at,
-                'status': order.status,
-                'payment_method': order.payment_method,
-                'customer_name': order.customer_name,
-                'customer_phone': order.customer_phone,
-                'shipping_address': order.shipping_address,
-                'buyer_email': getattr(order.user, 'email', ''),
-                'items': items_payload,
-                'seller_total': str(seller_total),
-                'seller_profit': str(seller_profit),
-            })
+        qs = seller_orders(store, date_from, date_to).prefetch_related(
+            Prefetch(
+                'items',
+                queryset=OrderItem.objects.filter(product__store=store).select_related('product'),
+                to_attr='seller_items',
+            )
+        )
+        # Plain requests keep getting every order, like the dashboard and order pages expect
+        paginator = SellerOrdersPagination()
+        page = paginator.paginate_queryset(qs, request)
+        if page is None:
+            page, paginator.next_cursor, paginator.has_more = qs, None, False
 
         return Response({
             'store_id': store.id,
-            'orders': orders,
-            'stats': {
-                'orders_count': len(orders),
-                'items_sold': items_sold,
-                'seller_revenue': str(total_revenue),
-                'seller_profit': str(total_profit),
-            },
+            'orders': [serialize_seller_order(order) for order in page],
+            'next_cursor': paginator.next_cursor,
+            'has_more': paginator.has_more,
+            'stats': seller_stats(store, date_from, date_to),
         })
 
+    def _parse_date_param(self, request, name):
+        raw = request.query_params.get(name)
+        if not raw:
+            return None
+        value = parse_date(raw)
+        if value is None:
+            raise ValidationError({name: 'Expected YYYY-MM-DD'})
+        return value
+
     def create(self, request, *args, **kwargs):
         items = request.data.get('items') or []
         shipping_address = request.data.get('shipping_address') or request.data.get('shippingAddress')
@@ -625,140 +764,72 @@ class OrderViewSet(viewsets.ModelViewSet):
         if not isinstance(items, list) or len(items) == 0:
             return Response({'detail': 'Order items are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                total_amount=0,
-                payment_method='cod',
-                shipping_address=shipping_address,
-                customer_name=customer_name,
-                customer_phone=customer_phone,
-            )
-
-            total = Decimal('0')
-            for item in items:
-                product_id = item.get('product_id') or item.get('productId') or item.get('product')
-                quantity = item.get('quantity') or 1
-                try:
-                    quantity = int(quantity)
-                except Exception:
-                    quantity = 1
-                if quantity < 1:
-                    raise ValidationError('Quantity must be at least 1')
-                if not product_id:
-                    raise ValidationError('product_id is required')
-
-                product = Product.objects.filter(pk=product_id, is_active=True).first()
-                if not product:
-                    raise ValidationError('Invalid product')
-
-                if product.kind == 'design':
-                    if not product.is_published:
-                        raise ValidationError('Invalid product')
-                elif product.kind == 'custom':
-                    if request.user.is_authenticated and product.created_by_id != request.user.id:
-                        raise ValidationError('Invalid product')
-                    elif not request.user.is_authenticated:
-                        # For guest users, allow ordering any custom product since they can't own products
-                        pass
-                else:
-                    raise ValidationError('Invalid product')
-
-                price = product.effective_price
-
-                variant = None
-                if getattr(product, 'mockup_variant_id', None):
-                    variant = (
-                        MockupVariant.objects
-                        .select_for_update()
-                        .filter(pk=product.mockup_variant_id, is_active=True)
-                        .select_related('mockup_type')
-                        .first()
-                    )
-                    if not variant:
-                        raise ValidationError('Invalid product')
-                    if int(variant.stock or 0) < int(quantity):
-                        raise ValidationError('Out of stock')
-                    variant.stock = int(variant.stock or 0) - int(quantity)
-                    variant.save(update_fields=['stock'])
-
-                buy_price = variant.effective_price if variant else product.buy_price
-                order_item = OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=quantity,
-                    buy_price=buy_price,
-                    price=price,
-                )
-
-                if product.kind == 'custom':
-                    design_ids = set()
-                    design_data = product.design_data or {}
-                    if isinstance(design_data, str) and design_data:
-                        try:
-                            design_data = json.loads(design_data)
-                        except Exception:
-                            design_data = {}
-
-                    legacy_id = design_data.get('library_design_id')
-                    if legacy_id:
-                        try:
-                            design_ids.add(int(legacy_id))
-                        except Exception:
-                            pass
-
-                    sides = design_data.get('sides') or {}
-                    for side_key in ['front', 'back']:
-                        side = sides.get(side_key) or {}
-                        side_id = side.get('library_design_id') or side.get('design_library_item_id')
-                        if side_id:
-                            try:
-                                design_ids.add(int(side_id))
-                            except Exception:
-                                pass
-
-                    for design_id in design_ids:
-                        design = DesignLibraryItem.objects.filter(pk=design_id, is_active=True).select_related('owner').first()
-                        if not design:
-                            continue
-                        # Skip commission if guest user or if user owns the design
-                        if request.user.is_authenticated and design.owner_id == request.user.id:
-                            continue
-
-                        try:
-                            per_use = Decimal(str(design.commission_per_use))
-                        except Exception:
-                            per_use = Decimal('49')
-
-                        amount = per_use * Decimal(str(quantity))
-                        DesignCommission.objects.create(
-                            design=design,
-                            owner=design.owner,
-                            used_by=request.user if request.user.is_authenticated else None,
-                            order=order,
-                            order_item=order_item,
-                            quantity=quantity,
-                            amount=amount,
-                        )
-
-                try:
-                    total += Decimal(str(price)) * Decimal(str(quantity))
-                except Exception:
-                    pass
-
-            shipping_fee = Decimal('0')
-            if total > 0 and total <= Decimal('2000'):
-                shipping_fee = Decimal('100')
-
-            total = total + shipping_fee
-
-            order.total_amount = total
-            order.save()
+        reservation_token = request.data.get('reservation_token') or request.data.get('reservationToken')
+        if reservation_token:
+            try:
+                reservation_token = uuid.UUID(str(reservation_token))
+            except ValueError:
+                return Response({'detail': 'Invalid reservation token'}, status=status.HTTP_400_BAD_REQUEST)
+
+        order = place_order(
+            request.user,
+            items,
+            shipping_address=shipping_address,
+            customer_name=customer_name,
+            customer_phone=customer_phone,
+            reservation_token=reservation_token,
+        )
 
+        order = Order.objects.prefetch_related('items__product').get(pk=order.pk)
         data = OrderSerializer(order, context={'request': request}).data
         return Response(data, status=status.HTTP_201_CREATED)
 
 
+class StockReservationThrottle(UserRateThrottle):
+    scope = 'stock_reservations'
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([StockReservationThrottle])
+def create_stock_reservation(request):
+    """
+    Hold stock for the cart while the customer checks out; pass the token to
+    order creation. Signed-in customers only, rate limited and capped per
+    item and per user (see inventory.check_reservation_limits).
+    """
+    items = request.data.get('items') or []
+    if not isinstance(items, list) or len(items) == 0:
+        return Response({'detail': 'Order items are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    _, demand = cart_demand(request.user, parse_order_lines(items))
+    load_variants(demand)
+    token, expires_at = reserve_stock(demand, request.user)
+    return Response({
+        'token': str(token),
+        'expires_at': expires_at,
+        'items': [{'variant_id': variant_id, 'quantity': quantity} for variant_id, quantity in demand.items()],
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def release_stock_reservation(request, token):
+    """Give the customer's held stock back (cart abandoned or edited)"""
+    release_reservation(token, request.user)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def request_stats(request):
+    """Rolling per-view timings and query counts from profiled requests (DELETE clears the window)"""
+    if request.method == 'DELETE':
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(profiling_stats())
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_categories(request):
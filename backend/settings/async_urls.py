@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('promotional-banners', async_views.promotional_banners, name='async-promotional-banners'),
+    path('contact-info', async_views.contact_info, name='async-contact-info'),
+    path('site-info', async_views.site_info, name='async-site-info'),
+    path('meta-tags', async_views.meta_tags, name='async-meta-tags'),
+]
@@ -0,0 +1,58 @@
+"""
+Async versions of the site settings endpoints (see products/async_views.py).
+Same payloads and ETags as views.py, read through the async cache API.
+"""
+from functools import wraps
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework.settings import api_settings
+
+from .cache import aget_active_banners, aget_site_settings, asite_etag
+from .serializers import SiteSettingsSerializer
+from .views import meta_tags_data, site_info_data
+
+
+def json_response(data):
+    return HttpResponse(api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data), content_type='application/json')
+
+
+def etag_for(name):
+    """views.etag_for() with the validator read from the async cache"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            etag = quote_etag(await asite_etag(request, name))
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            response['ETag'] = etag
+            return response
+        return wrapped
+    return decorator
+
+
+@require_safe
+@etag_for('banners')
+async def promotional_banners(request):
+    return json_response(await aget_active_banners())
+
+
+@require_safe
+@etag_for('contact-info')
+async def contact_info(request):
+    settings = await aget_site_settings()
+    return json_response(SiteSettingsSerializer(settings, context={'request': request}).data)
+
+
+@require_safe
+@etag_for('site-info')
+async def site_info(request):
+    return json_response(site_info_data(request, await aget_site_settings()))
+
+
+@require_safe
+@etag_for('meta-tags')
+async def meta_tags(request):
+    return json_response(meta_tags_data(request, await aget_site_settings()))
@@ -0,0 +1,118 @@
+import hashlib
+
+from django.core.cache import cache
+
+SITE_CACHE_VERSION_KEY = 'site:version'
+SITE_CACHE_TIMEOUT = 60 * 60
+
+# Per-process copies, keyed by name -> (version, value). The shared cache only
+# has to answer "which version is current?" for a hit to skip both the
+# database and deserializing the cached value.
+_local = {}
+
+
+def get_site_cache_version():
+    version = cache.get(SITE_CACHE_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(SITE_CACHE_VERSION_KEY, version, None)
+    return version
+
+
+async def aget_site_cache_version():
+    version = await cache.aget(SITE_CACHE_VERSION_KEY)
+    if version is None:
+        version = 1
+        await cache.aadd(SITE_CACHE_VERSION_KEY, version, None)
+    return version
+
+
+def bump_site_cache_version():
+    """Invalidate cached site settings and banners in every process."""
+    _local.clear()
+    try:
+        cache.incr(SITE_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(SITE_CACHE_VERSION_KEY, 2, None)
+
+
+def get_or_build(name, build, version=None):
+    """Two-level lookup: process memory, then the shared cache, then `build()`."""
+    version = get_site_cache_version() if version is None else version
+    local = _local.get(name)
+    if local and local[0] == version:
+        return local[1]
+
+    key = f"site:v{version}:{name}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        if get_site_cache_version() != version:
+            # Changed while building (e.g. SiteSettings.load() created the row): don't pin it to an old version
+            return value
+        cache.set(key, value, SITE_CACHE_TIMEOUT)
+    _local[name] = (version, value)
+    return value
+
+
+async def aget_or_build(name, abuild, version=None):
+    """get_or_build() for async views; `abuild` is a coroutine function"""
+    version = await aget_site_cache_version() if version is None else version
+    local = _local.get(name)
+    if local and local[0] == version:
+        return local[1]
+
+    key = f"site:v{version}:{name}"
+    value = await cache.aget(key)
+    if value is None:
+        value = await abuild()
+        if await aget_site_cache_version() != version:
+            return value
+        await cache.aset(key, value, SITE_CACHE_TIMEOUT)
+    _local[name] = (version, value)
+    return value
+
+
+def get_site_settings():
+    from .models import SiteSettings
+    return get_or_build('settings', SiteSettings.load)
+
+
+def get_active_banners():
+    """Active banners, already serialized (they hold no request-dependent URLs)"""
+    from .models import PromotionalBanner
+    from .serializers import PromotionalBannerSerializer
+    return get_or_build(
+        'banners',
+        lambda: list(PromotionalBannerSerializer(PromotionalBanner.objects.filter(active=True), many=True).data),
+    )
+
+
+async def aget_site_settings():
+    from .models import SiteSettings
+    return await aget_or_build('settings', SiteSettings.aload)
+
+
+async def aget_active_banners():
+    from .models import PromotionalBanner
+    from .serializers import PromotionalBannerSerializer
+
+    async def build():
+        banners = [banner async for banner in PromotionalBanner.objects.filter(active=True).aiterator()]
+        return list(PromotionalBannerSerializer(banners, many=True).data)
+
+    return await aget_or_build('banners', build)
+
+
+def _etag(request, name, version):
+    # Responses embed absolute media URLs, so the host is part of the validator.
+    raw = f"{name}:{version}:{request.scheme}://{request.get_host()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def site_etag(request, name):
+    return _etag(request, name, get_site_cache_version())
+
+
+async def asite_etag(request, name):
+    return _etag(request, name, await aget_site_cache_version())
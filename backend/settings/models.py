@@ -1,5 +1,8 @@
 from django.db import models
 from django.core.validators import URLValidator
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_site_cache_version
 
 
 class PromotionalBanner(models.Model):
@@ -176,3 +179,18 @@ class SiteSettings(models.Model):
         """Get or create the singleton instance"""
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
+
+    @classmethod
+    async def aload(cls):
+        """load() for async views"""
+        obj, created = await cls.objects.aget_or_create(pk=1)
+        return obj
+
+
+# Signal to drop cached site settings/banners whenever an admin edits them
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=PromotionalBanner)
+@receiver(post_delete, sender=PromotionalBanner)
+def invalidate_site_cache(sender, instance, **kwargs):
+    bump_site_cache_version()
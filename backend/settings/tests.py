@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from . import cache as site_cache
+from .models import PromotionalBanner, SiteSettings
+
+
+class SiteCacheTests(TestCase):
+    def setUp(self):
+        SiteSettings.load()
+        cache.clear()
+        site_cache._local.clear()
+        self.client = APIClient()
+
+    def test_settings_are_served_from_cache_until_saved(self):
+        self.client.get('/api/settings/contact-info')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/settings/meta-tags')
+        self.assertEqual(response.status_code, 200)
+
+        settings = SiteSettings.load()
+        settings.site_name = 'Renamed'
+        settings.save()
+        response = self.client.get('/api/settings/site-info')
+        self.assertEqual(response.data['site_name'], 'Renamed')
+
+    def test_banner_changes_invalidate_cache(self):
+        PromotionalBanner.objects.create(text='First')
+        self.assertEqual(len(self.client.get('/api/settings/promotional-banners').data), 1)
+        with self.assertNumQueries(0):
+            self.client.get('/api/settings/promotional-banners')
+
+        PromotionalBanner.objects.create(text='Second')
+        self.assertEqual(len(self.client.get('/api/settings/promotional-banners').data), 2)
+        PromotionalBanner.objects.filter(text='First').get().delete()
+        self.assertEqual(len(self.client.get('/api/settings/promotional-banners').data), 1)
+
+    def test_etag_returns_304_until_content_changes(self):
+        response = self.client.get('/api/settings/contact-info')
+        etag = response['ETag']
+        response = self.client.get('/api/settings/contact-info', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        PromotionalBanner.objects.create(text='New')
+        response = self.client.get('/api/settings/contact-info', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class AsyncSiteEndpointTests(TestCase):
+    def setUp(self):
+        SiteSettings.load()
+        PromotionalBanner.objects.create(text='Sale')
+        cache.clear()
+        site_cache._local.clear()
+        self.client = APIClient()
+
+    def test_async_endpoints_match_sync_ones(self):
+        for name in ['promotional-banners', 'contact-info', 'site-info', 'meta-tags']:
+            sync = self.client.get(f'/api/settings/{name}')
+            response = self.client.get(f'/api/async/settings/{name}')
+            self.assertEqual(response.status_code, 200, name)
+            self.assertEqual(response.json(), sync.json(), name)
+            self.assertEqual(response['ETag'], sync['ETag'], name)
+            self.assertEqual(self.client.get(f'/api/async/settings/{name}', HTTP_IF_NONE_MATCH=sync['ETag']).status_code, 304)
+
+        PromotionalBanner.objects.create(text='Second')
+        self.assertEqual(len(self.client.get('/api/async/settings/promotional-banners').json()), 2)
+        self.assertEqual(self.client.post('/api/async/settings/site-info').status_code, 405)
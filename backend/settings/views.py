@@ -1,48 +1,25 @@
+from django.views.decorators.http import condition
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from .models import PromotionalBanner, SiteSettings
-from .serializers import PromotionalBannerSerializer, SiteSettingsSerializer
+from .cache import get_active_banners, get_site_settings, site_etag
+from .serializers import SiteSettingsSerializer
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def promotional_banners(request):
-    """Get all active promotional banners"""
-    banners = PromotionalBanner.objects.filter(active=True)
-    serializer = PromotionalBannerSerializer(banners, many=True)
-    return Response(serializer.data)
-
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def contact_info(request):
-    """Get site contact information and settings"""
-    settings = SiteSettings.load()
-    serializer = SiteSettingsSerializer(settings, context={'request': request})
-    return Response(serializer.data)
-
-
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def site_info(request):
-    """Get site name, description and logo for footer/header"""
-    s = SiteSettings.load()
+def site_info_data(request, s):
+    """Footer/header branding built from a SiteSettings instance"""
     logo_url = None
     if s.logo and hasattr(s.logo, 'url'):
         logo_url = request.build_absolute_uri(s.logo.url)
-    return Response({
+    return {
         'site_name': s.site_name,
         'site_description': s.meta_description or 'Design your style, wear your story. Create custom T-shirts with our easy-to-use design studio or shop from talented designers.',
         'logo_url': logo_url,
-    })
+    }
 
 
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def meta_tags(request):
-    """Get all SEO and social meta tag data for the frontend"""
-    s = SiteSettings.load()
+def meta_tags_data(request, s):
+    """SEO and social meta tags built from a SiteSettings instance"""
     site_url = request.build_absolute_uri('/').rstrip('/')
 
     def abs_url(field):
@@ -75,4 +52,43 @@ def meta_tags(request):
         'twitter_description': s.og_description or s.meta_description or '',
         'twitter_image': og_image,
     }
-    return Response(data)
+    return data
+
+
+def etag_for(name):
+    # Answers If-None-Match with a 304 before the view (or the cache) is touched
+    return condition(etag_func=lambda request, *args, **kwargs: site_etag(request, name))
+
+
+@etag_for('banners')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def promotional_banners(request):
+    """Get all active promotional banners"""
+    return Response(get_active_banners())
+
+
+@etag_for('contact-info')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def contact_info(request):
+    """Get site contact information and settings"""
+    settings = get_site_settings()
+    serializer = SiteSettingsSerializer(settings, context={'request': request})
+    return Response(serializer.data)
+
+
+@etag_for('site-info')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def site_info(request):
+    """Get site name, description and logo for footer/header"""
+    return Response(site_info_data(request, get_site_settings()))
+
+
+@etag_for('meta-tags')
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def meta_tags(request):
+    """Get all SEO and social meta tag data for the frontend"""
+    return Response(meta_tags_data(request, get_site_settings()))
@@ -116,16 +116,8 @@ const Navbar = () => {
 
       setIsSearching(true)
       try {
-        const products = await productsAPI.getFeed()
-        const query = searchQuery.toLowerCase()
-        const filtered = products
-          .filter((p: any) => 
-            p.name?.toLowerCase().includes(query) ||
-            p.designer_name?.toLowerCase().includes(query) ||
-            p.store_name?.toLowerCase().includes(query) ||
-            p.description?.toLowerCase().includes(query)
-          )
-          .slice(0, 6)
+        // Searched on the server so every product can match, not just the newest page
+        const filtered = (await productsAPI.getFeed({ q: searchQuery.trim(), limit: 6 })).results
         setSearchSuggestions(filtered)
         setShowSuggestions(filtered.length > 0)
       } catch (error) {
@@ -231,7 +231,7 @@ const DesignStudio = () => {
   const [libraryCategory, setLibraryCategory] = useState('')
   const [librarySearch, setLibrarySearch] = useState('')
   const [librarySearchOpen, setLibrarySearchOpen] = useState(false)
-  const [libraryPage, setLibraryPage] = useState(1)
+  const [libraryCursor, setLibraryCursor] = useState<string | null>(null)
   const [libraryHasMore, setLibraryHasMore] = useState(true)
   const [libraryLoadingMore, setLibraryLoadingMore] = useState(false)
   const [categories, setCategories] = useState<any[]>([])
@@ -359,7 +359,7 @@ const DesignStudio = () => {
     const loadDesignLibrary = async (page = 1, append = false) => {
       if (page === 1) {
         setLoadingDesigns(true)
-        setLibraryPage(1)
+        setLibraryCursor(null)
         setLibraryHasMore(true)
       } else {
         setLibraryLoadingMore(true)
@@ -369,7 +369,6 @@ const DesignStudio = () => {
         const params = new URLSearchParams()
         if (libraryCategory) params.append('category', libraryCategory)
         if (librarySearch) params.append('search', librarySearch)
-        params.append('page', String(page))
         params.append('page_size', '20')
         
         const response = await designLibraryAPI.listPublic(params.toString() ? `?${params.toString()}` : '')
@@ -381,8 +380,8 @@ const DesignStudio = () => {
           setDesignLibrary(results)
         }
         
-        setLibraryHasMore(results.length === 20)
-        setLibraryPage(page)
+        setLibraryHasMore(!!response?.has_more)
+        setLibraryCursor(response?.next_cursor ?? null)
       } catch {
         if (!append) setDesignLibrary([])
       } finally {
@@ -423,24 +422,23 @@ const DesignStudio = () => {
   }, [libraryCategory, librarySearch])
 
   const loadMoreDesigns = async () => {
-    if (!libraryHasMore || libraryLoadingMore) return
+    if (!libraryHasMore || libraryLoadingMore || !libraryCursor) return
     
-    const nextPage = libraryPage + 1
     setLibraryLoadingMore(true)
     
     try {
       const params = new URLSearchParams()
       if (libraryCategory) params.append('category', libraryCategory)
       if (librarySearch) params.append('search', librarySearch)
-      params.append('page', String(nextPage))
+      params.append('cursor', libraryCursor)
       params.append('page_size', '20')
       
       const response = await designLibraryAPI.listPublic(params.toString() ? `?${params.toString()}` : '')
       const results = Array.isArray(response?.results) ? response.results : Array.isArray(response) ? response : []
       
       setDesignLibrary(prev => [...prev, ...results])
-      setLibraryHasMore(results.length === 20)
-      setLibraryPage(nextPage)
+      setLibraryHasMore(!!response?.has_more)
+      setLibraryCursor(response?.next_cursor ?? null)
     } catch {
       // Ignore errors for load more
     } finally {
@@ -101,23 +101,22 @@ const Home = () => {
   useEffect(() => {
     const loadProducts = async () => {
       try {
-        const data = await productsAPI.getFeed()
-        
-        // Filter products based on active tab
-        let filteredProducts = data
+        // Filter products based on active tab; sale products are filtered on the server
+        let filteredProducts: any[] = []
         if (activeTab === 'new') {
-          // Show newest products (last 20 products)
-          filteredProducts = data.slice(-20).reverse()
+          // Show newest products (the feed is newest first)
+          filteredProducts = (await productsAPI.getFeed({ limit: 20 })).results
         } else if (activeTab === 'bestseller') {
           // Show products with discount (simulating best sellers)
-          filteredProducts = data.filter((p: any) => p.discount_price).slice(0, 20)
+          filteredProducts = (await productsAPI.getFeed({ on_sale: true, limit: 20 })).results
           // If not enough discounted products, fill with regular products
           if (filteredProducts.length < 20) {
-            filteredProducts = [...filteredProducts, ...data.filter((p: any) => !p.discount_price).slice(0, 20 - filteredProducts.length)]
+            const regular = (await productsAPI.getFeed({ limit: 40 })).results.filter((p: any) => !p.discount_price)
+            filteredProducts = [...filteredProducts, ...regular.slice(0, 20 - filteredProducts.length)]
           }
         } else if (activeTab === 'sale') {
           // Show only products with discount
-          filteredProducts = data.filter((p: any) => p.discount_price).slice(0, 20)
+          filteredProducts = (await productsAPI.getFeed({ on_sale: true, limit: 20 })).results
         }
         
         setAllProducts(filteredProducts.slice(0, 20))
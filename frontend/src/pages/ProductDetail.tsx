@@ -41,8 +41,8 @@ const ProductDetail = () => {
       try {
         const data = await productsAPI.getById(Number(id))
         setProduct(data)
-        const allProducts = await productsAPI.getFeed()
-        setRelatedProducts(allProducts.filter((p: any) => p.id !== Number(id)).slice(0, 4))
+        const feed = await productsAPI.getFeed({ limit: 5 })
+        setRelatedProducts(feed.results.filter((p: any) => p.id !== Number(id)).slice(0, 4))
         
         // Check if product is in favorites
         const favorites = JSON.parse(localStorage.getItem('favorites') || '[]')
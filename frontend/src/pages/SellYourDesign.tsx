@@ -18,6 +18,7 @@ const SellYourDesign = () => {
   const [searchKeywords, setSearchKeywords] = useState('')
   const [myItems, setMyItems] = useState<any[]>([])
   const [commissions, setCommissions] = useState<any[]>([])
+  const [commissionSummary, setCommissionSummary] = useState<any>(null)
   const [categories, setCategories] = useState<any[]>([])
 
   const [error, setError] = useState('')
@@ -37,8 +38,12 @@ const SellYourDesign = () => {
       const items = await designLibraryAPI.listMy(token)
       setMyItems(Array.isArray(items) ? items : [])
 
-      const com = await designCommissionAPI.listMy(token)
-      setCommissions(Array.isArray(com) ? com : [])
+      const [com, summary] = await Promise.all([
+        designCommissionAPI.listMy(token),
+        designCommissionAPI.summary(token),
+      ])
+      setCommissions(Array.isArray(com?.results) ? com.results : [])
+      setCommissionSummary(summary)
 
       // Fetch categories
       const cats = await designCategoryAPI.list()
@@ -104,25 +109,8 @@ const SellYourDesign = () => {
     return (me.full_name || `${me.first_name || ''} ${me.last_name || ''}`.trim() || me.username || 'User').trim()
   }, [me])
 
-  const totalPending = useMemo(() => {
-    let sum = 0
-    for (const c of commissions) {
-      if (c.status === 'completed') continue
-      const amt = Number(c.amount)
-      if (!Number.isNaN(amt)) sum += amt
-    }
-    return sum
-  }, [commissions])
-
-  const totalEarnings = useMemo(() => {
-    let sum = 0
-    for (const c of commissions) {
-      if (c.status !== 'completed') continue
-      const amt = Number(c.amount)
-      if (!Number.isNaN(amt)) sum += amt
-    }
-    return sum
-  }, [commissions])
+  const totalPending = Number(commissionSummary?.pending?.amount ?? 0)
+  const totalEarnings = Number(commissionSummary?.completed?.amount ?? 0)
 
   const pendingCount = useMemo(() => myItems.filter(i => i.approval_status === 'pending').length, [myItems])
 
@@ -25,8 +25,11 @@ const Wishlist = () => {
         setFavorites(favoriteIds)
 
         if (favoriteIds.length > 0) {
-          const allProducts = await productsAPI.getFeed()
-          const favoriteProducts = allProducts.filter((p: any) => favoriteIds.includes(p.id))
+          // Fetched one by one: the feed is paged, and a wishlist is short
+          const loaded = await Promise.all(
+            favoriteIds.map((id: number) => productsAPI.getById(id).catch(() => null))
+          )
+          const favoriteProducts = loaded.filter(Boolean)
           setProducts(favoriteProducts)
           // Clean stale IDs (products no longer available) from localStorage
           const validIds = favoriteProducts.map((p: any) => p.id)
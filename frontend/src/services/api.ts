@@ -387,8 +387,18 @@ export const designCategoryAPI = {
 }
 
 export const designCommissionAPI = {
-  listMy: async (token: string) => {
+  listMy: async (token: string, cursor?: string | null) => {
     const response = await api.get('/design-commissions/', {
+      params: cursor ? { cursor } : undefined,
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    })
+    return response.data
+  },
+
+  summary: async (token: string) => {
+    const response = await api.get('/design-commissions/summary/', {
       headers: {
         Authorization: `Bearer ${token}`,
       },
@@ -397,24 +407,33 @@ export const designCommissionAPI = {
   },
 }
 
+// Follows next_cursor through every page of a paged product list and returns the rows as one array
+const getAllPages = async (path: string, params: Record<string, any> = {}) => {
+  const rows: any[] = []
+  let cursor: string | undefined
+  do {
+    const response = await api.get(path, { params: { ...params, limit: 60, cursor } })
+    rows.push(...response.data.results)
+    cursor = response.data.has_more ? response.data.next_cursor : undefined
+  } while (cursor)
+  return rows
+}
+
 export const productsAPI = {
-  getFeed: async () => {
-    const response = await api.get('/feed')
+  // One page of the storefront feed ({ results, next_cursor, has_more, limit });
+  // pass the previous page's next_cursor to continue, limit is capped at 60.
+  // `q` searches name, description, store, designer and category on the server; `on_sale` keeps discounted products
+  getFeed: async (params: { limit?: number; cursor?: string; q?: string; on_sale?: boolean } = {}) => {
+    const response = await api.get('/feed', { params })
     return response.data
   },
 
   getAll: async () => {
-    const response = await api.get('/products/');
-    return response.data;
+    return getAllPages('/products/')
   },
 
   getByStoreSlug: async (storeSlug: string) => {
-    const response = await api.get('/products/', {
-      params: {
-        store: storeSlug,
-      },
-    })
-    return response.data
+    return getAllPages('/products/', { store: storeSlug })
   },
 
   getById: async (id: number) => {